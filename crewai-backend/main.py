@@ -1,18 +1,73 @@
 import sys
+from pathlib import Path
 sys.path.append("/Users/amayuruamarasinghe/Documents/MetaRune Labs/AI Agents/latest_ai_development/src")
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
 import asyncio
 import json
+import time
 import uuid
 import subprocess
 import os
-from fastapi import FastAPI
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from nats.aio.client import Client as NATS
 from fastapi.middleware.cors import CORSMiddleware
+from latest_ai_development.tools import columnar
+from latest_ai_development.tools.claim_check import open_claim_check
+from latest_ai_development.tools.gateway.admission import AdmissionController, AdmissionRejected, estimate_task_tokens
+from latest_ai_development.tools.gateway.dispatcher import ResultDispatcher
+from latest_ai_development.tools.gateway.job_store import JobStore
+from latest_ai_development.tools.gateway.result_cache import ResultCache, cache_key, is_complete, wants_fresh
+from latest_ai_development.tools.metrics import CONTENT_TYPE, Registry, SnapshotAggregator
 
 
 app = FastAPI()
 nc = NATS()
+
+# Gateway metrics, served in Prometheus text format on /metrics
+metrics_registry = Registry()
+REQUEST_LATENCY = metrics_registry.histogram(
+    "gateway_request_duration_seconds", "HTTP request latency by endpoint", ("endpoint", "method")
+)
+TASKS_IN_FLIGHT = metrics_registry.gauge("gateway_tasks_in_flight", "Tasks published and awaiting a result")
+JOBS_TRACKED = metrics_registry.gauge("gateway_async_jobs", "Async jobs held in the job store")
+TASK_TIMEOUTS = metrics_registry.counter("gateway_task_timeouts_total", "Tasks that timed out waiting for agents")
+AGENT_RESULTS = metrics_registry.counter(
+    "gateway_agent_results_total", "Sub-agent results received in final task results", ("agent",)
+)
+# Latest metric snapshots published by the agents over NATS
+agent_snapshots = SnapshotAggregator()
+metrics_registry.register_collector(agent_snapshots.collect)
+ADMISSION_REJECTED = metrics_registry.counter(
+    "gateway_admission_rejected_total", "Requests rejected with 429 by admission control", ("scope",)
+)
+ADMISSION_QUEUE_WAIT = metrics_registry.histogram(
+    "gateway_admission_queue_seconds", "Time requests spent queued for admission"
+)
+CACHE_REQUESTS = metrics_registry.counter(
+    "gateway_cache_requests_total", "Task requests by result cache outcome", ("status",)
+)
+
+# Identical prompts share one pipeline run and reuse its result for GATEWAY_CACHE_TTL seconds
+result_cache = ResultCache()
+# Token buckets in tasks/s and estimated LLM tokens/s, globally and per client (see admission.py)
+admission = AdmissionController()
+# Single client.final.results subscription shared by all waiting requests
+result_dispatcher = ResultDispatcher()
+
+TASK_TIMEOUT = 60
+# Upper bound on tasks a single /start-tasks call keeps in flight
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("BATCH_MAX_IN_FLIGHT", "64"))
+
+# Async jobs (POST /tasks, GET /tasks/{id}); JOB_STORE_SQLITE persists them across restarts
+job_store = JobStore(sqlite_path=os.environ.get("JOB_STORE_SQLITE"))
+# Only results of async jobs are handed over (and have their claim checks fetched) for the job store
+# Jobs are served (and spilled) as JSON, so columnar arrays are stored as lists
+result_dispatcher.add_listener(lambda task_id, result: job_store.complete(task_id, columnar.to_json(result)),
+                               wants=job_store.tracks)
+MAX_LONG_POLL = 60
 agent_processes = []
 nats_process = None  # Variable to store the NATS subprocess
 
@@ -37,6 +92,27 @@ AGENT_SCRIPTS = [
 
 class TaskRequest(BaseModel):
     task_description: str
+    user_context: Optional[Dict[str, Any]] = None
+    # Selects the user's stored profile in the prompt processor
+    user_id: Optional[str] = None
+    # "columnar" returns the price agent's full bars (as JSON lists) instead of summaries
+    result_encoding: Optional[str] = None
+
+
+class BatchTaskRequest(BaseModel):
+    tasks: List[TaskRequest]
+    max_in_flight: Optional[int] = None
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
 
 
 def start_agents():
@@ -83,6 +159,9 @@ async def startup_event():
     start_agents()
     # Connect to the NATS server
     await nc.connect("nats://localhost:4222")
+    await agent_snapshots.subscribe(nc)
+    result_dispatcher.claims = await open_claim_check(nc)
+    await result_dispatcher.subscribe(nc)
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -93,37 +172,165 @@ async def shutdown_event():
     # Stop NATS server
     stop_nats_server()
 
+def client_id(http_request: Request) -> str:
+    """Identify the caller for per-client limits: X-Client-Id header, else the remote address."""
+    return http_request.headers.get("x-client-id") or (http_request.client.host if http_request.client else "unknown")
+
+
+async def admit(client: str, task_description: str, reject: bool = True) -> None:
+    try:
+        waited = await admission.acquire(client, estimate_task_tokens(task_description), reject=reject)
+    except AdmissionRejected as e:
+        ADMISSION_REJECTED.inc(scope=e.scope)
+        raise
+    ADMISSION_QUEUE_WAIT.observe(waited)
+
+
+def rejected_response(e: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": e.retry_after_header})
+
+
 @app.post("/start-task")
-async def start_task(request: TaskRequest):
+async def start_task(request: TaskRequest, http_request: Request, response: Response):
+    key = cache_key(request.task_description, request.user_context, request.user_id, request.result_encoding)
+    client = client_id(http_request)
+
+    async def admitted_run():
+        # Only requests that actually run the pipeline spend rate-limit capacity
+        await admit(client, request.task_description)
+        return await run_task(request.task_description, request.user_context, request.user_id,
+                              request.result_encoding)
+
+    try:
+        result, status = await result_cache.get_or_run(
+            key,
+            admitted_run,
+            bypass=wants_fresh(http_request.headers),
+            cacheable=is_complete,
+        )
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    CACHE_REQUESTS.inc(status=status)
+    response.headers["X-Cache"] = status
+    return result
+
+
+def build_task(task_description: str, user_context: Optional[Dict[str, Any]] = None, user_id: Optional[str] = None,
+               result_encoding: Optional[str] = None):
     task_id = str(uuid.uuid4())
     task_data = {
         "task_id": task_id,
-        "task_description": request.task_description,
+        "task_description": task_description,
         "task_type": "stock_recommendation"
     }
+    if user_context:
+        task_data["user_context"] = user_context
+    if user_id:
+        task_data["user_id"] = user_id
+    if result_encoding:
+        task_data["result_encoding"] = result_encoding
+    return task_id, task_data
 
-    future = asyncio.Future()
 
-    async def result_handler(msg):
-        try:
-            result = json.loads(msg.data.decode())
-            incoming_id = (
-                result.get("task_id")
-                or result.get("original_task_data", {}).get("task_id")
-                or "no-id"
-            )
-            if incoming_id == task_id and not future.done():
-                future.set_result(result)
-        except Exception as e:
-            print("Result parse error:", e)
+async def await_result(task_id: str, future: asyncio.Future):
+    """Wait for a published task's final result, recording gateway metrics."""
+    TASKS_IN_FLIGHT.inc()
+    try:
+        result = await result_dispatcher.wait(task_id, future, timeout=TASK_TIMEOUT)
+        for agent_result in result.get("aggregated_results", []):
+            AGENT_RESULTS.inc(agent=agent_result.get("agent") or "unknown")
+        # Columnar results hold numpy views; every caller of this answers in JSON
+        return columnar.to_json(result)
+    except asyncio.TimeoutError:
+        TASK_TIMEOUTS.inc()
+        return {"error": "Timeout waiting for response from agents"}
+    finally:
+        TASKS_IN_FLIGHT.dec()
+
 
-    subscription = await nc.subscribe("client.final.results", cb=result_handler)
+async def run_task(task_description: str, user_context: Optional[Dict[str, Any]] = None,
+                   user_id: Optional[str] = None, result_encoding: Optional[str] = None):
+    """Publish one task to the Captain and wait for its final result."""
+    task_id, task_data = build_task(task_description, user_context, user_id, result_encoding)
+    future = result_dispatcher.expect(task_id)
     await nc.publish("crew.captain", json.dumps(task_data).encode())
+    return await await_result(task_id, future)
+
+
+@app.post("/start-tasks")
+async def start_tasks(request: BatchTaskRequest, http_request: Request):
+    """
+    Submit many tasks at once and stream one NDJSON line per task as results arrive.
+
+    At most `max_in_flight` (capped by BATCH_MAX_IN_FLIGHT) tasks are outstanding;
+    each refill of the window is published as one burst followed by a single flush.
+    Lines are {"index", "task_id", "result"} in completion order. Batch tasks
+    queue for admission rather than being rejected.
+    """
+    window = max(1, min(request.max_in_flight or BATCH_MAX_IN_FLIGHT, BATCH_MAX_IN_FLIGHT))
+    return StreamingResponse(stream_batch(request.tasks, window, client_id(http_request)),
+                             media_type="application/x-ndjson")
+
+
+async def stream_batch(tasks: List[TaskRequest], window: int, client: str):
+    queued = iter(enumerate(tasks))
+    pending: Dict[asyncio.Task, tuple] = {}
+
+    async def top_up():
+        published = 0
+        for index, task in queued:
+            await admit(client, task.task_description, reject=False)
+            task_id, task_data = build_task(task.task_description, task.user_context, task.user_id,
+                                            task.result_encoding)
+            future = result_dispatcher.expect(task_id)
+            # publish() only buffers; the whole burst goes out with one flush below
+            await nc.publish("crew.captain", json.dumps(task_data).encode())
+            pending[asyncio.create_task(await_result(task_id, future))] = (index, task_id)
+            published += 1
+            if len(pending) >= window:
+                break
+        if published:
+            await nc.flush()
 
     try:
-        result = await asyncio.wait_for(future, timeout=60)
-        await subscription.unsubscribe()
-        return result
-    except asyncio.TimeoutError:
-        await subscription.unsubscribe()
-        return {"error": "Timeout waiting for response from agents"}
+        await top_up()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in done:
+                index, task_id = pending.pop(waiter)
+                yield json.dumps({"index": index, "task_id": task_id, "result": waiter.result()}) + "\n"
+            await top_up()
+    finally:
+        # Client went away: stop waiting for the remaining tasks
+        for waiter in pending:
+            waiter.cancel()
+
+
+@app.post("/tasks", status_code=202)
+async def submit_task(request: TaskRequest, http_request: Request):
+    """Publish a task and return its task_id immediately; fetch the result with GET /tasks/{task_id}."""
+    try:
+        await admit(client_id(http_request), request.task_description)
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    task_id, task_data = build_task(request.task_description, request.user_context, request.user_id,
+                                    request.result_encoding)
+    job = job_store.submit(task_id)
+    await nc.publish("crew.captain", json.dumps(task_data).encode())
+    return job_store.public_view(job)
+
+
+@app.get("/tasks/{task_id}")
+async def get_task(task_id: str, wait: float = 0):
+    """Return the job; with `wait` > 0, long-poll up to that many seconds for it to finish."""
+    job = await job_store.wait(task_id, timeout=min(max(wait, 0), MAX_LONG_POLL))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired task_id {task_id}")
+    return job_store.public_view(job)
+
+
+@app.get("/metrics")
+async def metrics():
+    # Jobs expire between submits, so the gauge is taken at scrape time
+    JOBS_TRACKED.set(job_store.sweep())
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE)
@@ -105,6 +105,10 @@ class ServiceManager:
             else:
                 cmd = ["nats-server", "-DV"]
 
+            # JetStream work-queue mode needs the server started with -js
+            if os.environ.get("NATS_JETSTREAM", "false").lower() == "true":
+                cmd.append("-js")
+
             self.nats_process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
@@ -1,6 +1,12 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 
+from latest_ai_development.tools.cassette import install_litellm
+from latest_ai_development.tools.knowledge_tool import KnowledgeSearchTool
+
+# Record/replay every agent's LLM calls when LLM_CASSETTE is set
+install_litellm()
+
 # If you want to run a snippet of code before or after the crew starts, 
 # you can use the @before_kickoff and @after_kickoff decorators
 # https://docs.crewai.com/concepts/crews#example-crew-class-with-decorators
@@ -15,12 +21,21 @@ class LatestAiDevelopment():
 	agents_config = 'config/agents.yaml'
 	tasks_config = 'config/tasks.yaml'
 
+	def __init__(self, report_file: str = 'report.md', llm=None):
+		# Where the reporting task writes its markdown; parallel runs give each topic its own file
+		self.report_file = report_file
+		# LLM for every agent (None: crewAI's default); parallel evaluation passes a throttled one
+		self.llm = llm
+
 	# If you would like to add tools to your agents, you can learn more about it here:
 	# https://docs.crewai.com/concepts/agents#agent-tools
 	@agent
 	def researcher(self) -> Agent:
 		return Agent(
 			config=self.agents_config['researcher'],
+			llm=self.llm,
+			# Top-k passages from knowledge/, embedded incrementally (see tools/knowledge.py)
+			tools=[KnowledgeSearchTool()],
 			verbose=True
 		)
 
@@ -28,6 +43,8 @@ class LatestAiDevelopment():
 	def reporting_analyst(self) -> Agent:
 		return Agent(
 			config=self.agents_config['reporting_analyst'],
+			llm=self.llm,
+			tools=[KnowledgeSearchTool()],
 			verbose=True
 		)
 
@@ -44,7 +61,7 @@ class LatestAiDevelopment():
 	def reporting_task(self) -> Task:
 		return Task(
 			config=self.tasks_config['reporting_task'],
-			output_file='report.md'
+			output_file=self.report_file
 		)
 
 	@crew
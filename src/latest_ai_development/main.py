@@ -1,10 +1,23 @@
 #!/usr/bin/env python
+import argparse
+import asyncio
 import sys
+import time
 import warnings
 
 from datetime import datetime
 
 from latest_ai_development.crew import LatestAiDevelopment
+from latest_ai_development.tools.parallel_eval import DEFAULT_FEEDBACK, SHARD_DIR, parallel_test, parallel_train
+from latest_ai_development.tools.parallel_runs import (
+    DEFAULT_WORKERS,
+    REPORTS_DIR,
+    crew_output_dir,
+    load_topics,
+    render_summary,
+    run_topics,
+    write_summary,
+)
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -16,27 +29,88 @@ warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 def run():
     """
     Run the crew.
+
+    With no arguments, runs the default topic and writes report.md. Topics given
+    as arguments or in --topics-file run concurrently, one report per topic:
+
+        run_crew "Mechanical Engineering" "Robotics" --workers 4
+        run_crew --topics-file topics.txt --output-dir reports
     """
+    parser = argparse.ArgumentParser(description="Run the research crew for one or more topics")
+    parser.add_argument("topics", nargs="*", help="Topics to report on")
+    parser.add_argument("--topics-file", help="File with one topic per line")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Crews running at once")
+    parser.add_argument("--output-dir", default=REPORTS_DIR, help="Directory for per-topic reports")
+    args = parser.parse_args(sys.argv[1:])
+    topics = load_topics(args.topics, args.topics_file)
+    try:
+        output_dir = crew_output_dir(args.output_dir)
+    except ValueError as e:
+        parser.error(str(e))
+
     inputs = {
         'topic': 'Mechanical Engineering',
         'current_year': str(datetime.now().year)
     }
-    
-    try:
-        LatestAiDevelopment().crew().kickoff(inputs=inputs)
-    except Exception as e:
-        raise Exception(f"An error occurred while running the crew: {e}")
+
+    if not topics:
+        try:
+            LatestAiDevelopment().crew().kickoff(inputs=inputs)
+        except Exception as e:
+            raise Exception(f"An error occurred while running the crew: {e}")
+        return
+
+    started = time.perf_counter()
+    results = asyncio.run(run_topics(
+        topics,
+        lambda report_file: LatestAiDevelopment(report_file=report_file).crew(),
+        workers=args.workers,
+        output_dir=output_dir,
+        inputs=inputs,
+    ))
+    elapsed = time.perf_counter() - started
+    print(render_summary(results, elapsed, args.workers))
+    print(f"Summary written to {write_summary(results, elapsed, args.workers, output_dir)}")
+    failed = [r["topic"] for r in results if r["status"] != "ok"]
+    if failed:
+        raise Exception(f"An error occurred while running the crew for: {', '.join(failed)}")
+
+
+def build_crew(llm=None):
+    """Crew factory for worker processes (must be a picklable top-level function)."""
+    return LatestAiDevelopment(llm=llm).crew()
+
+
+def _evaluation_args(second, second_help, training=False):
+    parser = argparse.ArgumentParser(description="Shard iterations across processes with --workers")
+    parser.add_argument("n_iterations", type=int)
+    parser.add_argument(second, help=second_help)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1, serial)")
+    parser.add_argument("--max-llm-calls", type=int, help="Cap on LLM calls in flight across all workers")
+    parser.add_argument("--shard-dir", default=SHARD_DIR, help="Per-worker results directory")
+    if training:
+        parser.add_argument("--feedback", default=DEFAULT_FEEDBACK,
+                            help="Feedback given to every task when training in parallel")
+    return parser.parse_args(sys.argv[1:])
 
 
 def train():
     """
     Train the crew for a given number of iterations.
+
+        train 20 trained.pkl --workers 4 --max-llm-calls 8 --feedback "..."
     """
+    args = _evaluation_args("filename", "Trained agents data file", training=True)
     inputs = {
-        "topic": "AI LLMs"
+        "topic": "AI LLMs",
+        "current_year": str(datetime.now().year)
     }
     try:
-        LatestAiDevelopment().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        if args.workers > 1:
+            parallel_train(build_crew, args.n_iterations, args.filename, inputs, args.workers,
+                           max_llm_calls=args.max_llm_calls, feedback=args.feedback, shard_dir=args.shard_dir)
+        else:
+            LatestAiDevelopment().crew().train(n_iterations=args.n_iterations, filename=args.filename, inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
@@ -54,12 +128,20 @@ def replay():
 def test():
     """
     Test the crew execution and returns the results.
+
+        test 20 gpt-4o-mini --workers 4 --max-llm-calls 8
     """
+    args = _evaluation_args("eval_llm", "Model that scores the task outputs")
     inputs = {
-        "topic": "AI LLMs"
+        "topic": "AI LLMs",
+        "current_year": str(datetime.now().year)
     }
     try:
-        LatestAiDevelopment().crew().test(n_iterations=int(sys.argv[1]), openai_model_name=sys.argv[2], inputs=inputs)
+        if args.workers > 1:
+            parallel_test(build_crew, args.n_iterations, args.eval_llm, inputs, args.workers,
+                          max_llm_calls=args.max_llm_calls, shard_dir=args.shard_dir)
+        else:
+            LatestAiDevelopment().crew().test(n_iterations=args.n_iterations, eval_llm=args.eval_llm, inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
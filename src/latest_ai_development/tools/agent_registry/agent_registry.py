@@ -1,12 +1,10 @@
 import os
 import json
 import asyncio
-import openai
-import chromadb
 from nats.aio.client import Client as NATS
-from chromadb.config import Settings
-from chromadb.utils import embedding_functions
 from dotenv import load_dotenv
+from latest_ai_development.tools.cassette import wrap_openai_client
+from latest_ai_development.tools.llm import get_api_key, get_base_url
 
 load_dotenv()
 
@@ -22,18 +20,27 @@ class AgentRegistry:
     based on the user's request.
     """
     def __init__(self, collection_name="agent_registry"):
-        openai.api_key = os.getenv("OPENAI_API_KEY")
+        # chromadb and openai take seconds to import; only processes that build a registry pay for them
+        import chromadb
+        import openai
+        from chromadb.utils import embedding_functions
+
+        openai.api_key = get_api_key()
 
         # Create or load the Chroma client (persistent DB in ./chroma_db)
         self.client = chromadb.PersistentClient(path="./chroma_db")
 
+        embedding_function = embedding_functions.OpenAIEmbeddingFunction(
+            api_key=openai.api_key,
+            api_base=get_base_url(),
+            model_name="text-embedding-ada-002"
+        )
+        wrap_openai_client(embedding_function.client)
+
         # Create or get the collection
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
-            embedding_function=embedding_functions.OpenAIEmbeddingFunction(
-                api_key=openai.api_key,
-                model_name="text-embedding-ada-002"
-            )
+            embedding_function=embedding_function
         )
 
     def add_sub_agent(self, agent_id: str, description: str):
@@ -1,7 +1,13 @@
 import asyncio
 import json
+import time
 from nats.aio.client import Client as NATS
-from latest_ai_development.tools.agent_registry.agent_registry import AgentRegistry
+from latest_ai_development.tools import columnar
+from latest_ai_development.tools.claim_check import open_claim_check
+from latest_ai_development.tools.hedging import FanOutPolicy, agent_key, agent_subject
+from latest_ai_development.tools.jetstream import setup_jetstream, subscribe
+from latest_ai_development.tools.metrics import AgentMetrics
+from latest_ai_development.tools.tracing import SpanKind, Tracer
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +16,9 @@ EXECUTOR_TOPIC = "agent.executor"
 CREW_RESPONSES_TOPIC = "crew.responses"
 CLIENT_REPLY_TOPIC = "client.final.results"
 
+tracer = Tracer("executor")
+metrics = AgentMetrics("executor")
+
 def extract_task_id(data):
     """Recursively extract task_id from nested dicts."""
     if not isinstance(data, dict):
@@ -24,28 +33,72 @@ def extract_task_id(data):
                 return tid
     return "no-id"
 
-async def executor_subagent():
+async def executor_subagent(policy=None):
     nc = NATS()
     await nc.connect("nats://localhost:4222")
-    registry = AgentRegistry()
+    metrics.start_publishing(nc)
+    js = await setup_jetstream(nc)
+    # Large sub-agent results arrive as claim-check stubs; the aggregate is checked in too if it is large
+    claims = await open_claim_check(nc)
+    # Sub-agent budgets and hedging; replicas are discovered from their metrics snapshots
+    policy = policy or FanOutPolicy()
+    await policy.replicas.subscribe(nc)
 
     tasks_responses = {}
     tasks_expected_count = {}
-
+    # task_id -> {agent_id: call}; a call tracks the dispatch, the hedge and the watcher of one sub-agent
+    tasks_calls = {}
+
+    async def watch_call(task_id, agent_id, call, payload, headers):
+        """Hedge the call at the agent's p95 and give up on it at its budget."""
+        budget = policy.timeout(agent_id)
+        try:
+            delay = policy.hedge_delay(agent_id)
+            if delay is not None:
+                try:
+                    await asyncio.wait_for(call["answered"].wait(), delay)
+                    return
+                except asyncio.TimeoutError:
+                    replica = policy.hedge(agent_id, exclude=call["replica"])
+                    if replica:
+                        call["hedged_to"] = replica
+                        await nc.publish(agent_subject(agent_id, replica), payload, headers=headers)
+                        print(f"[Executor] Hedged {agent_id} for {task_id} to {replica} after {delay * 1000:.0f} ms")
+            remaining = budget - (time.perf_counter() - call["sent_at"])
+            await asyncio.wait_for(call["answered"].wait(), max(0.0, remaining))
+        except asyncio.TimeoutError:
+            if call["answered"].is_set():
+                return
+            call["answered"].set()
+            policy.stats["timeouts"] += 1
+            print(f"[Executor] {agent_id} did not answer task {task_id} within {budget:g} s")
+            span = tracer.start_span("executor timeout", headers=headers, task_id=task_id,
+                                     kind=SpanKind.INTERNAL, attributes={"agent": agent_id})
+            await collect(task_id, {"task_id": task_id, "agent": agent_id,
+                                    "error": f"No response within {budget:g} s"}, span)
+            span.end()
+
+    @metrics.instrument
     async def executor_handler(msg):
         structured_data = json.loads(msg.data.decode())
         print(f"[Executor] Received structured data: {structured_data}")
 
         task_id = extract_task_id(structured_data)
         print(f"[Executor] Extracted task_id: {task_id}")
+        if task_id in tasks_calls:
+            # A redelivery of a task that is still being answered; its calls are already watched
+            print(f"[Executor] Task {task_id} is already in flight")
+            return
+        span = tracer.start_message_span(msg, task_id=task_id, name="executor fan-out")
 
-        # You may want to get agents dynamically from registry here, or keep static list:
+        # You may want to get agents dynamically from AgentRegistry here, or keep static list:
         all_agent_ids = ["stock_news_agent", "stock_price_agent", "price_predictor_agent"]
 
         # Initialize response tracking only if not exists (handle retries)
         if task_id not in tasks_responses:
             tasks_responses[task_id] = []
             tasks_expected_count[task_id] = len(all_agent_ids)
+        tasks_calls[task_id] = calls = {}
 
         for agent_id in all_agent_ids:
             subagent_data = {
@@ -55,20 +108,22 @@ async def executor_subagent():
                 "ProcessContext": structured_data.get("ProcessContext", {}),
                 "original_task_data": structured_data.get("original_task_data", {})
             }
-            subagent_topic = f"agent.{agent_id}"
-            await nc.publish(subagent_topic, json.dumps(subagent_data).encode())
+            payload = json.dumps(subagent_data).encode()
+            # A chosen replica when the agent can be hedged, so the hedge goes elsewhere
+            replica = policy.dispatch(agent_id)
+            subagent_topic = agent_subject(agent_id, replica)
+            headers = span.headers()
+            await nc.publish(subagent_topic, payload, headers=headers)
+            call = {"sent_at": time.perf_counter(), "replica": replica, "hedged_to": None,
+                    "answered": asyncio.Event()}
+            call["watcher"] = asyncio.create_task(watch_call(task_id, agent_id, call, payload, headers))
+            calls[agent_id] = call
             print(f"[Executor] Published to {subagent_topic} with task_id {task_id}")
+        span.set_attribute("fanout.count", len(all_agent_ids))
+        span.end()
 
-    async def subagent_response_handler(msg):
-        result_data = json.loads(msg.data.decode())
-        print(f"[Executor] Received result data: {result_data}")
-
-        task_id = extract_task_id(result_data)
-        print(f"[Executor] Extracted task_id from sub-agent response: {task_id}")
-
-        if task_id not in tasks_responses:
-            tasks_responses[task_id] = []
-
+    async def collect(task_id, result_data, span):
+        """Add one sub-agent result (or timeout) to the task; publish the aggregate once all are in."""
         agent_name = result_data.get("agent")
         # Prevent duplicate agent responses
         if not any(response.get("agent") == agent_name for response in tasks_responses[task_id]):
@@ -81,15 +136,73 @@ async def executor_subagent():
                 "task_id": task_id,
                 "aggregated_results": tasks_responses[task_id]
             }
-            await nc.publish(CLIENT_REPLY_TOPIC, json.dumps(final_result).encode())
-            print(f"[Executor] Publishing final result: {final_result}")
+            frames = [r["frame"] for r in final_result["aggregated_results"] if "frame" in r]
+            if frames:
+                # Nest the frames in one columnar bundle; results reference them by index
+                results, index = [], 0
+                for response in final_result["aggregated_results"]:
+                    if "frame" in response:
+                        response = {"agent": response["agent"], "frame": index}
+                        index += 1
+                    results.append(response)
+                payload = columnar.bundle({"task_id": task_id, "aggregated_results": results}, frames)
+                stub = await claims.check_in(payload, task_id, "Executor", columnar.RESULT_ENCODING)
+                headers = columnar.frame_headers(task_id, "Executor", span.headers()) if stub is None else span.headers()
+                await nc.publish(CLIENT_REPLY_TOPIC, stub or payload, headers=headers)
+                print(f"[Executor] Publishing final result for {task_id}: {len(payload)}-byte columnar bundle")
+            else:
+                payload = json.dumps(final_result).encode()
+                await nc.publish(CLIENT_REPLY_TOPIC, await claims.check_in(payload, task_id, "Executor") or payload,
+                                 headers=span.headers())
+                print(f"[Executor] Publishing final result: {final_result}")
 
             # Clean up tracking
             tasks_responses.pop(task_id, None)
             tasks_expected_count.pop(task_id, None)
+            for call in tasks_calls.pop(task_id, {}).values():
+                call["answered"].set()
+
+    @metrics.instrument
+    async def subagent_response_handler(msg):
+        if columnar.is_columnar(msg):
+            # Binary results are routed by their headers and forwarded verbatim
+            result_data = {
+                "task_id": msg.headers.get(columnar.TASK_ID_HEADER),
+                "agent": msg.headers.get(columnar.AGENT_HEADER),
+                "frame": msg.data,
+            }
+            print(f"[Executor] Received {len(msg.data)}-byte columnar result from {result_data['agent']}")
+        else:
+            result_data = json.loads(msg.data.decode())
+            print(f"[Executor] Received result data: {result_data}")
+
+        task_id = extract_task_id(result_data)
+        print(f"[Executor] Extracted task_id from sub-agent response: {task_id}")
+        span = tracer.start_message_span(msg, task_id=task_id, name="executor collect")
+        span.set_attribute("agent", result_data.get("agent"))
+
+        calls = tasks_calls.get(task_id)
+        if calls is None:
+            print(f"[Executor] Dropping result from {result_data.get('agent')} for finished or unknown task {task_id}")
+            span.end()
+            return
+        call = calls.get(agent_key(result_data.get("agent") or ""))
+        if call is not None:
+            if call["answered"].is_set():
+                # The other copy of a hedged call, or an answer after the agent's budget ran out
+                print(f"[Executor] Dropping late result from {result_data.get('agent')} for {task_id}")
+                span.end()
+                return
+            call["answered"].set()
+            policy.latencies.record(agent_key(result_data["agent"]), time.perf_counter() - call["sent_at"])
+            span.set_attribute("hedged", call["hedged_to"] is not None)
+
+        await collect(task_id, result_data, span)
+        span.end()
 
     # Subscribe to executor commands and crew responses
-    sub_executor = await nc.subscribe(EXECUTOR_TOPIC, cb=executor_handler)
+    # Sub-agent subjects stay on core NATS; in JetStream mode the task is acked once fanned out
+    sub_executor = await subscribe(nc, js, EXECUTOR_TOPIC, executor_handler, durable="executor")
     sub_responses = await nc.subscribe(CREW_RESPONSES_TOPIC, cb=subagent_response_handler)
 
     print("[Executor] ExecutorSubAgent is running...")
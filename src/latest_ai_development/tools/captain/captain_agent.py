@@ -1,29 +1,43 @@
 import asyncio
 import json
 from nats.aio.client import Client as NATS
+from latest_ai_development.tools.jetstream import setup_jetstream, subscribe
+from latest_ai_development.tools.metrics import AgentMetrics
+from latest_ai_development.tools.tracing import Tracer
 
 CAPTAIN_TOPIC = "crew.captain"          # Captain receives tasks here
 PROMPT_PROCESSOR_TOPIC = "agent.prompt_processor"
 CAPTAIN_RESPONSE_TOPIC = "crew.captain.responses"
 
+tracer = Tracer("captain")
+metrics = AgentMetrics("captain")
+
 async def captain_agent():
     nc = NATS()
     await nc.connect("nats://localhost:4222")
+    metrics.start_publishing(nc)
+    # In JetStream mode tasks come from a durable work queue and the next hop is persisted before ack
+    js = await setup_jetstream(nc)
+    publish = js.publish if js else nc.publish
     running = True
+    @metrics.instrument
     async def captain_handler(msg):
         task_data = json.loads(msg.data.decode())
         print(f"[Captain] Received Task: {task_data}")
-        
-        # Wrap the task data
-        wrapped_data = {
-            "original_task_data": task_data
-        }
-        await nc.publish(PROMPT_PROCESSOR_TOPIC, json.dumps(wrapped_data).encode())
+
+        # Entry point of the pipeline: continue the caller's trace or start a new one
+        with tracer.start_message_span(msg, task_id=task_data.get("task_id")) as span:
+            # Wrap the task data
+            wrapped_data = {
+                "original_task_data": task_data
+            }
+            await publish(PROMPT_PROCESSOR_TOPIC, json.dumps(wrapped_data).encode(), headers=span.headers())
 
     # Subscribe to tasks from the client
-    sub1 = await nc.subscribe(CAPTAIN_TOPIC, cb=captain_handler)
+    sub1 = await subscribe(nc, js, CAPTAIN_TOPIC, captain_handler, durable="captain")
     print("[Captain] Captain Agent is listening for tasks...")
     # Listen for final aggregated results from the ExecutorSubAgent
+    @metrics.instrument
     async def final_result_handler(msg):
         result = json.loads(msg.data.decode())
         print(f"[Captain] Final Aggregated Result: {result}")
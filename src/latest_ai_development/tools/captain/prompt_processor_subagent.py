@@ -1,23 +1,110 @@
 import asyncio
 import json
 from nats.aio.client import Client as NATS
-from openai import OpenAI
-import os
+from latest_ai_development.tools.conversation_memory import ConversationStore
+from latest_ai_development.tools.jetstream import setup_jetstream, subscribe
+from latest_ai_development.tools.knowledge import KnowledgeIndex
+from latest_ai_development.tools.llm import lazy_openai_client
+from latest_ai_development.tools.market.parsing import extract_task_field
+from latest_ai_development.tools.metrics import AgentMetrics
+from latest_ai_development.tools.tracing import SpanKind, Tracer
+from latest_ai_development.tools.user_profiles import (
+    DEFAULT_USER_ID,
+    PREFERENCE_FIELDS,
+    UserProfileStore,
+    merge_profile,
+    task_user_id,
+)
 
 PROMPT_PROCESSOR_TOPIC = "agent.prompt_processor"
 EXECUTOR_TOPIC = "agent.executor"
 
-api_key = os.environ.get("OPENAI_API_KEY")
-if not api_key:
-    raise EnvironmentError("Missing OPENAI_API_KEY environment variable.")
+client = lazy_openai_client()
+tracer = Tracer("prompt_processor")
+metrics = AgentMetrics("prompt_processor")
+
+
+def system_prompt(profile, background="", history=""):
+    """
+    Extraction instructions. Preferences already in the user's profile are
+    given to the model instead of being re-inferred from every prompt, and the
+    user's compacted conversation lets it resolve references to earlier turns.
+    """
+    known = {k: profile[k] for k in PREFERENCE_FIELDS if k in profile}
+    if known:
+        preferences = (
+            f"This user's known preferences are {json.dumps(known, separators=(',', ':'))}; "
+            "include in 'UserContext' only preferences the message adds or changes. "
+        )
+    else:
+        preferences = (
+            "Try to infer user preferences such as 'risk_level', 'investment_horizon', or 'sectors_of_interest' "
+            "and include them in 'UserContext'. "
+        )
+    return (
+        "You are a prompt processor that extracts exactly these keys from the user's message: "
+        "'OP_CODE' (string), 'UserContext' (JSON object), and 'ProcessContext' (JSON object). "
+        "If the message is about stock recommendations, set 'OP_CODE' to 'STOCK_RECOMMENDATION'. "
+        + preferences +
+        "If the user references past conversation or other context, include it in 'ProcessContext'. "
+        "If unclear or unrelated, set 'OP_CODE' to 'UNKNOWN' and keep contexts empty. "
+        "Respond only with a JSON object, no explanations. "
+        "Example output: "
+        '{"OP_CODE": "STOCK_RECOMMENDATION", '
+        '"UserContext": {"preference": "short_term_gains", "risk_level": "medium"}, '
+        '"ProcessContext": {"history": "user asked about tech stocks last week"}}'
+    ) + (
+        "\nBackground knowledge (use it for UserContext where relevant):\n" + background
+        if background else ""
+    ) + (
+        "\nEarlier in this conversation (oldest first):\n" + history
+        if history else ""
+    )
+
 
-client = OpenAI(api_key=api_key)
 async def prompt_processor_subagent():
     nc = NATS()
     await nc.connect("nats://localhost:4222")
+    metrics.start_publishing(nc)
+    js = await setup_jetstream(nc)
+    publish = js.publish if js else nc.publish
+
+    knowledge = KnowledgeIndex()
+    profiles = UserProfileStore()
+    await asyncio.to_thread(profiles.seed_from_directory, str(knowledge.directory))
+
+    memory = ConversationStore()
+    memory.start_compactor()
 
+    # task_id -> outcome of the run in flight. A JetStream redelivery of a task that is still being
+    # processed waits for that run instead of paying for its LLM call a second time.
+    in_flight = {}
+
+    @metrics.instrument
     async def prompt_processor_handler(msg):
         task_data = json.loads(msg.data.decode())
+        task_id = extract_task_field(task_data, "task_id")
+        running = in_flight.get(task_id) if task_id else None
+        if running is not None:
+            print(f"[PromptProcessor] Task {task_id} is already being processed")
+            if not await asyncio.shield(running):
+                raise RuntimeError(f"Processing of task {task_id} failed")
+            return
+        done = asyncio.get_running_loop().create_future()
+        if task_id:
+            in_flight[task_id] = done
+        try:
+            await process_prompt(msg, task_data)
+            done.set_result(True)
+        except BaseException:
+            done.set_result(False)
+            raise
+        finally:
+            if task_id:
+                in_flight.pop(task_id, None)
+
+    async def process_prompt(msg, task_data):
+        span = tracer.start_message_span(msg)
 
         # Attempt to get user prompt from possible nested keys
         user_prompt = (
@@ -33,36 +120,41 @@ async def prompt_processor_subagent():
             print("[PromptProcessor] Warning: Received empty task description!")
             user_prompt = "No task description provided"
 
+        # Anonymous tasks read the default profile but do not teach it
+        known_user = task_user_id(task_data, default=None)
+        user_id = known_user or DEFAULT_USER_ID
+        profile = profiles.get(user_id)
+        # Anonymous callers are different people: they get no shared conversation
+        history = memory.context(known_user) if known_user else {}
+        history_prompt = memory.prompt_text(known_user) if known_user else ""
+
+        # Known facts about the user (knowledge/) help fill in UserContext
+        background = ""
+        if len(knowledge):
+            knowledge_span = span.child("knowledge.search", attributes={"knowledge.chunks": len(knowledge)})
+            try:
+                background = await asyncio.to_thread(knowledge.context, user_prompt)
+            except Exception as e:
+                print(f"[PromptProcessor] Knowledge search failed: {e}")
+                knowledge_span.record_error(e)
+            knowledge_span.end()
+
+        llm_span = span.child("openai.chat.completions", kind=SpanKind.CLIENT, attributes={"llm.model": "gpt-4o-mini"})
         try:
             # Run the synchronous create call in a separate thread to avoid blocking the event loop
             response = await asyncio.to_thread(
                 lambda: client.chat.completions.create(
                     model="gpt-4o-mini",
                     messages=[
-                        {
-                                                "role": "system",
-                                                "content": (
-                        "You are a prompt processor that extracts exactly these keys from the user's message: "
-                        "'OP_CODE' (string), 'UserContext' (JSON object), and 'ProcessContext' (JSON object). "
-                        "If the message is about stock recommendations, set 'OP_CODE' to 'STOCK_RECOMMENDATION'. "
-                        "Try to infer user preferences such as 'risk_level', 'investment_horizon', or 'sectors_of_interest' "
-                        "and include them in 'UserContext'. "
-                        "If the user references past conversation or other context, include it in 'ProcessContext'. "
-                        "If unclear or unrelated, set 'OP_CODE' to 'UNKNOWN' and keep contexts empty. "
-                        "Respond only with a JSON object, no explanations. "
-                        "Example output: "
-                        '{"OP_CODE": "STOCK_RECOMMENDATION", '
-                        '"UserContext": {"preference": "short_term_gains", "risk_level": "medium"}, '
-                        '"ProcessContext": {"history": "user asked about tech stocks last week"}}'
-                    )
-
-                        },
+                        {"role": "system", "content": system_prompt(profile, background, history_prompt)},
                         {"role": "user", "content": user_prompt},
                     ],
                     max_tokens=150,
                     temperature=0.0,
                 )
             )
+            llm_span.end()
+            metrics.record_llm_usage(response.usage)
 
             output_text = response.choices[0].message.content.strip()
             print(f"[PromptProcessor] OpenAI output: {output_text}")
@@ -80,31 +172,64 @@ async def prompt_processor_subagent():
             structured_data["task_id"] = task_id
             structured_data["original_task_data"] = task_data
 
+            # Learn from what the model extracted; the profile fills in everything it did not repeat
+            extracted = structured_data.get("UserContext")
+            if isinstance(extracted, dict) and extracted:
+                if known_user:
+                    profile = await asyncio.to_thread(profiles.update, user_id, extracted)
+                else:
+                    profile = merge_profile(profile, extracted)
+                structured_data["UserContext"] = {**extracted, **profile}
+            else:
+                structured_data["UserContext"] = dict(profile)
+
         except json.JSONDecodeError as jde:
             print(f"[PromptProcessor] JSON decode error: {jde}")
             structured_data = {
                 "task_id": task_data.get("task_id"),
                 "OP_CODE": "UNKNOWN",
-                "UserContext": {},
+                "UserContext": dict(profile),
                 "ProcessContext": {},
                 "original_task_data": task_data,
             }
         except Exception as e:
             print(f"[PromptProcessor] Error during OpenAI processing or JSON parsing: {e}")
+            llm_span.record_error(e)
+            span.record_error(e)
             structured_data = {
                 "task_id": task_data.get("task_id"),
                 "OP_CODE": "UNKNOWN",
-                "UserContext": {},
+                "UserContext": dict(profile),
                 "ProcessContext": {},
                 "original_task_data": task_data,
             }
 
-        await nc.publish(EXECUTOR_TOPIC, json.dumps(structured_data).encode())
+        llm_span.end()
+        structured_data["user_id"] = user_id
+        # Sub-agents get the bounded history with the task; the model's own notes take precedence
+        extracted_context = structured_data.get("ProcessContext")
+        structured_data["ProcessContext"] = {**history, **(extracted_context if isinstance(extracted_context, dict) else {})}
+        span.set_attribute("task_id", structured_data.get("task_id"))
+        span.set_attribute("op_code", structured_data.get("OP_CODE"))
+        await publish(EXECUTOR_TOPIC, json.dumps(structured_data).encode(), headers=span.headers())
+        span.end()
         print(f"[PromptProcessor] Published structured data for task_id {structured_data.get('task_id')}")
 
-    await nc.subscribe(PROMPT_PROCESSOR_TOPIC, cb=prompt_processor_handler)
+        # Off the request path: the turn is stored after the task has moved on
+        if known_user and user_prompt != "No task description provided":
+            await asyncio.to_thread(memory.append, known_user, user_prompt, structured_data.get("OP_CODE"))
+
+    await subscribe(nc, js, PROMPT_PROCESSOR_TOPIC, prompt_processor_handler, durable="prompt_processor")
     print("[PromptProcessor] Listening for prompts...")
 
+    # Subscribed first; new knowledge is embedded and the OpenAI client built while prompts are already served
+    asyncio.create_task(asyncio.to_thread(client.warm_up))
+    try:
+        await asyncio.to_thread(knowledge.refresh)
+    except Exception as e:
+        print(f"[PromptProcessor] Knowledge index unavailable: {e}")
+    asyncio.create_task(knowledge.watch())
+
     await asyncio.Future()  # Keep running forever
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+"""
+Record/replay cassette for LLM calls.
+
+Profiling the crew or the NATS pipeline should not re-bill and re-wait on
+every LLM call. With a cassette configured, each chat completion and
+embedding request is looked up by a hash of its model and messages (plus the
+options that change the shape of the response: tools, response_format, n).
+A recorded response is returned at once without touching the network. A new
+request is sent and its response is recorded:
+
+    LLM_CASSETTE        Cassette file, e.g. cassettes/dev.db (unset: disabled)
+    LLM_CASSETTE_MODE   auto     replay recorded calls, record new ones (default)
+                        replay   never call the API; unrecorded calls raise CassetteMiss
+                        record   always call the API and overwrite the recordings
+
+The cassette is a single SQLite file with zlib-compressed JSON responses, so
+all agent processes can share one. Calls are hooked in three places:
+``create_openai_client()`` (the NATS agents), the agent registry's embedding
+client, and ``litellm.completion`` (every crewAI agent and evaluator).
+Streaming calls are passed through unrecorded.
+
+    LLM_CASSETTE=cassettes/dev.db crewai run            # first run records
+    LLM_CASSETTE=cassettes/dev.db LLM_CASSETTE_MODE=replay crewai run
+    python -m latest_ai_development.tools.cassette cassettes/dev.db
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+CASSETTE_PATH = os.environ.get("LLM_CASSETTE") or None
+CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "auto")
+MODES = ("auto", "replay", "record")
+
+# Request options that change what comes back; sampling options do not key a recording
+KEY_OPTIONS = ("tools", "response_format", "n")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    model TEXT,
+    seconds REAL NOT NULL,
+    recorded REAL NOT NULL,
+    response BLOB NOT NULL
+)
+"""
+
+
+class CassetteMiss(LookupError):
+    """A replay-only cassette has no recording for the request."""
+
+
+def request_key(kind: str, model: Optional[str], messages: Any, options: Optional[Dict] = None) -> str:
+    request = {"kind": kind, "model": model, "messages": messages}
+    request.update({k: options[k] for k in KEY_OPTIONS if options and options.get(k) is not None})
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class Cassette:
+    """LLM responses on disk, keyed by request_key."""
+
+    def __init__(self, path: str, mode: str = "auto"):
+        if mode not in MODES:
+            raise ValueError(f"LLM_CASSETTE_MODE must be one of {', '.join(MODES)}, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._lock = threading.Lock()
+        self.replayed = 0
+        self.recorded = 0
+        self.saved_seconds = 0.0
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute("SELECT seconds, response FROM calls WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"seconds": row[0], "response": json.loads(zlib.decompress(row[1]))}
+
+    def store(self, key: str, kind: str, model: Optional[str], response: Dict, seconds: float) -> None:
+        blob = zlib.compress(json.dumps(response, separators=(",", ":"), default=str).encode())
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO calls VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, kind, model, seconds, time.time(), blob))
+
+    def call(self, kind: str, model: Optional[str], messages: Any, options: Dict, live: Callable[[], Any],
+             dump: Callable[[Any], Dict], load: Callable[[Dict], Any]) -> Any:
+        """Replay the recorded response to this request, or make it with `live()` and record it."""
+        key = request_key(kind, model, messages, options)
+        if self.mode != "record":
+            entry = self.lookup(key)
+            if entry is not None:
+                self.replayed += 1
+                self.saved_seconds += entry["seconds"]
+                return load(entry["response"])
+            if self.mode == "replay":
+                raise CassetteMiss(f"No {kind} recording for model {model} in {self.path} (key {key[:12]})")
+        started = time.perf_counter()
+        response = live()
+        self.store(key, kind, model, dump(response), time.perf_counter() - started)
+        self.recorded += 1
+        return response
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, model, COUNT(*), SUM(seconds), SUM(LENGTH(response)) FROM calls GROUP BY kind, model"
+            ).fetchall()
+        return {"path": self.path, "calls": [
+            {"kind": kind, "model": model, "count": count, "seconds": round(seconds, 2), "bytes": size}
+            for kind, model, count, seconds, size in rows
+        ]}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def _report(cassette: Cassette) -> None:
+    if cassette.replayed or cassette.recorded:
+        print(f"[Cassette] {cassette.replayed} calls replayed ({cassette.saved_seconds:.1f}s of LLM time saved), "
+              f"{cassette.recorded} recorded in {cassette.path}")
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The process-wide cassette from LLM_CASSETTE, or None when recording is off."""
+    global _cassette
+    if CASSETTE_PATH is None:
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(CASSETTE_PATH, CASSETTE_MODE)
+            atexit.register(_report, _cassette)
+            print(f"[Cassette] {CASSETTE_MODE} mode, {CASSETTE_PATH}")
+    return _cassette
+
+
+def _dump_model(response: Any) -> Dict:
+    return response.model_dump(mode="json")
+
+
+def wrap_openai_client(client: Any, cassette: Optional[Cassette] = None) -> Any:
+    """Route `client`'s chat completions and embeddings through the cassette (no-op without one)."""
+    cassette = cassette or get_cassette()
+    if cassette is None:
+        return client
+    from openai.types import CreateEmbeddingResponse
+    from openai.types.chat import ChatCompletion
+
+    chat_create = client.chat.completions.create
+    embeddings_create = client.embeddings.create
+
+    def create_chat(**kwargs):
+        if kwargs.get("stream"):
+            return chat_create(**kwargs)
+        return cassette.call("openai.chat", kwargs.get("model"), kwargs.get("messages"), kwargs,
+                             lambda: chat_create(**kwargs), _dump_model, ChatCompletion.model_validate)
+
+    def create_embeddings(**kwargs):
+        return cassette.call("openai.embeddings", kwargs.get("model"), kwargs.get("input"), kwargs,
+                             lambda: embeddings_create(**kwargs), _dump_model, CreateEmbeddingResponse.model_validate)
+
+    client.chat.completions.create = create_chat
+    client.embeddings.create = create_embeddings
+    return client
+
+
+def install_litellm(cassette: Optional[Cassette] = None) -> bool:
+    """Route ``litellm.completion`` (crewAI's LLM calls) through the cassette; False without one."""
+    cassette = cassette or get_cassette()
+    if cassette is None:
+        return False
+    import litellm
+
+    completion = litellm.completion
+    if getattr(completion, "cassette", None) is cassette:
+        return True
+
+    def cassette_completion(*args, **kwargs):
+        if kwargs.get("stream"):
+            return completion(*args, **kwargs)
+        model = kwargs.get("model", args[0] if args else None)
+        messages = kwargs.get("messages", args[1] if len(args) > 1 else None)
+        return cassette.call("litellm.completion", model, messages, kwargs, lambda: completion(*args, **kwargs),
+                             lambda response: response.model_dump(warnings=False), lambda data: litellm.ModelResponse(**data))
+
+    cassette_completion.cassette = cassette
+    litellm.completion = cassette_completion
+    return True
+
+
+def main() -> None:
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m latest_ai_development.tools.cassette <cassette file>")
+    cassette = Cassette(sys.argv[1])
+    calls = cassette.stats()["calls"]
+    print(f"{'kind':<20} {'model':<28} {'calls':>6} {'LLM s':>8} {'bytes':>10}")
+    for c in calls:
+        print(f"{c['kind']:<20} {str(c['model']):<28} {c['count']:>6} {c['seconds']:>8.1f} {c['bytes']:>10}")
+    print(f"{sum(c['count'] for c in calls)} recordings, "
+          f"{sum(c['seconds'] for c in calls):.1f}s of LLM time per full replay")
+
+
+if __name__ == "__main__":
+    main()
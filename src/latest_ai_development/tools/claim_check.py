@@ -0,0 +1,200 @@
+"""
+Claim checks for large payloads between agents.
+
+Results above ``CLAIM_CHECK_THRESHOLD`` bytes (default 256 KB) are not sent
+inline on ``crew.responses``/``client.final.results``. The producer writes them
+to a content-addressed store and publishes a small JSON stub instead::
+
+    {"task_id": ..., "agent": ..., "claim_check": {"ref": <sha256>, "bytes": n, "encoding": "json"}}
+
+The executor aggregates stubs like any other result, so big payloads never
+pass through it, and the final consumer fetches them with
+``ClaimCheck.resolve``, only for results it is waiting on. Identical payloads
+share one entry.
+
+Two stores are available:
+
+    LocalClaimStore   files under CLAIM_CHECK_DIR (default /dev/shm/crew-claims, i.e.
+                      shared memory); for agents on one host
+    ObjectClaimStore  a JetStream object store bucket; used when NATS_JETSTREAM=true
+
+Entries expire after ``CLAIM_CHECK_TTL`` seconds (default 1 hour): the object
+store bucket ages them out itself, and the local store is swept by
+``ClaimCheck.start_gc``. An expired claim resolves to an error result.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from latest_ai_development.tools import columnar
+from latest_ai_development.tools.jetstream import jetstream_enabled
+
+CLAIM_CHECK_THRESHOLD = int(os.environ.get("CLAIM_CHECK_THRESHOLD", str(256 * 1024)))
+CLAIM_CHECK_TTL = float(os.environ.get("CLAIM_CHECK_TTL", "3600"))
+CLAIM_CHECK_BUCKET = "CREW_CLAIMS"
+_SHM = Path("/dev/shm")
+CLAIM_CHECK_DIR = os.environ.get(
+    "CLAIM_CHECK_DIR", str((_SHM if _SHM.is_dir() else Path(tempfile.gettempdir())) / "crew-claims"))
+GC_INTERVAL = 60.0
+
+
+def content_ref(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class LocalClaimStore:
+    """Content-addressed files in a directory shared by the agents on this host."""
+
+    def __init__(self, root: Optional[str] = None, ttl: float = CLAIM_CHECK_TTL):
+        self.root = Path(root or CLAIM_CHECK_DIR)
+        self.ttl = ttl
+
+    async def put(self, data: bytes) -> str:
+        # File I/O runs in a thread so a large payload never stalls the agent's event loop
+        return await asyncio.to_thread(self._put, data)
+
+    async def get(self, ref: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get, ref)
+
+    def _put(self, data: bytes) -> str:
+        ref = content_ref(data)
+        path = self.root / ref
+        if path.exists():
+            # Same content checked in again: restart its TTL
+            os.utime(path)
+            return ref
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{ref}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return ref
+
+    def _get(self, ref: str) -> Optional[bytes]:
+        path = self.root / ref
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return None
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def gc(self, now: Optional[float] = None) -> int:
+        """Delete expired entries; returns how many were removed."""
+        now = time.time() if now is None else now
+        removed = 0
+        if not self.root.is_dir():
+            return removed
+        for path in self.root.iterdir():
+            try:
+                if now - path.stat().st_mtime > self.ttl:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class ObjectClaimStore:
+    """Entries in a JetStream object store bucket whose max age is the TTL."""
+
+    def __init__(self, object_store):
+        self.object_store = object_store
+
+    @classmethod
+    async def open(cls, js, bucket: str = CLAIM_CHECK_BUCKET, ttl: float = CLAIM_CHECK_TTL) -> "ObjectClaimStore":
+        from nats.js.api import ObjectStoreConfig
+        from nats.js.errors import BucketNotFoundError
+
+        try:
+            return cls(await js.object_store(bucket))
+        except BucketNotFoundError:
+            return cls(await js.create_object_store(bucket, config=ObjectStoreConfig(bucket=bucket, ttl=ttl)))
+
+    async def put(self, data: bytes) -> str:
+        ref = content_ref(data)
+        await self.object_store.put(ref, data)
+        return ref
+
+    async def get(self, ref: str) -> Optional[bytes]:
+        from nats.js.errors import NotFoundError
+
+        try:
+            return (await self.object_store.get(ref)).data
+        except NotFoundError:
+            return None
+
+    def gc(self, now: Optional[float] = None) -> int:
+        # The bucket's max age expires entries server-side
+        return 0
+
+
+class ClaimCheck:
+    """Swaps payloads above `threshold` bytes for stubs, and stubs back for payloads."""
+
+    def __init__(self, store, threshold: int = CLAIM_CHECK_THRESHOLD):
+        self.store = store
+        self.threshold = threshold
+        self._gc_task: Optional[asyncio.Task] = None
+
+    async def check_in(self, payload: bytes, task_id: str, agent: str, encoding: str = "json") -> Optional[bytes]:
+        """
+        A JSON stub to publish instead of `payload`, or None if it is small enough to send inline.
+
+        `encoding` is "json" or "columnar" and tells the consumer how to decode.
+        """
+        if len(payload) <= self.threshold:
+            return None
+        ref = await self.store.put(payload)
+        claim = {"ref": ref, "bytes": len(payload), "encoding": encoding}
+        return json.dumps({"task_id": task_id, "agent": agent, "claim_check": claim}).encode()
+
+    async def fetch(self, stub: Dict) -> Dict:
+        claim = stub["claim_check"]
+        data = await self.store.get(claim["ref"])
+        if data is None:
+            return {"task_id": stub.get("task_id"), "agent": stub.get("agent"),
+                    "error": f"Claim check {claim['ref'][:12]} expired or missing"}
+        if claim.get("encoding") == columnar.RESULT_ENCODING:
+            return columnar.load_result(data)
+        return json.loads(data.decode())
+
+    async def resolve(self, result):
+        """`result` with every claim-check stub (top level and aggregated results) fetched."""
+        if isinstance(result, dict) and "claim_check" in result:
+            result = await self.fetch(result)
+        results = result.get("aggregated_results") if isinstance(result, dict) else None
+        if results:
+            claimed = [i for i, r in enumerate(results) if isinstance(r, dict) and "claim_check" in r]
+            fetched = await asyncio.gather(*(self.fetch(results[i]) for i in claimed))
+            for i, value in zip(claimed, fetched):
+                results[i] = value
+        return result
+
+    def start_gc(self, interval: float = GC_INTERVAL) -> asyncio.Task:
+        """Sweep expired entries every `interval` seconds (only the local store needs it)."""
+        async def sweep():
+            while True:
+                removed = await asyncio.to_thread(self.store.gc)
+                if removed:
+                    print(f"[ClaimCheck] Removed {removed} expired payloads")
+                await asyncio.sleep(interval)
+
+        if self._gc_task is None:
+            self._gc_task = asyncio.create_task(sweep())
+        return self._gc_task
+
+
+async def open_claim_check(nc=None, threshold: int = CLAIM_CHECK_THRESHOLD) -> ClaimCheck:
+    """The object store when JetStream mode is on, else the local shared-memory store."""
+    if nc is not None and jetstream_enabled():
+        store = await ObjectClaimStore.open(nc.jetstream())
+    else:
+        store = LocalClaimStore()
+    return ClaimCheck(store, threshold)
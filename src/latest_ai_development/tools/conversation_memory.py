@@ -0,0 +1,284 @@
+"""
+Per-user conversation memory with a fixed token budget.
+
+The prompt processor records every prompt as a turn. The most recent turns
+are kept verbatim. When they outgrow their share of the budget, the oldest
+ones are folded into a rolling summary by an LLM call. That call runs in
+the background compactor, never on the request path.
+
+Each user's ``ProcessContext`` view is rebuilt when the conversation
+changes:
+
+    {"conversation_summary": "...", "recent_turns": [{"text", "op_code", "at"}, ...], "history_tokens": n}
+
+Reading it is a dict lookup. The prompt processor puts the view into
+``ProcessContext``, and the executor forwards that to every sub-agent. The
+view never exceeds the budget: if compaction falls behind, the oldest turns
+drop out of the view until the summary catches up.
+
+    CONVERSATION_DB             SQLite file                        (default data/conversations.db)
+    CONVERSATION_TOKEN_BUDGET   tokens of history per user         (default 800)
+    CONVERSATION_SUMMARY_MODEL  model writing the summaries        (default gpt-4o-mini)
+    CONVERSATION_CACHE_SIZE     conversations kept in memory       (default 1024)
+"""
+
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+CONVERSATION_DB = os.environ.get("CONVERSATION_DB", "data/conversations.db")
+TOKEN_BUDGET = int(os.environ.get("CONVERSATION_TOKEN_BUDGET", "800"))
+SUMMARY_MODEL = os.environ.get("CONVERSATION_SUMMARY_MODEL", "gpt-4o-mini")
+CACHE_SIZE = int(os.environ.get("CONVERSATION_CACHE_SIZE", "1024"))
+
+# Shares of the budget: the summary gets a quarter, verbatim turns the rest
+SUMMARY_SHARE = 0.25
+
+Summarizer = Callable[[str, List[Dict], int], str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    user_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    op_code TEXT,
+    at REAL NOT NULL,
+    PRIMARY KEY (user_id, seq)
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    user_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    through_seq INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token, as in the gateway's admission control."""
+    return math.ceil(len(text) / 4)
+
+
+def clip(text: str, max_tokens: int, keep: str = "head") -> str:
+    """`text` cut to about `max_tokens` tokens, keeping its start (head) or end (tail)."""
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit - 1] + "…" if keep == "head" else "…" + text[-(limit - 1):]
+
+
+def llm_summarizer(model: str = SUMMARY_MODEL) -> Summarizer:
+    """Folds turns into the running summary with one chat completion."""
+    from latest_ai_development.tools.llm import create_openai_client
+
+    client = create_openai_client()
+
+    def summarize(summary: str, turns: List[Dict], max_tokens: int) -> str:
+        messages = "\n".join(f"- {turn['text']}" for turn in turns)
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": (
+                    "You keep a running summary of a user's conversation with a stock market assistant. "
+                    "Merge the earlier summary and the new messages into one short summary that keeps tickers, "
+                    "sectors, stated preferences, decisions and open questions. "
+                    f"At most {max(10, int(max_tokens * 0.75))} words. Reply with the summary only."
+                )},
+                {"role": "user", "content": f"Earlier summary:\n{summary or '(none)'}\n\nNew messages:\n{messages}"},
+            ],
+            max_tokens=max_tokens,
+            temperature=0.0,
+        )
+        return response.choices[0].message.content.strip()
+
+    return summarize
+
+
+def extractive_summary(summary: str, turns: List[Dict], max_tokens: int) -> str:
+    """Fallback when the summarizer fails: the latest text that fits."""
+    return clip("; ".join([summary] * bool(summary) + [turn["text"] for turn in turns]), max_tokens, keep="tail")
+
+
+def history_text(process_context: Dict) -> str:
+    """The remembered conversation in a ProcessContext, as one block of text."""
+    parts = [process_context.get("conversation_summary") or ""]
+    parts += [turn.get("text", "") for turn in process_context.get("recent_turns") or []]
+    return "\n".join(part for part in parts if part)
+
+
+class Conversation:
+    """One user's summary and verbatim turns, plus the rendered view."""
+
+    def __init__(self, summary: str = "", through_seq: int = 0, turns: Optional[List[Dict]] = None):
+        self.summary = summary
+        self.through_seq = through_seq
+        self.turns = deque(turns or ())
+        self.recent_tokens = sum(turn["tokens"] for turn in self.turns)
+        self.next_seq = (self.turns[-1]["seq"] if self.turns else through_seq) + 1
+        self.compacting = False
+        self.view: Dict = {}
+        self.prompt = ""
+
+
+class ConversationStore:
+    """Bounded per-user conversation history in SQLite, compacted in the background."""
+
+    def __init__(self, path: str = CONVERSATION_DB, budget: int = TOKEN_BUDGET,
+                 summarize: Optional[Summarizer] = None, cache_size: int = CACHE_SIZE):
+        self.path = path
+        self.budget = budget
+        self.summary_budget = max(1, int(budget * SUMMARY_SHARE))
+        self.recent_budget = budget - self.summary_budget
+        self.cache_size = cache_size
+        self._summarize = summarize
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"turns": 0, "compactions": 0, "fallbacks": 0}
+
+    @property
+    def summarize(self) -> Summarizer:
+        if self._summarize is None:
+            self._summarize = llm_summarizer()
+        return self._summarize
+
+    def _conversation(self, user_id: str) -> Conversation:
+        conversation = self._conversations.get(user_id)
+        if conversation is not None:
+            self._conversations.move_to_end(user_id)
+            return conversation
+        row = self._db.execute("SELECT summary, through_seq FROM summaries WHERE user_id = ?", (user_id,)).fetchone()
+        summary, through_seq = row or ("", 0)
+        turns = [{"seq": seq, "text": text, "op_code": op_code, "at": at, "tokens": estimate_tokens(text)}
+                 for seq, text, op_code, at in self._db.execute(
+                     "SELECT seq, text, op_code, at FROM turns WHERE user_id = ? AND seq > ? ORDER BY seq",
+                     (user_id, through_seq))]
+        conversation = Conversation(summary, through_seq, turns)
+        self._render(conversation)
+        self._conversations[user_id] = conversation
+        while len(self._conversations) > self.cache_size:
+            self._conversations.popitem(last=False)
+        return conversation
+
+    def _render(self, conversation: Conversation) -> None:
+        """Rebuild the view: the summary plus the newest turns that fit the budget."""
+        room = self.budget - estimate_tokens(conversation.summary)
+        recent = []
+        for turn in reversed(conversation.turns):
+            if turn["tokens"] > room:
+                break
+            room -= turn["tokens"]
+            recent.append({"text": turn["text"], "op_code": turn["op_code"], "at": turn["at"]})
+        recent.reverse()
+        view = {"recent_turns": recent, "history_tokens": self.budget - room}
+        if conversation.summary:
+            view["conversation_summary"] = conversation.summary
+        conversation.view = view
+        conversation.prompt = history_text(view)
+
+    def context(self, user_id: str) -> Dict:
+        """The user's ProcessContext view. Shared; treat it as read-only."""
+        with self._lock:
+            return self._conversation(user_id).view
+
+    def prompt_text(self, user_id: str) -> str:
+        with self._lock:
+            return self._conversation(user_id).prompt
+
+    def append(self, user_id: str, text: str, op_code: Optional[str] = None) -> bool:
+        """Record a turn; True when the conversation has outgrown its budget and was not already queued."""
+        text = clip(" ".join(text.split()), self.recent_budget // 2)
+        if not text:
+            return False
+        with self._lock:
+            conversation = self._conversation(user_id)
+            turn = {"seq": conversation.next_seq, "text": text, "op_code": op_code, "at": time.time(),
+                    "tokens": estimate_tokens(text)}
+            conversation.next_seq += 1
+            self._db.execute("INSERT INTO turns VALUES (?, ?, ?, ?, ?)",
+                             (user_id, turn["seq"], text, op_code, turn["at"]))
+            conversation.turns.append(turn)
+            conversation.recent_tokens += turn["tokens"]
+            self._render(conversation)
+            self.stats["turns"] += 1
+            due = conversation.recent_tokens > self.recent_budget and not conversation.compacting
+            if due and self._queue is not None:
+                conversation.compacting = True
+                # append runs in worker threads; asyncio queues are only safe on their loop
+                self._loop.call_soon_threadsafe(self._queue.put_nowait, user_id)
+        return due
+
+    def compact(self, user_id: str) -> bool:
+        """Fold the oldest turns into the summary until the verbatim turns use half their budget."""
+        with self._lock:
+            conversation = self._conversation(user_id)
+            folding, tokens = [], conversation.recent_tokens
+            for turn in conversation.turns:
+                if tokens <= self.recent_budget // 2:
+                    break
+                folding.append(turn)
+                tokens -= turn["tokens"]
+            summary = conversation.summary
+        if not folding:
+            with self._lock:
+                conversation.compacting = False
+            return False
+
+        try:
+            new_summary = self.summarize(summary, folding, self.summary_budget)
+        except Exception as e:
+            print(f"[ConversationMemory] Summarizer failed for {user_id}: {e}")
+            self.stats["fallbacks"] += 1
+            new_summary = extractive_summary(summary, folding, self.summary_budget)
+        new_summary = clip(new_summary, self.summary_budget)
+
+        through_seq = folding[-1]["seq"]
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)",
+                             (user_id, new_summary, through_seq, time.time()))
+            self._db.execute("DELETE FROM turns WHERE user_id = ? AND seq <= ?", (user_id, through_seq))
+            # The conversation may have been evicted and reloaded meanwhile; update whichever is current
+            conversation = self._conversation(user_id)
+            while conversation.turns and conversation.turns[0]["seq"] <= through_seq:
+                conversation.recent_tokens -= conversation.turns.popleft()["tokens"]
+            conversation.summary, conversation.through_seq = new_summary, through_seq
+            conversation.compacting = False
+            self._render(conversation)
+            self.stats["compactions"] += 1
+        return True
+
+    async def _compact_forever(self) -> None:
+        while True:
+            user_id = await self._queue.get()
+            try:
+                await asyncio.to_thread(self.compact, user_id)
+            except Exception as e:
+                print(f"[ConversationMemory] Compaction failed for {user_id}: {e}")
+                with self._lock:
+                    self._conversation(user_id).compacting = False
+
+    def start_compactor(self) -> asyncio.Task:
+        """Compact due conversations in the background on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        with self._lock:
+            for user_id, conversation in self._conversations.items():
+                if conversation.compacting:
+                    self._queue.put_nowait(user_id)
+        return asyncio.create_task(self._compact_forever())
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,149 @@
+"""
+Token-bucket admission control for the task gateways.
+
+Every task fans out into several LLM calls (prompt processor, news agent), so
+unbounded bursts at the gateway turn into provider 429s downstream. Before a
+task is published it must get capacity from three buckets:
+
+    global tasks/s          ADMISSION_TASKS_PER_SEC          (default 4)
+    per-client tasks/s      ADMISSION_CLIENT_TASKS_PER_SEC   (default 2)
+    estimated LLM tokens/s  ADMISSION_LLM_TOKENS_PER_SEC     (default 3000)
+
+Burst sizes are ``ADMISSION_BURST_SECONDS`` (default 5) worth of rate; a rate of
+0 disables that bucket. Defaults are sized for a tier-1 gpt-4o-mini quota
+(500 RPM / 200k TPM) at two LLM calls per task.
+
+Buckets may go into debt: an admitted request reserves its tokens immediately
+and sleeps until the debt is repaid, which queues requests in arrival order. A
+request is rejected with ``AdmissionRejected`` (HTTP 429 + Retry-After) instead
+when ``ADMISSION_MAX_QUEUE`` requests are already waiting or its wait would
+exceed ``ADMISSION_MAX_QUEUE_WAIT`` seconds.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+# Fixed LLM token cost of one task: both system prompts plus max completion tokens
+BASE_TOKENS_PER_TASK = int(os.environ.get("ADMISSION_BASE_TOKENS_PER_TASK", "600"))
+LLM_CALLS_PER_TASK = 2
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def estimate_task_tokens(prompt: str) -> int:
+    """Rough LLM token cost of a task: the prompt (~4 chars/token) goes to every LLM call."""
+    return BASE_TOKENS_PER_TASK + LLM_CALLS_PER_TASK * math.ceil(len(prompt) / 4)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: float, scope: str):
+        super().__init__(f"Rate limit exceeded ({scope}); retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.scope = scope
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """Classic token bucket that allows reservations into debt."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens would be available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def reserve(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class AdmissionController:
+    def __init__(self, tasks_per_sec: Optional[float] = None, client_tasks_per_sec: Optional[float] = None,
+                 llm_tokens_per_sec: Optional[float] = None, burst_seconds: Optional[float] = None,
+                 max_queue: Optional[int] = None, max_queue_wait: Optional[float] = None,
+                 max_clients: int = 10000):
+        tasks_per_sec = _env_float("ADMISSION_TASKS_PER_SEC", 4) if tasks_per_sec is None else tasks_per_sec
+        self.client_rate = (_env_float("ADMISSION_CLIENT_TASKS_PER_SEC", 2)
+                            if client_tasks_per_sec is None else client_tasks_per_sec)
+        llm_tokens_per_sec = (_env_float("ADMISSION_LLM_TOKENS_PER_SEC", 3000)
+                              if llm_tokens_per_sec is None else llm_tokens_per_sec)
+        self.burst_seconds = _env_float("ADMISSION_BURST_SECONDS", 5) if burst_seconds is None else burst_seconds
+        self.max_queue = int(_env_float("ADMISSION_MAX_QUEUE", 100)) if max_queue is None else max_queue
+        self.max_queue_wait = (_env_float("ADMISSION_MAX_QUEUE_WAIT", 30)
+                               if max_queue_wait is None else max_queue_wait)
+
+        self.task_bucket = self._bucket(tasks_per_sec)
+        self.token_bucket = self._bucket(llm_tokens_per_sec)
+        self.client_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.max_clients = max_clients
+        self.queued = 0
+
+    def _bucket(self, rate: float) -> Optional[TokenBucket]:
+        return TokenBucket(rate, rate * self.burst_seconds) if rate > 0 else None
+
+    def _client_bucket(self, client_id: str) -> Optional[TokenBucket]:
+        if self.client_rate <= 0:
+            return None
+        bucket = self.client_buckets.get(client_id)
+        if bucket is None:
+            bucket = self.client_buckets[client_id] = TokenBucket(self.client_rate,
+                                                                  self.client_rate * self.burst_seconds)
+            if len(self.client_buckets) > self.max_clients:
+                self.client_buckets.popitem(last=False)
+        self.client_buckets.move_to_end(client_id)
+        return bucket
+
+    async def acquire(self, client_id: str, estimated_tokens: int, reject: bool = True) -> float:
+        """
+        Wait for capacity to run one task; returns the seconds spent queued.
+
+        With `reject=False` (batch submissions) the caller always queues instead
+        of getting AdmissionRejected.
+        """
+        now = time.monotonic()
+        demands: List[tuple] = [
+            (scope, bucket, amount) for scope, bucket, amount in (
+                ("global", self.task_bucket, 1),
+                ("client", self._client_bucket(client_id), 1),
+                ("llm_tokens", self.token_bucket, estimated_tokens),
+            ) if bucket is not None
+        ]
+        waits = [(bucket.wait_time(amount, now), scope) for scope, bucket, amount in demands]
+        wait, scope = max(waits, default=(0.0, "none"))
+
+        if wait > 0 and reject:
+            if self.queued >= self.max_queue:
+                raise AdmissionRejected(wait, "queue_full")
+            if wait > self.max_queue_wait:
+                raise AdmissionRejected(wait, scope)
+
+        for _, bucket, amount in demands:
+            bucket.reserve(amount)
+        if wait <= 0:
+            return 0.0
+
+        self.queued += 1
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            self.queued -= 1
+        return wait
@@ -0,0 +1,90 @@
+"""
+Routes final task results to the gateway requests waiting for them.
+
+A single subscription on ``client.final.results`` resolves per-task futures by
+task_id, instead of every waiting request subscribing and parsing every result
+itself (which costs O(waiting requests) per result). Claim-check stubs are
+fetched only for results that a waiter or an interested listener will use, so
+results for tasks submitted elsewhere never pull their payload into the gateway.
+"""
+
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+from latest_ai_development.tools.columnar import load_result
+
+CLIENT_REPLY_TOPIC = "client.final.results"
+
+
+def extract_task_id(result) -> Optional[str]:
+    if not isinstance(result, dict):
+        return None
+    return result.get("task_id") or result.get("original_task_data", {}).get("task_id")
+
+
+class ResultDispatcher:
+    """One subscription, many waiters keyed by task_id."""
+
+    def __init__(self, claims=None):
+        # Optional ClaimCheck: results that arrive as claim-check stubs are fetched before delivery
+        self.claims = claims
+        self.waiters: Dict[str, asyncio.Future] = {}
+        # (listener, wants): `wants(task_id)` says whether the listener cares about a task; None means always
+        self.listeners: List[Tuple[Callable[[str, dict], None], Optional[Callable[[str], bool]]]] = []
+        self.subscription = None
+
+    async def subscribe(self, nc, subject: str = CLIENT_REPLY_TOPIC):
+        self.subscription = await nc.subscribe(subject, cb=self.handle)
+        return self.subscription
+
+    def add_listener(self, listener: Callable[[str, dict], None],
+                     wants: Optional[Callable[[str], bool]] = None) -> None:
+        """
+        Call `listener(task_id, result)` for every result, e.g. to fill an async job store.
+        With `wants`, only for results whose task_id it accepts.
+        """
+        self.listeners.append((listener, wants))
+
+    def expect(self, task_id: str) -> asyncio.Future:
+        """Register interest in a task before publishing it; returns the future for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[task_id] = future
+        return future
+
+    def discard(self, task_id: str) -> None:
+        future = self.waiters.pop(task_id, None)
+        if future is not None and not future.done():
+            future.cancel()
+
+    async def handle(self, msg) -> None:
+        try:
+            # JSON, or a columnar bundle whose arrays stay views of the message
+            result = load_result(msg.data)
+        except Exception as e:
+            print("Result parse error:", e)
+            return
+        # Claim-check stubs carry the task_id, so the envelope says who wants the result
+        task_id = extract_task_id(result)
+        future = self.waiters.get(task_id) if task_id else None
+        listeners = [listener for listener, wants in self.listeners
+                     if task_id and (wants is None or wants(task_id))]
+        if (future is None or future.done()) and not listeners:
+            return
+        if self.claims is not None:
+            try:
+                result = await self.claims.resolve(result)
+            except Exception as e:
+                print(f"Claim check fetch failed for {task_id}: {e}")
+                return
+        future = self.waiters.pop(task_id, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+        for listener in listeners:
+            listener(task_id, result)
+
+    async def wait(self, task_id: str, future: asyncio.Future, timeout: float):
+        """Wait for a registered task; always unregisters it. Raises asyncio.TimeoutError."""
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self.discard(task_id)
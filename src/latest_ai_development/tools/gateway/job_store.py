@@ -0,0 +1,202 @@
+"""
+Bounded TTL store for asynchronous gateway jobs.
+
+``POST /tasks`` records a pending job and returns its task_id at once; the
+result is filled in when it arrives on ``client.final.results`` and clients
+fetch it with ``GET /tasks/{task_id}`` (optionally long-polling).
+
+Jobs live in an insertion-ordered dict, so expiry and size-bound eviction only
+ever look at the oldest entries. Long-poll events are created only for jobs
+somebody is actually waiting on, which keeps a pending job to one small dict.
+With ``sqlite_path`` set, jobs are also written through to SQLite so results
+survive a gateway restart and evicted jobs can still be looked up.
+
+Every final result reaches ``complete``, most of them for tasks that are not
+async jobs. The in-memory map answers those without touching SQLite. The store
+reads SQLite, in the executor and off the event loop, only to complete a job it
+knows is pending there: one evicted from memory, or one still pending when the
+gateway restarted. Lookups by ``GET /tasks/{task_id}`` (``fetch``/``wait``) of
+jobs not in memory also run in the executor.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+DEFAULT_TTL = float(os.environ.get("JOB_STORE_TTL", "3600"))
+DEFAULT_MAX_JOBS = int(os.environ.get("JOB_STORE_MAX_JOBS", "100000"))
+DEFAULT_JOB_TIMEOUT = float(os.environ.get("JOB_TIMEOUT", "600"))
+
+PENDING = "pending"
+DONE = "done"
+TIMEOUT = "timeout"
+
+
+class JobStore:
+    def __init__(self, ttl: float = DEFAULT_TTL, max_jobs: int = DEFAULT_MAX_JOBS,
+                 job_timeout: float = DEFAULT_JOB_TIMEOUT, sqlite_path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.job_timeout = job_timeout
+        self.jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self.events: Dict[str, asyncio.Event] = {}
+        self.db = self._open_db(sqlite_path) if sqlite_path else None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        # Pending jobs held only in SQLite: task_id -> expires_at, oldest first
+        self.spilled: "OrderedDict[str, float]" = OrderedDict()
+        if self.db is not None:
+            self.spilled.update(self.db.execute(
+                "SELECT task_id, expires_at FROM jobs WHERE status = ? AND expires_at >= ? ORDER BY expires_at",
+                (PENDING, time.time()),
+            ).fetchall())
+
+    @staticmethod
+    def _open_db(path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " task_id TEXT PRIMARY KEY, status TEXT NOT NULL, submitted_at REAL NOT NULL,"
+            " completed_at REAL, expires_at REAL NOT NULL, result TEXT)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+        return db
+
+    def _persist(self, job: Dict) -> None:
+        if self.db is None:
+            return
+        with self._db_lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO jobs (task_id, status, submitted_at, completed_at, expires_at, result)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job["task_id"], job["status"], job["submitted_at"], job.get("completed_at"),
+                 job["expires_at"], json.dumps(job["result"]) if job.get("result") is not None else None),
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self.db.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+
+    def _load(self, task_id: str) -> Optional[Dict]:
+        if self.db is None:
+            return None
+        with self._db_lock:
+            row = self.db.execute(
+                "SELECT task_id, status, submitted_at, completed_at, expires_at, result FROM jobs WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+        if row is None or row[4] < time.time():
+            return None
+        return {
+            "task_id": row[0], "status": row[1], "submitted_at": row[2], "completed_at": row[3],
+            "expires_at": row[4], "result": json.loads(row[5]) if row[5] else None,
+        }
+
+    def _evict(self) -> None:
+        now = time.time()
+        while self.jobs:
+            task_id, job = next(iter(self.jobs.items()))
+            if job["expires_at"] >= now and len(self.jobs) <= self.max_jobs:
+                break
+            self.jobs.popitem(last=False)
+            self.events.pop(task_id, None)
+            if self.db is not None and job["status"] == PENDING and job["expires_at"] >= now:
+                self.spilled[task_id] = job["expires_at"]
+        while self.spilled and next(iter(self.spilled.values())) < now:
+            self.spilled.popitem(last=False)
+
+    def sweep(self) -> int:
+        """Drop expired and over-limit jobs; returns how many are held."""
+        self._evict()
+        return len(self.jobs)
+
+    def submit(self, task_id: str) -> Dict:
+        """Record a newly published task as pending."""
+        now = time.time()
+        job = {"task_id": task_id, "status": PENDING, "submitted_at": now, "completed_at": None,
+               "expires_at": now + self.ttl, "result": None}
+        self.jobs[task_id] = job
+        self._persist(job)
+        self._evict()
+        return job
+
+    def tracks(self, task_id: str) -> bool:
+        """True if `task_id` is a job this store may still complete."""
+        return task_id in self.jobs or task_id in self.spilled
+
+    def complete(self, task_id: str, result) -> bool:
+        """Store the result of a pending job. Returns False for unknown task_ids."""
+        job = self.jobs.get(task_id)
+        if job is not None:
+            return self._finish(job, result)
+        if self.spilled.pop(task_id, None) is None:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self._complete_stored(task_id, result)
+        loop.run_in_executor(None, self._complete_stored, task_id, result, loop)
+        return True
+
+    def _finish(self, job: Dict, result, loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+        if job["status"] == DONE:
+            return False
+        job.update(status=DONE, completed_at=time.time(), result=result)
+        self._persist(job)
+        if loop is None:
+            self._notify(job["task_id"])
+        else:
+            loop.call_soon_threadsafe(self._notify, job["task_id"])
+        return True
+
+    def _complete_stored(self, task_id: str, result, loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+        job = self._load(task_id)
+        return job is not None and self._finish(job, result, loop)
+
+    def _notify(self, task_id: str) -> None:
+        event = self.events.pop(task_id, None)
+        if event is not None:
+            event.set()
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        job = self.jobs.get(task_id)
+        if job is None:
+            job = self._load(task_id)
+            if job is None:
+                return None
+        elif job["expires_at"] < time.time():
+            return None
+        if job["status"] == PENDING and time.time() - job["submitted_at"] > self.job_timeout:
+            job["status"] = TIMEOUT
+            self._persist(job)
+        return job
+
+    async def fetch(self, task_id: str) -> Optional[Dict]:
+        """``get`` for the event loop: a job not held in memory is looked up in SQLite in the executor."""
+        if task_id in self.jobs or self.db is None:
+            return self.get(task_id)
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, task_id)
+
+    async def wait(self, task_id: str, timeout: float) -> Optional[Dict]:
+        """Long-poll: return the job once it is no longer pending, or after `timeout` seconds."""
+        job = await self.fetch(task_id)
+        if job is None or job["status"] != PENDING or timeout <= 0:
+            return job
+        event = self.events.setdefault(task_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return await self.fetch(task_id)
+
+    def public_view(self, job: Dict) -> Dict:
+        return {k: job[k] for k in ("task_id", "status", "submitted_at", "completed_at", "result")}
+
+    def __len__(self) -> int:
+        return len(self.jobs)
@@ -0,0 +1,129 @@
+"""
+Result cache with singleflight coalescing for the task gateways.
+
+Dashboards and MCP clients often submit the same prompt at the same time.
+``ResultCache.get_or_run`` makes sure that identical requests (same normalized
+prompt and user context) trigger at most one pipeline execution:
+
+    hit        a fresh cached result is returned immediately
+    coalesced  an identical request is already running; wait for its result
+    miss       run the pipeline, cache a successful result for the TTL
+    bypass     the caller asked for a fresh result; run and refresh the cache
+
+The shared execution runs in its own task, so a caller disconnecting does not
+cancel the work other callers are waiting on.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+DEFAULT_TTL = float(os.environ.get("GATEWAY_CACHE_TTL", "300"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("GATEWAY_CACHE_MAX_ENTRIES", "1024"))
+BYPASS_HEADER = "x-cache-bypass"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case- and whitespace-insensitive form of a prompt."""
+    return " ".join(prompt.lower().split())
+
+
+def cache_key(prompt: str, user_context: Optional[Dict[str, Any]] = None, user_id: Optional[str] = None,
+              result_encoding: Optional[str] = None) -> str:
+    request = {"prompt": normalize_prompt(prompt), "user": user_context or {}}
+    if user_id:
+        # Different users get answers shaped by different stored profiles
+        request["user_id"] = user_id
+    if result_encoding and result_encoding != "json":
+        # A columnar task carries full bars instead of summaries
+        request["result_encoding"] = result_encoding
+    payload = json.dumps(request, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_complete(result) -> bool:
+    """
+    True for a result worth caching: no top-level error, and no sub-agent in
+    ``aggregated_results`` that failed or ran out of its budget.
+    """
+    if not isinstance(result, dict) or "error" in result:
+        return False
+    return not any(isinstance(r, dict) and "error" in r for r in result.get("aggregated_results", []))
+
+
+def wants_fresh(headers) -> bool:
+    """True if the request carries the bypass header or ``Cache-Control: no-cache``."""
+    if headers.get(BYPASS_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    return "no-cache" in headers.get("cache-control", "").lower()
+
+
+class ResultCache:
+    """TTL + LRU result cache that coalesces concurrent identical requests."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"hit": 0, "coalesced": 0, "miss": 0, "bypass": 0}
+
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value) -> None:
+        if self.ttl <= 0:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def get_or_run(self, key: str, factory: Callable[[], Awaitable], bypass: bool = False,
+                         cacheable: Callable[[Any], bool] = lambda result: True):
+        """
+        Return ``(result, status)`` for `key`, running `factory` only when needed.
+
+        Only results for which `cacheable(result)` is true are stored, so errors
+        and timeouts are never served from the cache.
+        """
+        if bypass:
+            self.stats["bypass"] += 1
+            result = await factory()
+            if cacheable(result):
+                self.put(key, result)
+            return result, "bypass"
+
+        cached = self.get(key)
+        if cached is not None:
+            self.stats["hit"] += 1
+            return cached, "hit"
+
+        task = self.inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task), "coalesced"
+
+        self.stats["miss"] += 1
+        task = asyncio.ensure_future(factory())
+        self.inflight[key] = task
+
+        def finished(t: asyncio.Task) -> None:
+            self.inflight.pop(key, None)
+            if not t.cancelled() and t.exception() is None and cacheable(t.result()):
+                self.put(key, t.result())
+
+        task.add_done_callback(finished)
+        return await asyncio.shield(task), "miss"
@@ -0,0 +1,209 @@
+"""
+Per-agent latency budgets and hedged requests for the executor's fan-out.
+
+Every sub-agent gets a budget (``EXECUTOR_AGENT_TIMEOUT``, or its entry in
+``EXECUTOR_AGENT_TIMEOUTS``). When it runs out, the executor answers the
+task without that agent, so one slow LLM call no longer holds every task.
+
+Sub-agents subscribe through ``subscribe_agent``. Replicas share a queue
+group on ``agent.<id>``, and each also listens on its own
+``agent.<id>.<replica>`` subject. The executor learns the live replicas from
+the metrics snapshots every agent publishes (``tools/metrics.py``). Tasks for
+an agent that can be hedged go to one live replica by its subject, so the
+executor knows where the original is; everything else goes to the queue
+group. If a task has not been answered by the agent's p95 latency, a
+duplicate goes to a different replica; the first answer wins and the other
+is dropped. A replica that died since its last snapshot loses the original,
+and the hedge answers it instead. Each dispatch earns
+``EXECUTOR_HEDGE_MAX_PERCENT`` percent of a hedge and each hedge spends one,
+so hedges never exceed that share of traffic. Agents with a single replica,
+or too few latency samples for a p95, are never hedged.
+
+    EXECUTOR_AGENT_TIMEOUT       seconds before a task goes on without an agent   (default 30)
+    EXECUTOR_AGENT_TIMEOUTS      per-agent budgets, e.g. "stock_news_agent=20,stock_price_agent=5"
+    EXECUTOR_HEDGE_PERCENTILE    latency percentile after which a request is hedged (default 95)
+    EXECUTOR_HEDGE_MAX_PERCENT   hedged requests as a percentage of dispatches    (default 5)
+    EXECUTOR_HEDGE_MIN_SAMPLES   latencies recorded before an agent is hedged     (default 20)
+    EXECUTOR_REPLICA_STALE       seconds without a snapshot before a replica is dropped (default 15)
+"""
+
+import itertools
+import json
+import math
+import os
+import re
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from latest_ai_development.tools.metrics import METRICS_SNAPSHOT_TOPIC
+
+AGENT_TOPIC_PREFIX = "agent."
+
+AGENT_TIMEOUT = float(os.environ.get("EXECUTOR_AGENT_TIMEOUT", "30"))
+HEDGE_PERCENTILE = float(os.environ.get("EXECUTOR_HEDGE_PERCENTILE", "95"))
+HEDGE_MAX_PERCENT = float(os.environ.get("EXECUTOR_HEDGE_MAX_PERCENT", "5"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("EXECUTOR_HEDGE_MIN_SAMPLES", "20"))
+REPLICA_STALE = float(os.environ.get("EXECUTOR_REPLICA_STALE", "15"))
+
+# Latencies kept per agent for the percentile
+LATENCY_WINDOW = 512
+# Hedges that may be saved up during quiet periods and spent in a burst
+HEDGE_BURST = 10.0
+
+
+def agent_key(name: str) -> str:
+    """Normalise a sub-agent name ('StockNewsAgent' or 'stock_news_agent') to its topic suffix."""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def replica_token(instance: str) -> str:
+    """A metrics instance ("host:pid") as a single NATS subject token."""
+    return re.sub(r"[^\w-]", "_", instance)
+
+
+def agent_subject(agent_id: str, replica: Optional[str] = None) -> str:
+    """``agent.<id>`` (any replica) or ``agent.<id>.<replica>`` (that one)."""
+    return f"{AGENT_TOPIC_PREFIX}{agent_id}" + (f".{replica}" if replica else "")
+
+
+async def subscribe_agent(nc, metrics, cb):
+    """
+    Subscribe a sub-agent replica to its shared queue group and its own replica
+    subject. The agent id and replica are those of its ``AgentMetrics``, which
+    is how the executor finds the replica.
+    """
+    agent_id = metrics.service
+    shared = await nc.subscribe(agent_subject(agent_id), queue=agent_id, cb=cb)
+    own = await nc.subscribe(agent_subject(agent_id, replica_token(metrics.instance)), cb=cb)
+    return shared, own
+
+
+def parse_timeouts(spec: str) -> Dict[str, float]:
+    """``"a=20,b=5"`` -> ``{"a": 20.0, "b": 5.0}``."""
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        agent_id, _, seconds = item.partition("=")
+        timeouts[agent_key(agent_id.strip())] = float(seconds)
+    return timeouts
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * q / 100) - 1))]
+
+
+class LatencyTracker:
+    """Recent response latencies per agent."""
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, agent_id: str, seconds: float) -> None:
+        self._samples.setdefault(agent_id, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, agent_id: str, q: float = HEDGE_PERCENTILE) -> Optional[float]:
+        """The q-th percentile, or None until `min_samples` latencies were recorded."""
+        samples = self._samples.get(agent_id)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        return percentile(list(samples), q)
+
+
+class HedgeBudget:
+    """Token bucket that keeps hedges under `max_percent` of dispatches."""
+
+    def __init__(self, max_percent: float = HEDGE_MAX_PERCENT, burst: float = HEDGE_BURST):
+        self.rate = max_percent / 100
+        self.burst = burst
+        self.tokens = 0.0
+
+    def on_dispatch(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.rate)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ReplicaDirectory:
+    """Live replicas of each agent, learned from ``metrics.snapshots.<agent id>``."""
+
+    def __init__(self, stale_after: float = REPLICA_STALE):
+        self.stale_after = stale_after
+        self._seen: Dict[str, Dict[str, float]] = {}
+        self._turns = itertools.count()
+
+    async def handle(self, msg) -> None:
+        try:
+            snapshot = json.loads(msg.data.decode())
+            self.seen(snapshot["service"], snapshot["instance"], snapshot.get("timestamp"))
+        except (ValueError, KeyError) as e:
+            print(f"[Executor] Ignoring malformed snapshot on {msg.subject}: {e}")
+
+    async def subscribe(self, nc):
+        return await nc.subscribe(f"{METRICS_SNAPSHOT_TOPIC}.>", cb=self.handle)
+
+    def seen(self, agent_id: str, instance: str, timestamp: Optional[float] = None) -> None:
+        self._seen.setdefault(agent_id, {})[replica_token(instance)] = timestamp or time.time()
+
+    def replicas(self, agent_id: str) -> List[str]:
+        now = time.time()
+        seen = self._seen.get(agent_id, {})
+        for replica in [r for r, at in seen.items() if now - at > self.stale_after]:
+            del seen[replica]
+        return sorted(seen)
+
+    def pick(self, agent_id: str, exclude: Optional[str] = None) -> Optional[str]:
+        """A live replica other than `exclude`, round-robin; None if there is none."""
+        replicas = [r for r in self.replicas(agent_id) if r != exclude]
+        return replicas[next(self._turns) % len(replicas)] if replicas else None
+
+
+class FanOutPolicy:
+    """Budgets, hedge delays and the hedge allowance for the executor's sub-agent calls."""
+
+    def __init__(self, default_timeout: float = AGENT_TIMEOUT, timeouts: Optional[Dict[str, float]] = None,
+                 latencies: Optional[LatencyTracker] = None, budget: Optional[HedgeBudget] = None,
+                 replicas: Optional[ReplicaDirectory] = None):
+        self.default_timeout = default_timeout
+        self.timeouts = parse_timeouts(os.environ.get("EXECUTOR_AGENT_TIMEOUTS", "")) if timeouts is None else timeouts
+        self.latencies = latencies or LatencyTracker()
+        self.budget = budget or HedgeBudget()
+        self.replicas = replicas or ReplicaDirectory()
+        self.stats = {"dispatched": 0, "hedged": 0, "hedges_denied": 0, "timeouts": 0}
+
+    def timeout(self, agent_id: str) -> float:
+        return self.timeouts.get(agent_id, self.default_timeout)
+
+    def dispatch(self, agent_id: str) -> Optional[str]:
+        """
+        Count a dispatch and choose where it goes: a live replica when the agent
+        can be hedged (so the hedge can avoid it), else None for the queue group.
+        """
+        self.stats["dispatched"] += 1
+        self.budget.on_dispatch()
+        return self.replicas.pick(agent_id) if self.hedge_delay(agent_id) is not None else None
+
+    def hedge_delay(self, agent_id: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None if this agent cannot be hedged."""
+        if len(self.replicas.replicas(agent_id)) < 2:
+            return None
+        delay = self.latencies.percentile(agent_id)
+        return delay if delay is not None and delay < self.timeout(agent_id) else None
+
+    def hedge(self, agent_id: str, exclude: Optional[str] = None) -> Optional[str]:
+        """The replica for a hedged duplicate, if the hedge budget allows one."""
+        replica = self.replicas.pick(agent_id, exclude=exclude)
+        if replica is None:
+            return None
+        if not self.budget.try_spend():
+            self.stats["hedges_denied"] += 1
+            return None
+        self.stats["hedged"] += 1
+        return replica
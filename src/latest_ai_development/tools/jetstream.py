@@ -0,0 +1,204 @@
+"""
+Optional JetStream work-queue mode for the task pipeline.
+
+By default every hop uses core NATS fire-and-forget publish, so a task in
+flight while a service restarts is lost. With ``NATS_JETSTREAM=true`` the
+entry and control subjects are captured by a work-queue stream instead:
+
+    crew.captain            captain pull consumer
+    agent.prompt_processor  prompt processor pull consumer
+    agent.executor          executor pull consumer
+
+Each consumer uses explicit acks and a bounded ``max_ack_pending``, which is
+the backpressure window: a service never holds more unacknowledged tasks than
+that. A message is acked only after the handler has published downstream (with
+``js.publish``, so the next hop is persisted first); failures are nak'ed with a
+delay. While a handler runs, the consumer tells the server it is still in
+progress every third of ``ack_wait``, so a slow LLM call is not redelivered
+(and paid for twice); a message is redelivered only if its service dies. Fetch
+errors (reconnects, a deleted consumer) are logged and retried with backoff.
+
+Agents call ``subscribe()`` instead of ``nc.subscribe()``; it returns a core
+subscription or a ``PullConsumer``, both of which support ``unsubscribe()``.
+
+Run a local server with ``nats-server -js`` to use this mode.
+"""
+
+import asyncio
+import os
+from typing import Awaitable, Callable, List, Optional
+
+import nats.errors
+from nats.js.api import AckPolicy, ConsumerConfig, RetentionPolicy, StorageType, StreamConfig
+from nats.js.errors import BadRequestError
+
+TASK_STREAM = "CREW_TASKS"
+TASK_STREAM_SUBJECTS = ["crew.captain", "agent.prompt_processor", "agent.executor"]
+
+DEFAULT_MAX_ACK_PENDING = int(os.environ.get("NATS_JS_MAX_ACK_PENDING", "16"))
+DEFAULT_ACK_WAIT = float(os.environ.get("NATS_JS_ACK_WAIT", "60"))
+DEFAULT_MAX_DELIVER = int(os.environ.get("NATS_JS_MAX_DELIVER", "5"))
+NAK_DELAY = 2.0
+# Backoff between failed fetches, doubling up to the maximum
+FETCH_RETRY_DELAY = 0.5
+FETCH_RETRY_MAX = 30.0
+
+
+def jetstream_enabled() -> bool:
+    return os.environ.get("NATS_JETSTREAM", "false").lower() == "true"
+
+
+async def ensure_task_stream(js, name: str = TASK_STREAM, subjects: Optional[List[str]] = None):
+    """Create the work-queue stream, or update it if it already exists with other settings."""
+    config = StreamConfig(
+        name=name,
+        subjects=subjects or TASK_STREAM_SUBJECTS,
+        retention=RetentionPolicy.WORK_QUEUE,
+        storage=StorageType.FILE,
+    )
+    try:
+        return await js.add_stream(config)
+    except BadRequestError:
+        return await js.update_stream(config)
+
+
+async def setup_jetstream(nc):
+    """Return a JetStream context with the task stream in place, or None when the mode is off."""
+    if not jetstream_enabled():
+        return None
+    js = nc.jetstream()
+    await ensure_task_stream(js)
+    print(f"[JetStream] Work-queue stream {TASK_STREAM} ready for {TASK_STREAM_SUBJECTS}")
+    return js
+
+
+class PullConsumer:
+    """
+    Durable pull consumer that feeds messages to an async handler.
+
+    Keeps at most `max_ack_pending` handlers running; fetches only as many
+    messages as there are free slots.
+    """
+
+    def __init__(self, js, subject: str, durable: str, handler: Callable[..., Awaitable],
+                 stream: str = TASK_STREAM, max_ack_pending: int = DEFAULT_MAX_ACK_PENDING,
+                 ack_wait: float = DEFAULT_ACK_WAIT, max_deliver: int = DEFAULT_MAX_DELIVER,
+                 fetch_timeout: float = 5.0):
+        self.js = js
+        self.subject = subject
+        self.durable = durable
+        self.handler = handler
+        self.stream = stream
+        self.max_ack_pending = max_ack_pending
+        self.ack_wait = ack_wait
+        self.max_deliver = max_deliver
+        self.fetch_timeout = fetch_timeout
+        self.sub = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._active = 0
+        self._slot_freed = asyncio.Event()
+        self._handlers = set()
+
+    async def start(self) -> "PullConsumer":
+        self.sub = await self._pull_subscribe()
+        self._loop_task = asyncio.create_task(self._run())
+        self._loop_task.add_done_callback(self._loop_exited)
+        return self
+
+    async def _pull_subscribe(self):
+        """Bind to the durable consumer, creating it if it does not exist (again)."""
+        return await self.js.pull_subscribe(
+            self.subject,
+            durable=self.durable,
+            stream=self.stream,
+            config=ConsumerConfig(
+                ack_policy=AckPolicy.EXPLICIT,
+                max_ack_pending=self.max_ack_pending,
+                ack_wait=self.ack_wait,
+                max_deliver=self.max_deliver,
+            ),
+        )
+
+    def _loop_exited(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        print(f"[JetStream] Consumer {self.durable} on {self.subject} stopped fetching: {task.exception()!r}")
+
+    async def _keep_alive(self, msg) -> None:
+        """Tell the server the message is still being worked on, so it is not redelivered."""
+        while True:
+            await asyncio.sleep(self.ack_wait / 3)
+            try:
+                await msg.in_progress()
+            except Exception as e:
+                print(f"[JetStream] In-progress ack for {self.subject} failed: {e}")
+
+    async def _process(self, msg) -> None:
+        keep_alive = asyncio.create_task(self._keep_alive(msg))
+        try:
+            await self.handler(msg)
+        except Exception as e:
+            print(f"[JetStream] Handler for {self.subject} failed, scheduling redelivery: {e}")
+            await msg.nak(delay=NAK_DELAY)
+        else:
+            await msg.ack()
+        finally:
+            keep_alive.cancel()
+            self._active -= 1
+            self._slot_freed.set()
+
+    async def _run(self) -> None:
+        retry_delay = FETCH_RETRY_DELAY
+        while True:
+            while self._active >= self.max_ack_pending:
+                self._slot_freed.clear()
+                await self._slot_freed.wait()
+            try:
+                msgs = await self.sub.fetch(self.max_ack_pending - self._active, timeout=self.fetch_timeout)
+            except nats.errors.TimeoutError:
+                continue
+            except Exception as e:
+                # Reconnecting, connection closed, consumer deleted: keep trying rather than go quiet
+                print(f"[JetStream] Fetch from {self.subject} failed, retrying in {retry_delay:g} s: {e!r}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, FETCH_RETRY_MAX)
+                await self._resubscribe()
+                continue
+            retry_delay = FETCH_RETRY_DELAY
+            for msg in msgs:
+                self._active += 1
+                task = asyncio.create_task(self._process(msg))
+                self._handlers.add(task)
+                task.add_done_callback(self._handlers.discard)
+
+    async def _resubscribe(self) -> None:
+        """Recreate the pull subscription, e.g. after the consumer was deleted."""
+        try:
+            sub = await self._pull_subscribe()
+        except Exception as e:
+            print(f"[JetStream] Re-subscribing to {self.subject} failed: {e!r}")
+            return
+        old, self.sub = self.sub, sub
+        try:
+            await old.unsubscribe()
+        except Exception:
+            pass
+
+    async def unsubscribe(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self.sub:
+            await self.sub.unsubscribe()
+
+
+async def subscribe(nc, js, subject: str, cb, durable: str, **consumer_options):
+    """Subscribe `cb` to `subject`: core NATS when `js` is None, otherwise a durable pull consumer."""
+    if js is None:
+        return await nc.subscribe(subject, cb=cb)
+    return await PullConsumer(js, subject, durable, cb, **consumer_options).start()
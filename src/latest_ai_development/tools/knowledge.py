@@ -0,0 +1,270 @@
+"""
+Retrieval index over the ``knowledge/`` directory.
+
+Text files are split into paragraph chunks. Each chunk is identified by the
+SHA-256 of its text, and only chunks with a new hash are embedded. The
+vectors live in a local store under ``KNOWLEDGE_INDEX_DIR``:
+``vectors.npy`` holds one normalized float32 row per chunk hash, and
+``index.json`` holds the hashes, chunk texts and per-file chunk lists. A
+restart embeds nothing that was indexed before. Editing one paragraph
+re-embeds that paragraph only.
+
+Searches run against an in-memory matrix: one dot product and an
+argpartition, plus one embedding call per distinct query (cached).
+
+    KNOWLEDGE_DIR               directory to index                  (default knowledge)
+    KNOWLEDGE_INDEX_DIR         where vectors are kept              (default knowledge_index)
+    KNOWLEDGE_EMBEDDING_MODEL   embedding model                     (default text-embedding-ada-002)
+    KNOWLEDGE_CHUNK_CHARS       longest chunk, in characters        (default 800)
+    KNOWLEDGE_TOP_K             chunks returned per search          (default 3)
+    KNOWLEDGE_WATCH_INTERVAL    seconds between directory rescans   (default 5)
+
+``watch()`` rescans the directory and re-chunks only files whose size or
+mtime changed.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KNOWLEDGE_DIR = os.environ.get("KNOWLEDGE_DIR", "knowledge")
+KNOWLEDGE_INDEX_DIR = os.environ.get("KNOWLEDGE_INDEX_DIR", "knowledge_index")
+EMBEDDING_MODEL = os.environ.get("KNOWLEDGE_EMBEDDING_MODEL", "text-embedding-ada-002")
+CHUNK_CHARS = int(os.environ.get("KNOWLEDGE_CHUNK_CHARS", "800"))
+TOP_K = int(os.environ.get("KNOWLEDGE_TOP_K", "3"))
+WATCH_INTERVAL = float(os.environ.get("KNOWLEDGE_WATCH_INTERVAL", "5"))
+
+TEXT_SUFFIXES = {".txt", ".md", ".markdown", ".rst", ".csv", ".json", ".yaml", ".yml"}
+EMBED_BATCH = 256
+QUERY_CACHE_SIZE = 256
+
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+
+def openai_embedder(model: str = EMBEDDING_MODEL) -> Embedder:
+    """Embeds a batch of texts with the shared OpenAI client."""
+    from latest_ai_development.tools.llm import create_openai_client
+
+    client = create_openai_client()
+
+    def embed(texts: Sequence[str]) -> np.ndarray:
+        response = client.embeddings.create(model=model, input=list(texts))
+        return np.array([item.embedding for item in response.data], dtype=np.float32)
+
+    return embed
+
+
+def chunk_text(text: str, chunk_chars: int = CHUNK_CHARS) -> List[Tuple[int, int, str]]:
+    """
+    Paragraph chunks as ``(first line, last line, text)``.
+
+    Paragraphs are split at blank lines, so an edit only changes the chunk it
+    falls in. A paragraph longer than `chunk_chars` is cut at line boundaries.
+    """
+    chunks: List[Tuple[int, int, str]] = []
+    lines: List[str] = []
+    start = size = 0
+
+    def close(end: int) -> None:
+        if lines:
+            chunks.append((start, end, "\n".join(lines)))
+
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.rstrip()
+        if not line.strip() or (lines and size + len(line) > chunk_chars):
+            close(number - 1)
+            lines, size = [], 0
+            if not line.strip():
+                continue
+        if not lines:
+            start = number
+        lines.append(line)
+        size += len(line) + 1
+    close(start + len(lines) - 1)
+    return chunks
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class KnowledgeIndex:
+    """Chunked, incrementally embedded index of a directory of text files."""
+
+    def __init__(self, directory: str = KNOWLEDGE_DIR, index_dir: str = KNOWLEDGE_INDEX_DIR,
+                 embed: Optional[Embedder] = None, model: str = EMBEDDING_MODEL, chunk_chars: int = CHUNK_CHARS):
+        self.directory = Path(directory)
+        self.index_dir = Path(index_dir)
+        self.model = model
+        self.chunk_chars = chunk_chars
+        self._embed = embed
+        self._refresh_lock = threading.Lock()
+        self._query_lock = threading.Lock()
+        self._queries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # hash -> text and hash -> row of self._vectors
+        self._texts: Dict[str, str] = {}
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        # relative path -> {"mtime_ns", "size", "chunks": [[hash, first line, last line]]}
+        self._files: Dict[str, Dict] = {}
+        # What searches read: (matrix, [(hash, source, first line, last line)], hash -> text), swapped in whole
+        self._view: Tuple[np.ndarray, List[Tuple], Dict[str, str]] = (np.zeros((0, 0), dtype=np.float32), [], {})
+        self._load()
+
+    @property
+    def embed(self) -> Embedder:
+        if self._embed is None:
+            self._embed = openai_embedder(self.model)
+        return self._embed
+
+    def __len__(self) -> int:
+        return len(self._view[1])
+
+    def _load(self) -> None:
+        meta_path, vectors_path = self.index_dir / "index.json", self.index_dir / "vectors.npy"
+        if not meta_path.exists() or not vectors_path.exists():
+            return
+        meta = json.loads(meta_path.read_text())
+        if meta.get("model") != self.model or meta.get("chunk_chars") != self.chunk_chars:
+            print(f"[Knowledge] Index in {self.index_dir} was built with other settings; re-embedding")
+            return
+        self._texts = meta["texts"]
+        self._rows = {h: row for row, h in enumerate(meta["hashes"])}
+        self._files = meta["files"]
+        self._vectors = np.load(vectors_path)
+        self._publish()
+
+    def _save(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        hashes = sorted(self._rows, key=self._rows.get)
+        meta = {"model": self.model, "chunk_chars": self.chunk_chars, "hashes": hashes,
+                "texts": self._texts, "files": self._files}
+        tmp_vectors, tmp_meta = self.index_dir / "vectors.tmp.npy", self.index_dir / "index.json.tmp"
+        np.save(tmp_vectors, self._vectors)
+        tmp_meta.write_text(json.dumps(meta))
+        os.replace(tmp_vectors, self.index_dir / "vectors.npy")
+        os.replace(tmp_meta, self.index_dir / "index.json")
+
+    def _publish(self) -> None:
+        entries = [(h, source, first, last)
+                   for source, info in sorted(self._files.items()) for h, first, last in info["chunks"]]
+        rows = [self._rows[h] for h, *_ in entries]
+        matrix = self._vectors[rows] if rows else np.zeros((0, 0), dtype=np.float32)
+        self._view = (matrix, entries, self._texts)
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        if not self.directory.is_dir():
+            return {}
+        return {
+            str(path.relative_to(self.directory)): path.stat()
+            for path in sorted(self.directory.rglob("*"))
+            if path.is_file() and path.suffix.lower() in TEXT_SUFFIXES
+            and not any(part.startswith(".") for part in path.relative_to(self.directory).parts)
+        }
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index up to date with the directory; returns what changed."""
+        with self._refresh_lock:
+            found = self._scan()
+            changed = [name for name, st in found.items()
+                       if (self._files.get(name, {}).get("mtime_ns"), self._files.get(name, {}).get("size"))
+                       != (st.st_mtime_ns, st.st_size)]
+            removed = [name for name in self._files if name not in found]
+            if not changed and not removed:
+                return {"files": len(found), "changed": 0, "removed": 0, "embedded": 0}
+
+            files = {name: info for name, info in self._files.items() if name in found}
+            texts = dict(self._texts)
+            for name in changed:
+                st = found[name]
+                content = (self.directory / name).read_text(errors="replace")
+                chunks = []
+                for first, last, text in chunk_text(content, self.chunk_chars):
+                    h = chunk_hash(text)
+                    texts[h] = text
+                    chunks.append([h, first, last])
+                files[name] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "chunks": chunks}
+
+            live = {h for info in files.values() for h, *_ in info["chunks"]}
+            new = sorted(live - self._rows.keys())
+            vectors = [self.embed([texts[h] for h in new[i:i + EMBED_BATCH]]) for i in range(0, len(new), EMBED_BATCH)]
+
+            kept = sorted(live & self._rows.keys(), key=self._rows.get)
+            parts = ([self._vectors[[self._rows[h] for h in kept]]] if kept else []) + [_normalize(v) for v in vectors]
+            self._vectors = np.concatenate(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+            self._rows = {h: row for row, h in enumerate(kept + new)}
+            self._texts = {h: texts[h] for h in self._rows}
+            self._files = files
+            self._save()
+            self._publish()
+
+            stats = {"files": len(found), "changed": len(changed), "removed": len(removed), "embedded": len(new)}
+            print(f"[Knowledge] Indexed {self.directory}: {stats['changed']} files changed, "
+                  f"{stats['removed']} removed, {stats['embedded']} chunks embedded, {len(self)} chunks total")
+            return stats
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        with self._query_lock:
+            vector = self._queries.get(query)
+            if vector is not None:
+                self._queries.move_to_end(query)
+                return vector
+        vector = _normalize(self.embed([query]))[0]
+        with self._query_lock:
+            self._queries[query] = vector
+            if len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        return vector
+
+    def search(self, query: str, top_k: int = TOP_K) -> List[Dict]:
+        """The `top_k` chunks closest to `query`: text, source, lines and cosine score."""
+        matrix, entries, texts = self._view
+        if not entries or not query.strip():
+            return []
+        scores = matrix @ self._query_vector(query)
+        k = min(top_k, len(entries))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [{"text": texts[entries[i][0]], "source": entries[i][1],
+                 "lines": [entries[i][2], entries[i][3]], "score": round(float(scores[i]), 4)} for i in best]
+
+    def context(self, query: str, top_k: int = TOP_K) -> str:
+        """Search results formatted for a prompt, one ``[source:lines]`` block per chunk."""
+        return "\n\n".join(f"[{hit['source']}:{hit['lines'][0]}-{hit['lines'][1]}]\n{hit['text']}"
+                           for hit in self.search(query, top_k))
+
+    async def watch(self, interval: float = WATCH_INTERVAL) -> None:
+        """Rescan the directory every `interval` seconds and index what changed."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"[Knowledge] Refresh failed: {e}")
+
+
+_index: Optional[KnowledgeIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """The process-wide index, refreshed once when first used."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = KnowledgeIndex()
+            _index.refresh()
+    return _index
@@ -0,0 +1,21 @@
+from crewai.tools import BaseTool
+from typing import Type
+from pydantic import BaseModel, Field
+
+from latest_ai_development.tools.knowledge import TOP_K, get_knowledge_index
+
+
+class KnowledgeSearchInput(BaseModel):
+    """Input schema for KnowledgeSearchTool."""
+    query: str = Field(..., description="What to look up, e.g. 'user interests' or 'user location'.")
+
+class KnowledgeSearchTool(BaseTool):
+    name: str = "Search the knowledge base"
+    description: str = (
+        "Looks up the most relevant passages in the project's knowledge base (facts about the user and their "
+        "preferences, plus reference notes). Use it to tailor research and reports to the user."
+    )
+    args_schema: Type[BaseModel] = KnowledgeSearchInput
+
+    def _run(self, query: str) -> str:
+        return get_knowledge_index().context(query, TOP_K) or "No relevant knowledge found."
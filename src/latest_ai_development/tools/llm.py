@@ -0,0 +1,74 @@
+"""
+Shared OpenAI client configuration for the NATS agents.
+
+All agents read the same settings so the whole system can be pointed at a
+different OpenAI-compatible endpoint (e.g. the local stub in
+``tools/perf/llm_stub_server.py``) with one environment variable:
+
+    OPENAI_BASE_URL   Base URL of the API, e.g. http://localhost:8089/v1
+    OPENAI_API_KEY    Required for the real API; optional when OPENAI_BASE_URL is set
+    LLM_CASSETTE      Record/replay calls through a cassette file (see ``tools/cassette.py``)
+
+Importing ``openai`` takes about a second, so agents hold a ``LazyClient``
+from ``lazy_openai_client()``: the client is built on first use, and
+``warm_up()`` builds it in the background once the agent is subscribed.
+"""
+
+import os
+import threading
+
+DEFAULT_STUB_API_KEY = "stub-key"
+
+
+def get_base_url():
+    """Return the configured OpenAI-compatible base URL, or None for the real API."""
+    return os.environ.get("OPENAI_BASE_URL") or None
+
+
+def get_api_key():
+    """
+    Return the API key to use.
+
+    A custom base URL (local stub or self-hosted server) does not need a real
+    key, so a placeholder is used when none is configured.
+    """
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if api_key:
+        return api_key
+    if get_base_url():
+        return DEFAULT_STUB_API_KEY
+    raise EnvironmentError("Missing OPENAI_API_KEY environment variable.")
+
+
+def create_openai_client():
+    """Create an OpenAI client honouring OPENAI_BASE_URL and LLM_CASSETTE."""
+    from openai import OpenAI
+
+    from latest_ai_development.tools.cassette import wrap_openai_client
+
+    return wrap_openai_client(OpenAI(api_key=get_api_key(), base_url=get_base_url()))
+
+
+class LazyClient:
+    """Stands in for a client and builds it from `factory` on first attribute access."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        """Build the client now; returns it."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.warm_up(), name)
+
+
+def lazy_openai_client():
+    """An OpenAI client that is only imported and created when first used."""
+    return LazyClient(create_openai_client)
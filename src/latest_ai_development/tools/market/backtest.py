@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Parallel backtests of the price predictor's indicator strategy.
+
+A strategy is one set of indicator parameters (see ``indicators.DEFAULT_PARAMS``)
+plus entry/exit thresholds on the signal score: go long at the close where
+``score >= entry`` and go flat where ``score <= exit``. The position earns the
+next bar's return, minus ``cost_bps`` per unit of turnover. Every ticker in the
+universe gets the same weight.
+
+Parameter grids are run in a process pool. The close matrix is copied once into
+``multiprocessing.shared_memory`` and every worker maps it, so only the small
+parameter dicts and result dicts are pickled. Strategies are independent, so
+throughput scales with cores until memory bandwidth runs out; ``--scaling``
+measures it.
+
+Usage:
+    python -m latest_ai_development.tools.market.backtest --grid sma_fast=10,20 sma_slow=50,100 entry=1,2
+    python -m latest_ai_development.tools.market.backtest --synthetic 500x2520 --grid rsi_period=7,14,21 --scaling
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from latest_ai_development.tools.market.indicators import (
+    BUY_SCORE,
+    CHUNK_TICKERS,
+    DEFAULT_PARAMS,
+    close_matrix,
+    compute_indicators,
+    score_signals,
+)
+from latest_ai_development.tools.market.price_store import PriceStore
+
+BARS_PER_YEAR = 252
+STRATEGY_DEFAULTS = {"entry": BUY_SCORE, "exit": 0.0}
+
+# Set in each worker by _attach_prices
+_PRICES: Optional[np.ndarray] = None
+_SHARED: Optional[shared_memory.SharedMemory] = None
+
+
+def parameter_grid(spec: Dict[str, Iterable]) -> List[Dict]:
+    """Cartesian product of the parameter values, skipping fast >= slow combinations."""
+    names = list(spec)
+    grid = []
+    for values in itertools.product(*(list(spec[name]) for name in names)):
+        params = dict(zip(names, values))
+        merged = {**DEFAULT_PARAMS, **params}
+        if merged["sma_fast"] >= merged["sma_slow"] or merged["macd_fast"] >= merged["macd_slow"]:
+            continue
+        grid.append(params)
+    return grid
+
+
+def positions(score: np.ndarray, entry: float, exit: float) -> np.ndarray:
+    """Long (1) from a bar with ``score >= entry`` until one with ``score <= exit``, else flat (0)."""
+    events = np.full(score.shape, np.nan)
+    events[score <= exit] = 0.0
+    events[score >= entry] = 1.0
+    # Forward-fill the last event; bars before the first event are flat
+    bars = score.shape[1]
+    index = np.where(np.isnan(events), -1, np.arange(bars))
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = np.take_along_axis(events, np.maximum(index, 0), axis=1)
+    filled[index < 0] = 0.0
+    return filled
+
+
+def strategy_returns(close: np.ndarray, params: Dict, cost_bps: float = 5.0,
+                     chunk: int = CHUNK_TICKERS) -> np.ndarray:
+    """Equal-weight portfolio return per bar (the first bar is 0)."""
+    params = {**STRATEGY_DEFAULTS, **params}
+    indicator_params = {k: v for k, v in params.items() if k in DEFAULT_PARAMS}
+    tickers, bars = close.shape
+    total = np.zeros(bars)
+    counted = np.zeros(bars)
+    for start in range(0, tickers, chunk):
+        block = np.asarray(close[start:start + chunk], dtype=np.float64)
+        score = score_signals(block, compute_indicators(block, **indicator_params))
+        held = positions(score, params["entry"], params["exit"])
+        returns = np.zeros_like(block)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(block[:, 1:], block[:, :-1], out=returns[:, 1:])
+        returns -= 1.0
+        returns[:, 0] = 0.0
+        valid = np.isfinite(returns)
+        # Position decided at bar t-1's close earns bar t's return
+        pnl = np.zeros_like(block)
+        pnl[:, 1:] = held[:, :-1] * np.where(valid[:, 1:], returns[:, 1:], 0.0)
+        pnl[:, 1:] -= np.abs(np.diff(held, axis=1)) * (cost_bps / 1e4)
+        total += pnl.sum(axis=0)
+        counted += valid.sum(axis=0)
+    return np.divide(total, counted, out=np.zeros(bars), where=counted > 0)
+
+
+def performance(returns: np.ndarray, bars_per_year: int = BARS_PER_YEAR) -> Dict[str, float]:
+    equity = np.cumprod(1.0 + returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0
+    years = len(returns) / bars_per_year
+    std = returns.std()
+    return {
+        "total_return": float(equity[-1] - 1.0),
+        "cagr": float(equity[-1] ** (1.0 / years) - 1.0) if years > 0 and equity[-1] > 0 else float("nan"),
+        "max_drawdown": float(drawdown.min()),
+        "sharpe": float(returns.mean() / std * np.sqrt(bars_per_year)) if std > 0 else 0.0,
+        "volatility": float(std * np.sqrt(bars_per_year)),
+    }
+
+
+def run_strategy(close: np.ndarray, params: Dict, cost_bps: float = 5.0) -> Dict:
+    started = time.perf_counter()
+    result = {"params": params, **performance(strategy_returns(close, params, cost_bps))}
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _attach_prices(name: str, shape, dtype: str) -> None:
+    global _PRICES, _SHARED
+    # Pool workers share the parent's resource tracker, which unlinks the segment with the parent
+    _SHARED = shared_memory.SharedMemory(name=name)
+    _PRICES = np.ndarray(shape, dtype=dtype, buffer=_SHARED.buf)
+
+
+def _run_shared(args) -> Dict:
+    params, cost_bps = args
+    return run_strategy(_PRICES, params, cost_bps)
+
+
+def run_backtests(close: np.ndarray, grid: List[Dict], workers: Optional[int] = None,
+                  cost_bps: float = 5.0) -> List[Dict]:
+    """Run every strategy in `grid`; results are sorted by Sharpe ratio, best first."""
+    workers = min(workers or os.cpu_count() or 1, max(len(grid), 1))
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    if workers <= 1:
+        results = [run_strategy(close, params, cost_bps) for params in grid]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(close.nbytes, 1))
+        try:
+            np.ndarray(close.shape, dtype=close.dtype, buffer=shm.buf)[:] = close
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_prices,
+                                     initargs=(shm.name, close.shape, close.dtype.str)) as pool:
+                results = list(pool.map(_run_shared, [(params, cost_bps) for params in grid]))
+        finally:
+            shm.close()
+            shm.unlink()
+    return sorted(results, key=lambda r: r["sharpe"], reverse=True)
+
+
+def _parse_grid(items: List[str]) -> Dict[str, List]:
+    spec = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if name not in DEFAULT_PARAMS and name not in STRATEGY_DEFAULTS:
+            raise SystemExit(f"Unknown parameter {name!r}; choose from {sorted({**DEFAULT_PARAMS, **STRATEGY_DEFAULTS})}")
+        cast = float if isinstance({**DEFAULT_PARAMS, **STRATEGY_DEFAULTS}[name], float) else int
+        spec[name] = [cast(v) for v in values.split(",") if v]
+    return spec
+
+
+def render_results(results: List[Dict], limit: int) -> str:
+    lines = [f"{'strategy':<44} {'return':>8} {'CAGR':>7} {'max DD':>8} {'Sharpe':>7}"]
+    for r in results[:limit]:
+        label = " ".join(f"{k}={v}" for k, v in r["params"].items()) or "defaults"
+        lines.append(f"{label:<44} {r['total_return']:>8.1%} {r['cagr']:>7.1%} "
+                     f"{r['max_drawdown']:>8.1%} {r['sharpe']:>7.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest indicator strategies over a parameter grid")
+    parser.add_argument("--grid", nargs="*", default=[], help="name=v1,v2 ... (indicator params, entry, exit)")
+    parser.add_argument("--store", help="Price store directory (default: PRICE_STORE_DIR)")
+    parser.add_argument("--tickers", help="Comma-separated tickers (default: whole store)")
+    parser.add_argument("--bars", type=int, default=BARS_PER_YEAR * 10, help="History length in bars")
+    parser.add_argument("--synthetic", help="Use a random-walk universe instead, e.g. 500x2520")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--cost-bps", type=float, default=5.0, help="Cost per unit of turnover in basis points")
+    parser.add_argument("--top", type=int, default=20, help="Strategies to print")
+    parser.add_argument("--scaling", action="store_true", help="Time the grid with 1..--workers processes")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        tickers, bars = (int(n) for n in args.synthetic.lower().split("x"))
+        rng = np.random.default_rng(0)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (tickers, bars)), axis=1))
+    else:
+        store = PriceStore(args.store)
+        names = args.tickers.split(",") if args.tickers else store.tickers()
+        found, _, close = close_matrix(store, names, args.bars)
+        if not found:
+            raise SystemExit("No price history found; load some with ingest_prices first")
+    grid = parameter_grid(_parse_grid(args.grid)) or [{}]
+    print(f"Backtesting {len(grid)} strategies on {close.shape[0]} tickers x {close.shape[1]} bars")
+
+    if args.scaling:
+        baseline = None
+        for workers in range(1, args.workers + 1):
+            started = time.perf_counter()
+            results = run_backtests(close, grid, workers, args.cost_bps)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(f"  {workers} workers: {elapsed:.2f}s (speedup {baseline / elapsed:.2f}x)")
+    else:
+        started = time.perf_counter()
+        results = run_backtests(close, grid, args.workers, args.cost_bps)
+        print(f"Finished in {time.perf_counter() - started:.2f}s with {args.workers} workers")
+    print(render_results(results, args.top))
+
+
+if __name__ == "__main__":
+    main()
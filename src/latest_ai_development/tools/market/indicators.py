@@ -0,0 +1,381 @@
+"""
+Vectorized technical indicators over a 2-D price matrix.
+
+Every function takes ``close`` shaped ``(tickers, bars)`` (oldest bar first)
+and returns arrays of the same shape, computing all tickers at once with no
+Python loop over tickers or bars:
+
+    sma         cumulative-sum difference, O(bars) per ticker
+    ema         blocked closed form: one GEMM over blocks of EMA_BLOCK bars,
+                plus a small multiply carrying state between blocks
+    rsi         Wilder smoothing (an EMA with alpha = 1/period)
+    macd        EMA(fast) - EMA(slow), its EMA signal line and histogram
+    bollinger   SMA +/- k rolling standard deviations and %B
+
+Missing bars (NaN, e.g. before a listing date) are forward-filled for the
+recursions and masked again in the outputs. ``score_signals`` combines the
+indicators into a per-bar score and ``rank_universe`` scores the latest bar of
+an arbitrarily large universe in cache-sized ticker chunks.
+"""
+
+import functools
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+EMA_BLOCK = 32
+CHUNK_TICKERS = 128
+
+DEFAULT_PARAMS = {
+    "sma_fast": 20,
+    "sma_slow": 50,
+    "rsi_period": 14,
+    "macd_fast": 12,
+    "macd_slow": 26,
+    "macd_signal": 9,
+    "bb_period": 20,
+    "bb_width": 2.0,
+}
+
+# The seed of an EMA still weighs exp(-bars / e-folding time); 40 e-folds is below float precision
+WARMUP_EFOLDS = 40
+
+BUY_SCORE = 2.0
+SELL_SCORE = -2.0
+
+
+def fill_missing(close: np.ndarray):
+    """Forward-fill NaNs (back-filling leading NaNs); returns ``(filled, valid_mask)``."""
+    close = np.asarray(close, dtype=np.float64)
+    valid = ~np.isnan(close)
+    if valid.all():
+        return close, valid
+    bars = close.shape[1]
+    index = np.where(valid, np.arange(bars), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = np.take_along_axis(close, index, axis=1)
+    # Leading NaNs take the first valid value
+    first = np.argmax(valid, axis=1)
+    first_value = close[np.arange(close.shape[0]), first]
+    filled = np.where(np.isnan(filled), first_value[:, None], filled)
+    return filled, valid
+
+
+def _listed(valid: np.ndarray) -> np.ndarray:
+    """True from each ticker's first valid bar onwards."""
+    return np.logical_or.accumulate(valid, axis=1)
+
+
+def _mask_unlisted(out: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    if not valid.all():
+        out[~_listed(valid)] = np.nan
+    return out
+
+
+def _mask_warmup(out: np.ndarray, valid: np.ndarray, window: int) -> np.ndarray:
+    """NaN out bars before a ticker has `window` bars of history."""
+    if valid.all():
+        out[:, :window - 1] = np.nan
+    else:
+        history = np.cumsum(_listed(valid), axis=1)
+        out[history < window] = np.nan
+    return out
+
+
+def _window_sums(cs: np.ndarray, window: int) -> np.ndarray:
+    """Sums over the trailing `window` bars from a cumulative sum; NaN during warm-up."""
+    out = np.empty(cs.shape)
+    out[:, :window - 1] = np.nan
+    out[:, window - 1] = cs[:, window - 1]
+    np.subtract(cs[:, window:], cs[:, :-window], out=out[:, window:])
+    return out
+
+
+class _Rolling:
+    """Cumulative sums of one filled matrix, shared by every rolling mean/std over it."""
+
+    def __init__(self, filled: np.ndarray):
+        # Centred on each row's first value so the sum-of-squares difference does not cancel catastrophically
+        self.offset = filled[:, :1]
+        centred = filled - self.offset
+        self.cs = np.cumsum(centred, axis=1)
+        centred *= centred
+        self.cs2 = np.cumsum(centred, axis=1)
+        self.bars = filled.shape[1]
+
+    def mean(self, window: int) -> np.ndarray:
+        if window > self.bars:
+            return np.full(self.cs.shape, np.nan)
+        out = _window_sums(self.cs, window)
+        out /= window
+        out += self.offset
+        return out
+
+    def std(self, window: int) -> np.ndarray:
+        """Population standard deviation over `window` bars."""
+        if window > self.bars:
+            return np.full(self.cs.shape, np.nan)
+        mean = _window_sums(self.cs, window)
+        mean /= window
+        out = _window_sums(self.cs2, window)
+        out /= window
+        out -= mean * mean
+        np.maximum(out, 0.0, out=out)
+        return np.sqrt(out, out=out)
+
+
+def sma(close: np.ndarray, window: int) -> np.ndarray:
+    filled, valid = fill_missing(close)
+    return _mask_warmup(_Rolling(filled).mean(window), valid, window)
+
+
+def rolling_std(close: np.ndarray, window: int) -> np.ndarray:
+    """Population standard deviation over `window` bars."""
+    filled, valid = fill_missing(close)
+    return _mask_warmup(_Rolling(filled).std(window), valid, window)
+
+
+@functools.lru_cache(maxsize=64)
+def _decay_matrix(decay: float, size: int, scale: float = 1.0) -> np.ndarray:
+    """``m[s, t] = scale * decay**(t - s)`` for ``s <= t``, else 0."""
+    lag = np.arange(size)[None, :] - np.arange(size)[:, None]
+    matrix = np.where(lag >= 0, scale * decay ** np.maximum(lag, 0), 0.0)
+    matrix.setflags(write=False)
+    return matrix
+
+
+def ema_alpha(values: np.ndarray, alpha: float, block: int = EMA_BLOCK) -> np.ndarray:
+    """
+    Exponential moving average ``y[t] = y[t-1] + alpha * (x[t] - y[t-1])``, seeded with ``x[0]``.
+
+    The bars are cut into blocks of `block`. A matrix-vector product gives each
+    block's final value from a zero start, and a small matrix multiply turns
+    those into the state carried into every block. One GEMM of
+    ``[block bars | carried state]`` against ``[decay weights; decay powers]``
+    then produces the whole output. `values` must not contain NaN (see
+    ``fill_missing``).
+    """
+    tickers, bars = values.shape
+    out = np.empty((tickers, bars))
+    if bars == 0:
+        return out
+    decay = 1.0 - alpha
+    weights = _decay_matrix(decay, block, alpha)
+    powers = decay ** np.arange(1, block + 1)
+    start = values[:, 0]
+    blocks, tail = divmod(bars, block)
+    if blocks:
+        span = blocks * block
+        x = values[:, :span].reshape(tickers, blocks, block)
+        # State entering block k: sum_j<k D**(k-1-j) * end_j + D**k * start, with D = decay**block
+        block_decay = decay ** block
+        augmented = np.empty((tickers, blocks, block + 1))
+        augmented[:, :, :block] = x
+        carry_in = augmented[:, :, block]
+        carry_in[:, 0] = start
+        carry_in[:, 1:] = ((x @ weights[:, -1]) @ _decay_matrix(block_decay, blocks))[:, :-1]
+        carry_in[:, 1:] += start[:, None] * block_decay ** np.arange(1, blocks)
+        np.matmul(augmented, np.vstack([weights, powers]), out=out[:, :span].reshape(tickers, blocks, block))
+        start = out[:, span - 1]
+    if tail:
+        out[:, bars - tail:] = values[:, bars - tail:] @ weights[:tail, :tail]
+        out[:, bars - tail:] += start[:, None] * powers[:tail]
+    return out
+
+
+def ema(close: np.ndarray, span: int) -> np.ndarray:
+    filled, valid = fill_missing(close)
+    return _mask_unlisted(ema_alpha(filled, 2.0 / (span + 1)), valid)
+
+
+def _rsi(filled: np.ndarray, valid: np.ndarray, period: int) -> np.ndarray:
+    delta = np.zeros_like(filled)
+    np.subtract(filled[:, 1:], filled[:, :-1], out=delta[:, 1:])
+    alpha = 1.0 / period
+    avg_gain = ema_alpha(np.maximum(delta, 0.0), alpha)
+    np.negative(delta, out=delta)
+    np.maximum(delta, 0.0, out=delta)
+    avg_loss = ema_alpha(delta, alpha)
+    # RSI = 100 * gain / (gain + loss); flat stretches (0/0) read 50
+    total = avg_gain + avg_loss
+    flat = total == 0
+    total[flat] = 1.0
+    out = np.divide(avg_gain, total, out=avg_gain)
+    out *= 100.0
+    out[flat] = 50.0
+    return _mask_warmup(out, valid, period + 1)
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    return _rsi(*fill_missing(close), period)
+
+
+def _macd(filled: np.ndarray, valid: np.ndarray, fast: int, slow: int, signal: int) -> Dict[str, np.ndarray]:
+    line = ema_alpha(filled, 2.0 / (fast + 1))
+    line -= ema_alpha(filled, 2.0 / (slow + 1))
+    signal_line = ema_alpha(line, 2.0 / (signal + 1))
+    _mask_unlisted(line, valid)
+    _mask_unlisted(signal_line, valid)
+    return {"macd": line, "macd_signal": signal_line, "macd_hist": line - signal_line}
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    return _macd(*fill_missing(close), fast, slow, signal)
+
+
+def _bollinger(close: np.ndarray, rolling: _Rolling, valid: np.ndarray, period: int, width: float,
+               middle: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    if middle is None:
+        middle = _mask_warmup(rolling.mean(period), valid, period)
+    deviation = _mask_warmup(rolling.std(period), valid, period)
+    deviation *= width
+    upper, lower = middle + deviation, middle - deviation
+    deviation *= 2.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_b = np.subtract(close, lower)
+        percent_b /= deviation
+    return {"bb_middle": middle, "bb_upper": upper, "bb_lower": lower, "bb_percent_b": percent_b}
+
+
+def bollinger(close: np.ndarray, period: int = 20, width: float = 2.0) -> Dict[str, np.ndarray]:
+    filled, valid = fill_missing(close)
+    return _bollinger(np.asarray(close, dtype=np.float64), _Rolling(filled), valid, period, width)
+
+
+def compute_indicators(close: np.ndarray, **params) -> Dict[str, np.ndarray]:
+    """
+    All indicators for a ``(tickers, bars)`` close matrix; see DEFAULT_PARAMS for the knobs.
+
+    Missing bars are filled once and the rolling sums are shared by the SMAs
+    and Bollinger bands.
+    """
+    p = {**DEFAULT_PARAMS, **params}
+    close = np.asarray(close, dtype=np.float64)
+    filled, valid = fill_missing(close)
+    rolling = _Rolling(filled)
+    means = {}
+    for window in {p["sma_fast"], p["sma_slow"], p["bb_period"]}:
+        means[window] = _mask_warmup(rolling.mean(window), valid, window)
+    indicators = {
+        "sma_fast": means[p["sma_fast"]],
+        "sma_slow": means[p["sma_slow"]],
+        "rsi": _rsi(filled, valid, p["rsi_period"]),
+    }
+    indicators.update(_macd(filled, valid, p["macd_fast"], p["macd_slow"], p["macd_signal"]))
+    indicators.update(_bollinger(close, rolling, valid, p["bb_period"], p["bb_width"], middle=means[p["bb_period"]]))
+    return indicators
+
+
+def score_signals(close: np.ndarray, indicators: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Per-bar score in [-4, 4]: one point each for trend (fast SMA vs slow SMA),
+    MACD histogram sign, RSI oversold/overbought (30/70) and price outside the
+    Bollinger bands. ``>= BUY_SCORE`` is a buy, ``<= SELL_SCORE`` a sell; NaN
+    until the slowest indicator has warmed up.
+    """
+    trend = np.sign(indicators["sma_fast"] - indicators["sma_slow"])
+    momentum = np.sign(indicators["macd_hist"])
+    rsi_values = indicators["rsi"]
+    mean_reversion = (rsi_values < 30).astype(np.float64) - (rsi_values > 70)
+    percent_b = indicators["bb_percent_b"]
+    bands = (percent_b < 0).astype(np.float64) - (percent_b > 1)
+    score = trend + momentum + mean_reversion + bands
+    score[np.isnan(trend) | np.isnan(rsi_values) | np.isnan(percent_b) | np.isnan(np.asarray(close))] = np.nan
+    return score
+
+
+def signal_label(score: float) -> str:
+    if score >= BUY_SCORE:
+        return "buy"
+    if score <= SELL_SCORE:
+        return "sell"
+    return "hold"
+
+
+def warmup_bars(**params) -> int:
+    """
+    Bars of history after which the latest indicator values no longer depend on older bars.
+
+    Rolling windows need their length; the EMAs (RSI smoothing, MACD lines)
+    need WARMUP_EFOLDS e-folding times of their slowest decay.
+    """
+    p = {**DEFAULT_PARAMS, **params}
+    efold = max(p["rsi_period"], (p["macd_slow"] + 1) / 2, (p["macd_signal"] + 1) / 2)
+    return int(max(p["sma_slow"], p["bb_period"], WARMUP_EFOLDS * efold))
+
+
+def rank_universe(tickers: Sequence[str], close: np.ndarray, chunk: int = CHUNK_TICKERS,
+                  lookback: Optional[int] = None, **params) -> List[Dict]:
+    """
+    Score the latest bar of every ticker and rank them, strongest buy first.
+
+    Only the trailing `lookback` bars are read (default ``warmup_bars``), which
+    gives the same latest values as the full history. The universe is processed
+    `chunk` tickers at a time so the intermediate matrices stay cache-sized no
+    matter how many tickers there are.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    close = close[:, -(lookback or warmup_bars(**params)):]
+    latest: Dict[str, np.ndarray] = {}
+    for start in range(0, close.shape[0], chunk):
+        block = close[start:start + chunk]
+        last = {name: values[:, -1:] for name, values in compute_indicators(block, **params).items()}
+        last["score"] = score_signals(block[:, -1:], last)
+        last["close"] = block[:, -1:]
+        for name, values in last.items():
+            latest.setdefault(name, []).append(values)
+    if not latest:
+        return []
+    return ranked_signals(tickers, {name: np.concatenate(parts)[:, 0] for name, parts in latest.items()})
+
+
+def ranked_signals(tickers: Sequence[str], latest: Dict[str, np.ndarray]) -> List[Dict]:
+    """
+    Ranked signal dicts from per-ticker latest values.
+
+    `latest` maps score, close, rsi, macd_hist and bb_percent_b to 1-D arrays
+    aligned with `tickers`. Tickers without a score yet are left out.
+    """
+    score = latest["score"]
+    # Tie-break equal scores by MACD histogram relative to price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = np.nan_to_num(latest["macd_hist"] / latest["close"])
+    order = np.lexsort((-strength, -np.nan_to_num(score, nan=-np.inf)))
+    ranked = []
+    for i in order:
+        if np.isnan(score[i]):
+            continue
+        ranked.append({
+            "ticker": tickers[i],
+            "signal": signal_label(score[i]),
+            "score": float(score[i]),
+            "close": round(float(latest["close"][i]), 4),
+            "rsi": round(float(latest["rsi"][i]), 2),
+            "macd_hist": round(float(latest["macd_hist"][i]), 4),
+            "bb_percent_b": round(float(latest["bb_percent_b"][i]), 3),
+        })
+    return ranked
+
+
+def close_matrix(store, tickers: Sequence[str], bars: int, end: Optional[int] = None):
+    """
+    Align the last `bars` closes of `tickers` from a PriceStore on shared timestamps.
+
+    Returns ``(tickers_found, timestamps, matrix)``; bars a ticker lacks are NaN.
+    """
+    found, series = [], []
+    for ticker in tickers:
+        s = store.series(ticker)
+        if s is not None and len(s):
+            if end is not None:
+                s = s[:int(np.searchsorted(s.timestamp, end, side="right"))]
+            found.append(ticker.upper())
+            series.append(s[max(len(s) - bars, 0):])
+    if not series:
+        return [], np.empty(0, dtype=np.int64), np.empty((0, 0))
+    timestamps = np.unique(np.concatenate([s.timestamp for s in series]))[-bars:]
+    matrix = np.full((len(series), len(timestamps)), np.nan)
+    for row, s in enumerate(series):
+        keep = s.timestamp >= timestamps[0]
+        matrix[row, np.searchsorted(timestamps, s.timestamp[keep])] = s.close[keep]
+    return found, timestamps, matrix
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Load OHLCV history into the memory-mapped price store.
+
+Accepts CSV or Parquet files with Date/Open/High/Low/Close/Volume columns
+(case-insensitive; ``timestamp``/``datetime`` also work and numeric dates are
+taken as epoch seconds). Files with a Ticker or Symbol column may hold many
+tickers; otherwise the ticker is ``--ticker`` or the file name (AAPL.csv).
+Re-ingesting merges with the stored bars, newer rows winning.
+
+``--synthetic`` writes random-walk daily bars instead, for demos and benchmarks.
+
+Usage:
+    python -m latest_ai_development.tools.market.ingest_prices data/AAPL.csv data/MSFT.csv
+    python -m latest_ai_development.tools.market.ingest_prices prices.parquet --store /tmp/prices
+    python -m latest_ai_development.tools.market.ingest_prices --synthetic AAPL,MSFT,NVDA --days 3650
+"""
+
+import argparse
+import csv
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from latest_ai_development.tools.market.price_store import COLUMNS, DAY, PriceStore
+
+COLUMN_ALIASES = {
+    "timestamp": ("timestamp", "date", "datetime", "time"),
+    "open": ("open",),
+    "high": ("high",),
+    "low": ("low",),
+    "close": ("close", "adj close", "adj_close"),
+    "volume": ("volume",),
+}
+TICKER_ALIASES = ("ticker", "symbol")
+
+
+def parse_timestamp(value) -> int:
+    """Epoch seconds from an ISO date/datetime string or a number."""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    if isinstance(value, datetime):
+        return int(value.replace(tzinfo=value.tzinfo or timezone.utc).timestamp())
+    text = str(value).strip()
+    try:
+        return int(float(text))
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _resolve(header: List[str]) -> Dict[str, str]:
+    """Map store columns (and 'ticker') to the file's column names."""
+    lowered = {name.strip().lower(): name for name in header}
+    mapping = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        match = next((lowered[a] for a in aliases if a in lowered), None)
+        if match is None:
+            raise ValueError(f"Missing column {column!r}; found {header}")
+        mapping[column] = match
+    ticker = next((lowered[a] for a in TICKER_ALIASES if a in lowered), None)
+    if ticker:
+        mapping["ticker"] = ticker
+    return mapping
+
+
+def _rows_to_columns(rows: Dict[str, list], mapping: Dict[str, str], default_ticker: Optional[str]):
+    tickers = rows[mapping["ticker"]] if "ticker" in mapping else [default_ticker] * len(rows[mapping["close"]])
+    grouped: Dict[str, Dict[str, list]] = defaultdict(lambda: {name: [] for name in COLUMNS})
+    for i, ticker in enumerate(tickers):
+        if not ticker:
+            raise ValueError("No ticker column and no --ticker given")
+        columns = grouped[str(ticker).upper()]
+        columns["timestamp"].append(parse_timestamp(rows[mapping["timestamp"]][i]))
+        for name in COLUMNS[1:]:
+            value = rows[mapping[name]][i]
+            columns[name].append(float(value) if value not in ("", None) else np.nan)
+    return grouped
+
+
+def read_csv(path: Path, ticker: Optional[str] = None):
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        mapping = _resolve(reader.fieldnames or [])
+        rows: Dict[str, list] = defaultdict(list)
+        for row in reader:
+            for name in set(mapping.values()):
+                rows[name].append(row[name])
+    return _rows_to_columns(rows, mapping, ticker)
+
+
+def read_parquet(path: Path, ticker: Optional[str] = None):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet ingest requires pyarrow: pip install pyarrow")
+    table = pq.read_table(path)
+    mapping = _resolve(table.column_names)
+    rows = {name: table.column(name).to_pylist() for name in set(mapping.values())}
+    return _rows_to_columns(rows, mapping, ticker)
+
+
+def ingest_file(store: PriceStore, path: Path, ticker: Optional[str] = None) -> Dict[str, int]:
+    """Ingest one file; returns {ticker: bars stored}."""
+    default_ticker = ticker or path.stem.upper()
+    reader = read_parquet if path.suffix.lower() in (".parquet", ".pq") else read_csv
+    return {t: store.write(t, columns) for t, columns in reader(path, default_ticker).items()}
+
+
+def synthetic_ohlcv(days: int, seed: int, end: Optional[int] = None, start_price: float = 100.0) -> Dict[str, np.ndarray]:
+    """Geometric random-walk daily bars ending at `end` (default: today, UTC midnight)."""
+    rng = np.random.default_rng(seed)
+    end = (int(time.time()) // DAY) * DAY if end is None else end
+    timestamp = end - DAY * np.arange(days - 1, -1, -1, dtype=np.int64)
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days)))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.01, days)) * close
+    return {
+        "timestamp": timestamp,
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.integers(100_000, 10_000_000, days).astype(np.float64),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load OHLCV history into the price store")
+    parser.add_argument("files", nargs="*", type=Path, help="CSV or Parquet files")
+    parser.add_argument("--ticker", help="Ticker for files without a ticker column (default: file name)")
+    parser.add_argument("--store", help="Store directory (default: PRICE_STORE_DIR or data/prices)")
+    parser.add_argument("--synthetic", help="Comma-separated tickers to fill with random-walk bars")
+    parser.add_argument("--days", type=int, default=365 * 2, help="Bars per synthetic ticker")
+    args = parser.parse_args(argv)
+
+    if not args.files and not args.synthetic:
+        parser.error("give files to ingest or --synthetic")
+
+    store = PriceStore(args.store)
+    started = time.perf_counter()
+    stored: Dict[str, int] = {}
+    for path in args.files:
+        stored.update(ingest_file(store, path, args.ticker))
+    if args.synthetic:
+        for i, ticker in enumerate(t.strip() for t in args.synthetic.split(",") if t.strip()):
+            stored[ticker.upper()] = store.write(ticker, synthetic_ohlcv(args.days, seed=i), merge=False)
+
+    for ticker, bars in sorted(stored.items()):
+        print(f"{ticker:<8} {bars:>7} bars")
+    print(f"Stored {len(stored)} tickers in {store.root} ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Pull tickers and lookback windows out of free-text task descriptions, and
+fields out of the task envelopes the pipeline wraps around them.
+"""
+
+import re
+from typing import List, Tuple
+
+COMPANY_TICKERS = {
+    "apple": "AAPL", "microsoft": "MSFT", "google": "GOOGL", "alphabet": "GOOGL", "amazon": "AMZN",
+    "meta": "META", "facebook": "META", "nvidia": "NVDA", "tesla": "TSLA", "netflix": "NFLX",
+    "amd": "AMD", "intel": "INTC", "jpmorgan": "JPM", "berkshire": "BRK.B", "exxon": "XOM",
+    "pfizer": "PFE", "walmart": "WMT", "disney": "DIS", "coca-cola": "KO", "boeing": "BA",
+}
+
+# Upper-case words that look like tickers but are not
+NOT_TICKERS = {
+    "I", "A", "AI", "CEO", "CFO", "IPO", "ETF", "ETFS", "USD", "US", "USA", "EU", "UK", "GDP", "CPI",
+    "FED", "SEC", "EPS", "PE", "ROI", "YTD", "Q1", "Q2", "Q3", "Q4", "OK", "ESG", "API", "NYSE", "S&P",
+}
+
+_TICKER_RE = re.compile(r"\$([A-Za-z]{1,5}(?:\.[A-Za-z])?)\b|\b([A-Z]{2,5}(?:\.[A-Z])?)\b")
+_COMPANY_RE = re.compile(r"(?<![a-z])(" + "|".join(map(re.escape, COMPANY_TICKERS)) + r")(?![a-z])")
+_LOOKBACK_RE = re.compile(r"(\d+)\s*-?\s*(day|week|month|year)s?\b", re.IGNORECASE)
+_UNIT_DAYS = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+
+def extract_task_field(data, name, default=None):
+    """
+    `name` from the task data or the original task it wraps, however deeply nested.
+
+    Sub-agents get the client's task two envelopes down: the captain wraps it in
+    ``original_task_data`` and the prompt processor wraps that again.
+    """
+    while isinstance(data, dict):
+        if data.get(name):
+            return data[name]
+        data = data.get("original_task_data")
+    return default
+
+
+def find_word(text: str, word: str) -> int:
+    """Position of `word` in lower-cased `text` as a whole word, or -1."""
+    match = re.search(r"(?<![a-z])" + re.escape(word) + r"(?![a-z])", text)
+    return match.start() if match else -1
+
+
+def find_tickers(text: str) -> List[Tuple[int, str]]:
+    """``(position, ticker)`` for every cashtag, upper-case symbol or known company name."""
+    found: List[Tuple[int, str]] = []
+    for match in _TICKER_RE.finditer(text):
+        symbol = (match.group(1) or match.group(2)).upper()
+        if match.group(1) or symbol not in NOT_TICKERS:
+            found.append((match.start(), symbol))
+    for match in _COMPANY_RE.finditer(text.lower()):
+        found.append((match.start(), COMPANY_TICKERS[match.group(1)]))
+    return found
+
+
+def extract_tickers(text: str) -> List[str]:
+    """Distinct tickers mentioned in `text`, in order of appearance."""
+    tickers: List[str] = []
+    for _, ticker in sorted(find_tickers(text)):
+        if ticker not in tickers:
+            tickers.append(ticker)
+    return tickers
+
+
+def parse_lookback_days(text: str, default: int = 30) -> int:
+    """'last 3 months' -> 90, 'past 2 weeks' -> 14; `default` if no window is mentioned."""
+    match = _LOOKBACK_RE.search(text)
+    if not match:
+        return default
+    return max(1, int(match.group(1)) * _UNIT_DAYS[match.group(2).lower()])
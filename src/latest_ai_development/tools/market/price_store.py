@@ -0,0 +1,216 @@
+"""
+Memory-mapped columnar OHLCV store.
+
+Each ticker is a directory of versions under ``PRICE_STORE_DIR`` (default
+``data/prices``). A version holds one ``.npy`` file per column, sorted by
+timestamp, and the ``current`` symlink names the live one::
+
+    data/prices/AAPL/current -> v000042-1234
+    data/prices/AAPL/v000042-1234/timestamp.npy   int64, epoch seconds (UTC)
+                                 /open.npy        float64
+                                 /high.npy ...    float64 (high, low, close, volume)
+
+Columns are opened with ``mmap_mode="r"``, so a range query is two binary
+searches over the timestamp column and returns views into the page cache:
+nothing is copied or parsed, and only the pages actually touched are read.
+A writer builds a complete new version and then swaps the symlink
+(``os.replace``), so a reader sees every column of one version or of the
+next, never a mix. Readers notice the new link target and reopen. The
+previous version is kept for readers that resolved the link just before the
+swap; older ones are deleted. A store in the flat layout (columns directly in
+the ticker directory) is read as is and converted on its next write.
+
+Load data with ``python -m latest_ai_development.tools.market.ingest_prices``.
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+PRICE_STORE_DIR = os.environ.get("PRICE_STORE_DIR", "data/prices")
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+PRICE_COLUMNS = COLUMNS[1:]
+DAY = 86400
+CURRENT = "current"
+
+
+class PriceSeries:
+    """OHLCV columns for one ticker; the arrays are read-only views into the store."""
+
+    __slots__ = ("ticker",) + COLUMNS
+
+    def __init__(self, ticker: str, columns: Dict[str, np.ndarray]):
+        self.ticker = ticker
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, index: slice) -> "PriceSeries":
+        return PriceSeries(self.ticker, {name: getattr(self, name)[index] for name in COLUMNS})
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in COLUMNS}
+
+    def summary(self) -> Dict:
+        """Small JSON-able description of the series (no per-bar data)."""
+        if len(self) == 0:
+            return {"ticker": self.ticker, "bars": 0}
+        first_close, last_close = float(self.close[0]), float(self.close[-1])
+        return {
+            "ticker": self.ticker,
+            "bars": len(self),
+            "start": format_date(int(self.timestamp[0])),
+            "end": format_date(int(self.timestamp[-1])),
+            "last_close": round(last_close, 4),
+            "change_pct": round((last_close / first_close - 1) * 100, 2) if first_close else None,
+            "high": round(float(self.high.max()), 4),
+            "low": round(float(self.low.min()), 4),
+            "avg_volume": round(float(self.volume.mean()), 1),
+        }
+
+
+def format_date(timestamp: int) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+class PriceStore:
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or PRICE_STORE_DIR)
+        # ticker -> (version, series)
+        self._open: Dict[str, tuple] = {}
+        self._link_paths: Dict[str, str] = {}
+
+    def _dir(self, ticker: str) -> Path:
+        return self.root / ticker.upper()
+
+    @staticmethod
+    def _has_data(path: Path) -> bool:
+        return (path / CURRENT).exists() or (path / "timestamp.npy").exists()
+
+    def tickers(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if self._has_data(p))
+
+    def __contains__(self, ticker: str) -> bool:
+        return self._has_data(self._dir(ticker))
+
+    def _version(self, ticker: str) -> Optional[str]:
+        """The live version of `ticker`: the ``current`` link target, or "@<mtime>" for the flat layout."""
+        link = self._link_paths.get(ticker)
+        if link is None:
+            link = self._link_paths[ticker] = str(self._dir(ticker) / CURRENT)
+        try:
+            return os.readlink(link)
+        except FileNotFoundError:
+            pass
+        try:
+            return f"@{os.stat(self._dir(ticker) / 'timestamp.npy').st_mtime_ns}"
+        except FileNotFoundError:
+            return None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.tickers())
+
+    def series(self, ticker: str) -> Optional[PriceSeries]:
+        """The full memory-mapped series for `ticker`, or None if it is not in the store."""
+        ticker = ticker.upper()
+        while True:
+            version = self._version(ticker)
+            if version is None:
+                self._open.pop(ticker, None)
+                return None
+            cached = self._open.get(ticker)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            path = self._dir(ticker) if version.startswith("@") else self._dir(ticker) / version
+            try:
+                # Every column comes from the one version the link named; plain ndarray views of
+                # the mapping, because slicing np.memmap objects is several times slower
+                columns = {name: np.asarray(np.load(path / f"{name}.npy", mmap_mode="r")) for name in COLUMNS}
+            except FileNotFoundError:
+                # Two writes landed since the link was read and pruned that version: read the new one
+                continue
+            series = PriceSeries(ticker, columns)
+            self._open[ticker] = (version, series)
+            return series
+
+    def range(self, ticker: str, start: Optional[int] = None, end: Optional[int] = None) -> Optional[PriceSeries]:
+        """Bars with ``start <= timestamp <= end`` (epoch seconds), as zero-copy views."""
+        series = self.series(ticker)
+        if series is None:
+            return None
+        return self._slice(series, start, end)
+
+    @staticmethod
+    def _slice(series: PriceSeries, start: Optional[int], end: Optional[int]) -> PriceSeries:
+        lo = 0 if start is None else int(np.searchsorted(series.timestamp, start, side="left"))
+        hi = len(series) if end is None else int(np.searchsorted(series.timestamp, end, side="right"))
+        return series[lo:hi]
+
+    def last_days(self, ticker: str, days: int, end: Optional[int] = None) -> Optional[PriceSeries]:
+        """
+        Bars in the `days` days up to `end`.
+
+        `end` defaults to the latest bar rather than now, so a store that was
+        ingested a while ago still answers "last 30 days".
+        """
+        series = self.series(ticker)
+        if series is None or len(series) == 0:
+            return series
+        end = int(series.timestamp[-1]) if end is None else end
+        return self._slice(series, end - days * DAY + 1, end)
+
+    def last_bars(self, ticker: str, count: int) -> Optional[PriceSeries]:
+        series = self.series(ticker)
+        return None if series is None else series[max(len(series) - count, 0):]
+
+    def write(self, ticker: str, columns: Dict[str, np.ndarray], merge: bool = True) -> int:
+        """
+        Store bars for `ticker`, merging with existing bars by default.
+
+        Rows are sorted by timestamp; on duplicate timestamps the new row wins.
+        Returns the number of bars stored.
+        """
+        ticker = ticker.upper()
+        new = {name: np.asarray(columns[name], dtype=np.int64 if name == "timestamp" else np.float64)
+               for name in COLUMNS}
+        existing = self.series(ticker) if merge else None
+        if existing is not None and len(existing):
+            # New rows go first so np.unique keeps them on duplicate timestamps
+            new = {name: np.concatenate([new[name], np.asarray(getattr(existing, name))]) for name in COLUMNS}
+        _, first = np.unique(new["timestamp"], return_index=True)
+        merged = {name: np.ascontiguousarray(new[name][first]) for name in COLUMNS}
+
+        path = self._dir(ticker)
+        path.mkdir(parents=True, exist_ok=True)
+        previous = self._version(ticker)
+        number = int(previous[1:].split("-")[0]) + 1 if previous and previous.startswith("v") else 1
+        version = f"v{number:06d}-{os.getpid()}"
+        # Build the whole version out of sight, then publish it with one atomic link swap
+        shutil.rmtree(path / version, ignore_errors=True)
+        (path / version).mkdir()
+        for name in COLUMNS:
+            np.save(path / version / f"{name}.npy", merged[name])
+        tmp = path / f".{CURRENT}.{os.getpid()}.tmp"
+        tmp.unlink(missing_ok=True)
+        os.symlink(version, tmp)
+        os.replace(tmp, path / CURRENT)
+        self._open.pop(ticker, None)
+        self._prune(path, keep={version, previous})
+        return len(merged["timestamp"])
+
+    @staticmethod
+    def _prune(path: Path, keep) -> None:
+        """Delete versions other than `keep`, and the columns of the flat layout."""
+        for entry in path.iterdir():
+            if entry.is_dir() and not entry.is_symlink() and entry.name.startswith("v") and entry.name not in keep:
+                shutil.rmtree(entry, ignore_errors=True)
+            elif entry.suffix == ".npy" and entry.is_file():
+                entry.unlink(missing_ok=True)
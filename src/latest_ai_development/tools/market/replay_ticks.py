@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Replay ticks from CSV onto ``market.ticks.<ticker>``.
+
+The CSV needs timestamp (or time/datetime; ISO strings or epoch seconds) and
+price columns, plus optional size/volume/qty and ticker/symbol columns. Rows are
+replayed in timestamp order; ``--speed`` scales the original gaps between
+ticks (``--speed 60`` plays an hour in a minute, ``--speed 0`` sends as fast as
+possible). The price agent aggregates them into bars and publishes live
+signals on ``market.signals``.
+
+Usage:
+    python -m latest_ai_development.tools.market.replay_ticks ticks.csv --speed 0
+    python -m latest_ai_development.tools.market.replay_ticks AAPL_ticks.csv --ticker AAPL --speed 60
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from nats.aio.client import Client as NATS
+
+from latest_ai_development.tools.market.ingest_prices import parse_timestamp
+from latest_ai_development.tools.market.streaming import tick_subject
+
+TICK_COLUMNS = {
+    "timestamp": ("timestamp", "time", "datetime", "date"),
+    "price": ("price", "last", "close"),
+    "size": ("size", "volume", "qty", "quantity"),
+    "ticker": ("ticker", "symbol"),
+}
+
+
+def read_ticks(path: str, ticker: Optional[str] = None) -> List[Dict]:
+    """Ticks from a CSV file as ``{"ticker", "price", "size", "timestamp"}``, oldest first."""
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        lowered = {name.strip().lower(): name for name in reader.fieldnames or []}
+        mapping = {column: next((lowered[a] for a in aliases if a in lowered), None)
+                   for column, aliases in TICK_COLUMNS.items()}
+        for column in ("timestamp", "price"):
+            if mapping[column] is None:
+                raise ValueError(f"{path}: missing column {column!r}; found {reader.fieldnames}")
+        default = (ticker or Path(path).stem).upper()
+        ticks = []
+        for row in reader:
+            ticks.append({
+                "ticker": (row[mapping["ticker"]] if mapping["ticker"] else default).upper(),
+                "price": float(row[mapping["price"]]),
+                "size": float(row[mapping["size"]] or 0) if mapping["size"] else 0.0,
+                "timestamp": float(parse_timestamp(row[mapping["timestamp"]])),
+            })
+    ticks.sort(key=lambda tick: tick["timestamp"])
+    return ticks
+
+
+async def replay(ticks: List[Dict], nats_url: str = "nats://localhost:4222", speed: float = 0.0) -> float:
+    """Publish `ticks`, pacing them by their timestamps divided by `speed`; returns seconds taken."""
+    nc = NATS()
+    await nc.connect(nats_url)
+    started = time.perf_counter()
+    try:
+        for i, tick in enumerate(ticks):
+            if speed > 0 and i:
+                due = (tick["timestamp"] - ticks[0]["timestamp"]) / speed
+                delay = due - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await nc.publish(tick_subject(tick["ticker"]), json.dumps(tick).encode())
+        await nc.flush()
+    finally:
+        await nc.close()
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay CSV ticks onto market.ticks.<ticker>")
+    parser.add_argument("files", nargs="+", help="CSV tick files")
+    parser.add_argument("--ticker", help="Ticker for files without a ticker/symbol column (default: file name)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier; 0 = as fast as possible")
+    parser.add_argument("--nats-url", default="nats://localhost:4222")
+    args = parser.parse_args(argv)
+
+    ticks = []
+    for path in args.files:
+        ticks.extend(read_ticks(path, args.ticker))
+    ticks.sort(key=lambda tick: tick["timestamp"])
+    if not ticks:
+        raise SystemExit("No ticks to replay")
+    tickers = len({tick["ticker"] for tick in ticks})
+    print(f"Replaying {len(ticks)} ticks for {tickers} tickers at speed {args.speed or 'max'}")
+    elapsed = asyncio.run(replay(ticks, args.nats_url, args.speed))
+    print(f"Done in {elapsed:.2f}s ({len(ticks) / elapsed:.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
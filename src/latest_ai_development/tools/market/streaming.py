@@ -0,0 +1,299 @@
+"""
+Live tick aggregation with incremental indicators.
+
+Ticks arrive on ``market.ticks.<ticker>`` as ``{"price", "size", "timestamp"}``
+and are folded into the open 1-minute and daily bar of their ticker. When a
+daily bar closes, its close advances that ticker's indicator state by one
+step: EMAs (MACD lines), Wilder averages (RSI) and running sums over a ring
+buffer of recent closes (SMAs, Bollinger mean/variance). Every update is O(1)
+regardless of history length.
+
+State is array-backed: each ticker owns one row of a few small float64
+matrices, grown by doubling, so thousands of tickers cost a few hundred KB and
+reading every ticker's signal is a handful of vectorized operations. Signals
+for a ticker whose day is still open are provisional: the current price is
+stepped through the same update without committing it.
+
+The committed values match ``indicators.compute_indicators`` over the same
+daily closes, so live and store-based scores are comparable.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from latest_ai_development.tools.market.indicators import DEFAULT_PARAMS, ranked_signals, score_signals
+from latest_ai_development.tools.market.price_store import DAY
+
+TICKS_SUBJECT = "market.ticks"
+MINUTE = 60
+# Recompute the running sums from the ring buffer every this many windows to stop float drift
+RESYNC_WINDOWS = 16
+
+_STATE_FIELDS = ("offset", "last", "ema_fast", "ema_slow", "macd_signal", "avg_gain", "avg_loss",
+                 "sum_fast", "sum_slow", "sum_bb", "sumsq_bb")
+_S = {name: i for i, name in enumerate(_STATE_FIELDS)}
+_BAR_FIELDS = ("start", "open", "high", "low", "close", "volume")
+# Column offsets of the minute and day bar in a row of TickAggregator.bars
+_INTERVALS = ((0, MINUTE, "1m"), (len(_BAR_FIELDS), DAY, "1d"))
+
+
+def tick_subject(ticker: str) -> str:
+    return f"{TICKS_SUBJECT}.{ticker.upper()}"
+
+
+def _grown(array: np.ndarray, rows: int, fill: float) -> np.ndarray:
+    grown = np.full((rows,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class IncrementalIndicators:
+    """
+    Indicator state for many tickers, one row per slot, advanced one close at a time.
+
+    Slots are small integers handed out by the caller (see TickAggregator).
+    """
+
+    def __init__(self, capacity: int = 64, **params):
+        self.params = p = {**DEFAULT_PARAMS, **params}
+        self.windows = {"fast": p["sma_fast"], "slow": p["sma_slow"], "bb": p["bb_period"]}
+        self.width = max(self.windows.values())
+        self.alphas = {
+            "ema_fast": 2.0 / (p["macd_fast"] + 1),
+            "ema_slow": 2.0 / (p["macd_slow"] + 1),
+            "macd_signal": 2.0 / (p["macd_signal"] + 1),
+            "rsi": 1.0 / p["rsi_period"],
+        }
+        self.state = np.zeros((capacity, len(_STATE_FIELDS)))
+        # Last `width` closes per slot; close number n lives at column n % width
+        self.ring = np.zeros((capacity, self.width))
+        self.count = np.zeros(capacity, dtype=np.int64)
+
+    def ensure(self, slots: int) -> None:
+        capacity = len(self.count)
+        if slots <= capacity:
+            return
+        while capacity < slots:
+            capacity *= 2
+        self.state = _grown(self.state, capacity, 0.0)
+        self.ring = _grown(self.ring, capacity, 0.0)
+        self.count = _grown(self.count, capacity, 0)
+
+    def _step(self, rows: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """State after appending `close` to each row in `rows`, without storing it."""
+        state = self.state[rows]
+        count = self.count[rows]
+        first = count == 0
+        offset = np.where(first, close, state[:, _S["offset"]])
+        delta = np.where(first, 0.0, close - state[:, _S["last"]])
+        a = self.alphas
+        new = {"offset": offset, "last": close}
+        for name in ("ema_fast", "ema_slow"):
+            new[name] = np.where(first, close, state[:, _S[name]] + a[name] * (close - state[:, _S[name]]))
+        line = new["ema_fast"] - new["ema_slow"]
+        previous = state[:, _S["macd_signal"]]
+        new["macd_signal"] = np.where(first, line, previous + a["macd_signal"] * (line - previous))
+        # Wilder smoothing seeded with the first delta (0), as in indicators._rsi
+        new["avg_gain"] = state[:, _S["avg_gain"]] + a["rsi"] * (np.maximum(delta, 0.0) - state[:, _S["avg_gain"]])
+        new["avg_loss"] = state[:, _S["avg_loss"]] + a["rsi"] * (np.maximum(-delta, 0.0) - state[:, _S["avg_loss"]])
+
+        centred = close - offset
+        for name, window in self.windows.items():
+            leaving = np.where(count >= window, self.ring[rows, (count - window) % self.width] - offset, 0.0)
+            new[f"sum_{name}"] = state[:, _S[f"sum_{name}"]] + centred - leaving
+            if name == "bb":
+                new["sumsq_bb"] = state[:, _S["sumsq_bb"]] + centred * centred - leaving * leaving
+        new["count"] = count + 1
+        return new
+
+    def update(self, slot: int, close: float) -> None:
+        """Commit one more close for `slot`."""
+        rows = np.array([slot])
+        new = self._step(rows, np.array([float(close)]))
+        row = self.state[slot]
+        for name, i in _S.items():
+            row[i] = new[name][0]
+        count = int(self.count[slot])
+        self.ring[slot, count % self.width] = close
+        self.count[slot] = count + 1
+        if (count + 1) % (self.width * RESYNC_WINDOWS) == 0:
+            self._resync(slot)
+
+    def _resync(self, slot: int) -> None:
+        count = int(self.count[slot])
+        order = (np.arange(count - self.width, count) % self.width)
+        recent = self.ring[slot, order] - self.state[slot, _S["offset"]]
+        for name, window in self.windows.items():
+            self.state[slot, _S[f"sum_{name}"]] = recent[-window:].sum()
+        self.state[slot, _S["sumsq_bb"]] = np.square(recent[-self.windows["bb"]:]).sum()
+
+    def committed(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        state = self.state[rows]
+        values = {name: state[:, i] for name, i in _S.items()}
+        values["count"] = self.count[rows]
+        return values
+
+    def values(self, state: Dict[str, np.ndarray], close: np.ndarray) -> Dict[str, np.ndarray]:
+        """Indicator values (as in compute_indicators, one entry per row) from a state."""
+        count, offset = state["count"], state["offset"]
+        windows, p = self.windows, self.params
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = {name: np.where(count >= w, state[f"sum_{name}"] / w + offset, np.nan)
+                     for name, w in windows.items()}
+            bb_mean = state["sum_bb"] / windows["bb"]
+            deviation = np.sqrt(np.maximum(state["sumsq_bb"] / windows["bb"] - bb_mean * bb_mean, 0.0))
+            deviation = np.where(count >= windows["bb"], deviation * p["bb_width"], np.nan)
+            lower = means["bb"] - deviation
+            percent_b = (close - lower) / (2.0 * deviation)
+
+            total = state["avg_gain"] + state["avg_loss"]
+            rsi = np.where(total == 0, 50.0, 100.0 * state["avg_gain"] / total)
+        line = state["ema_fast"] - state["ema_slow"]
+        return {
+            "sma_fast": means["fast"],
+            "sma_slow": means["slow"],
+            "rsi": np.where(count >= p["rsi_period"] + 1, rsi, np.nan),
+            "macd": line,
+            "macd_signal": state["macd_signal"],
+            "macd_hist": line - state["macd_signal"],
+            "bb_middle": means["bb"],
+            "bb_upper": means["bb"] + deviation,
+            "bb_lower": lower,
+            "bb_percent_b": percent_b,
+        }
+
+
+class TickAggregator:
+    """
+    Per-ticker 1-minute and daily bars built from ticks, feeding IncrementalIndicators.
+
+    ``on_tick`` and ``flush`` return the bars they closed as dicts with
+    ticker, interval ("1m" or "1d"), start and OHLCV.
+    """
+
+    def __init__(self, capacity: int = 64, **params):
+        self.indicators = IncrementalIndicators(capacity, **params)
+        self.slots: Dict[str, int] = {}
+        self.tickers: List[str] = []
+        # Open minute bar then open day bar per slot; start is NaN when no bar is open
+        self.bars = np.full((capacity, 2 * len(_BAR_FIELDS)), np.nan)
+        self.price = np.full(capacity, np.nan)
+        self.changed: set = set()
+
+    def slot(self, ticker: str) -> int:
+        slot = self.slots.get(ticker)
+        if slot is None:
+            slot = self.slots[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+            self.indicators.ensure(slot + 1)
+            if slot >= len(self.price):
+                self.bars = _grown(self.bars, len(self.indicators.count), np.nan)
+                self.price = _grown(self.price, len(self.indicators.count), np.nan)
+        return slot
+
+    def seed(self, ticker: str, closes: Iterable[float]) -> None:
+        """Prime `ticker` with completed daily closes, oldest first."""
+        self.install_seed(ticker, self.prepare_seed(closes))
+
+    def prepare_seed(self, closes: Iterable[float]) -> Dict:
+        """
+        Indicator state after `closes`, built on a scratch row. It touches no
+        shared state, so a long history can be replayed in a worker thread.
+        """
+        scratch = IncrementalIndicators(1, **self.indicators.params)
+        price = np.nan
+        for close in closes:
+            scratch.update(0, close)
+            price = close
+        return {"state": scratch.state[0], "ring": scratch.ring[0], "count": scratch.count[0], "price": price}
+
+    def install_seed(self, ticker: str, seed: Dict) -> None:
+        """Give `ticker` the state from `prepare_seed`; a few row copies."""
+        slot = self.slot(ticker)
+        indicators = self.indicators
+        indicators.state[slot] = seed["state"]
+        indicators.ring[slot] = seed["ring"]
+        indicators.count[slot] = seed["count"]
+        if seed["count"]:
+            self.price[slot] = seed["price"]
+        self.changed.add(slot)
+
+    def on_tick(self, ticker: str, price: float, size: float, timestamp: float) -> List[Dict]:
+        slot = self.slot(ticker)
+        row = self.bars[slot]
+        closed = []
+        for offset, period, interval in _INTERVALS:
+            start = timestamp - timestamp % period
+            current = row[offset]
+            if current == current and start != current:
+                if start < current:
+                    # Late tick for a bar that is already closed
+                    continue
+                closed.append(self._close_bar(slot, offset, interval))
+            if row[offset] != row[offset]:
+                row[offset:offset + len(_BAR_FIELDS)] = (start, price, price, price, price, size)
+            else:
+                if price > row[offset + 2]:
+                    row[offset + 2] = price
+                elif price < row[offset + 3]:
+                    row[offset + 3] = price
+                row[offset + 4] = price
+                row[offset + 5] += size
+        self.price[slot] = price
+        self.changed.add(slot)
+        return closed
+
+    def flush(self, now: float) -> List[Dict]:
+        """Close bars whose period ended before `now` (for tickers that went quiet)."""
+        closed = []
+        used = len(self.tickers)
+        for offset, period, interval in _INTERVALS:
+            with np.errstate(invalid="ignore"):
+                stale = np.flatnonzero(self.bars[:used, offset] + period <= now)
+            closed.extend(self._close_bar(int(slot), offset, interval) for slot in stale)
+        return closed
+
+    def _close_bar(self, slot: int, offset: int, interval: str) -> Dict:
+        row = self.bars[slot]
+        bar = {"ticker": self.tickers[slot], "interval": interval}
+        bar.update(zip(_BAR_FIELDS, row[offset:offset + len(_BAR_FIELDS)].tolist()))
+        bar["start"] = int(bar["start"])
+        row[offset] = np.nan
+        if interval == "1d":
+            self.indicators.update(slot, bar["close"])
+        return bar
+
+    def signals(self, tickers: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Ranked signals (as rank_universe) for `tickers` (default: all seen), using live prices.
+
+        Tickers with an open day bar are scored as if the day closed at the
+        current price; the others use their last committed close.
+        """
+        names = [t for t in (self.tickers if tickers is None else tickers) if t in self.slots]
+        if not names:
+            return []
+        rows = np.array([self.slots[t] for t in names])
+        indicators = self.indicators
+        close = self.price[rows]
+        live = ~np.isnan(self.bars[rows, _INTERVALS[1][0]])
+        state = indicators.committed(rows)
+        if live.any():
+            stepped = indicators._step(rows[live], close[live])
+            for name, values in stepped.items():
+                state[name] = state[name].copy()
+                state[name][live] = values
+        values = indicators.values(state, close)
+        # Rows with neither ticks nor seeded history have nothing to score
+        values = {name: np.where(state["count"] > 0, v, np.nan) for name, v in values.items()}
+        latest = {name: values[name] for name in ("rsi", "macd_hist", "bb_percent_b")}
+        latest["close"] = close
+        latest["score"] = score_signals(close[:, None], {k: v[:, None] for k, v in values.items()})[:, 0]
+        return ranked_signals(names, latest)
+
+    def take_changed(self) -> List[str]:
+        """Tickers touched since the previous call."""
+        changed = [self.tickers[slot] for slot in sorted(self.changed)]
+        self.changed.clear()
+        return changed
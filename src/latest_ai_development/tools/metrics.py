@@ -0,0 +1,311 @@
+"""
+Minimal Prometheus-style metrics for the gateway and the NATS agents.
+
+The gateway keeps a ``Registry`` of counters, gauges and histograms and serves
+``Registry.render()`` (Prometheus text exposition format) on ``/metrics``.
+
+Agents keep an ``AgentMetrics`` instance, wrap their NATS handlers with
+``@metrics.instrument`` and call ``metrics.start_publishing(nc)``; a cumulative
+snapshot (messages handled, handler latency histogram, LLM tokens) is then
+published every few seconds on ``metrics.snapshots.<service>``. The gateway
+subscribes with a ``SnapshotAggregator`` and re-exposes every agent's numbers
+under one scrape target.
+"""
+
+import asyncio
+import functools
+import json
+import math
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+METRICS_SNAPSHOT_TOPIC = "metrics.snapshots"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in (extra or {}).items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self.lock:
+            items = sorted(self.values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., sum, count]
+        self.values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Cumulative state per label set, suitable for JSON transport."""
+        with self.lock:
+            return {
+                "|".join(k): {"buckets": list(v[:-2]), "sum": v[-2], "count": v[-1]}
+                for k, v in self.values.items()
+            }
+
+    def render(self) -> List[str]:
+        with self.lock:
+            items = sorted((k, list(v)) for k, v in self.values.items())
+        lines = self.header()
+        for key, state in items:
+            lines += render_histogram_series(self.name, self.labelnames, key, self.buckets,
+                                             state[:-2], state[-2], state[-1])
+        return lines
+
+
+def render_histogram_series(name, labelnames, labelvalues, bounds, bucket_counts, total, count,
+                            extra: Optional[Dict[str, str]] = None) -> List[str]:
+    lines = []
+    for bound, bucket_count in zip(bounds, bucket_counts):
+        labels = _format_labels(labelnames, labelvalues, dict(extra or {}, le=_format_value(bound)))
+        lines.append(f"{name}_bucket{labels} {_format_value(bucket_count)}")
+    labels = _format_labels(labelnames, labelvalues, dict(extra or {}, le="+Inf"))
+    lines.append(f"{name}_bucket{labels} {_format_value(count)}")
+    plain = _format_labels(labelnames, labelvalues, extra)
+    lines.append(f"{name}_sum{plain} {_format_value(total)}")
+    lines.append(f"{name}_count{plain} {_format_value(count)}")
+    return lines
+
+
+class Registry:
+    """Holds metrics and extra collector callbacks and renders them for scraping."""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for collector in self.collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+class AgentMetrics:
+    """Per-process counters for a NATS agent, published periodically as JSON snapshots."""
+
+    def __init__(self, service: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.service = service
+        self.instance = f"{socket.gethostname()}:{os.getpid()}"
+        self.messages = Counter("messages_handled", "", ("handler",))
+        self.errors = Counter("handler_errors", "", ("handler",))
+        self.latency = Histogram("handler_latency_seconds", "", ("handler",), buckets)
+        self.llm_tokens = Counter("llm_tokens", "", ("type",))
+        self._task: Optional[asyncio.Task] = None
+
+    def instrument(self, handler):
+        """Decorator for async NATS callbacks: counts messages and errors and times the handler."""
+        name = handler.__name__
+
+        @functools.wraps(handler)
+        async def wrapper(msg):
+            started = time.perf_counter()
+            try:
+                return await handler(msg)
+            except Exception:
+                self.errors.inc(handler=name)
+                raise
+            finally:
+                self.messages.inc(handler=name)
+                self.latency.observe(time.perf_counter() - started, handler=name)
+
+        return wrapper
+
+    def record_llm_usage(self, usage) -> None:
+        """Add token counts from an OpenAI response's ``usage`` object (ignored if missing)."""
+        if usage is None:
+            return
+        self.llm_tokens.inc(getattr(usage, "prompt_tokens", 0) or 0, type="prompt")
+        self.llm_tokens.inc(getattr(usage, "completion_tokens", 0) or 0, type="completion")
+
+    def snapshot(self) -> Dict:
+        return {
+            "service": self.service,
+            "instance": self.instance,
+            "timestamp": time.time(),
+            "messages_handled": {k[0]: v for k, v in self.messages.values.items()},
+            "handler_errors": {k[0]: v for k, v in self.errors.values.items()},
+            "handler_latency": {"bounds": list(self.latency.buckets), "series": self.latency.snapshot()},
+            "llm_tokens": {k[0]: v for k, v in self.llm_tokens.values.items()},
+        }
+
+    def start_publishing(self, nc, interval: float = 5.0) -> asyncio.Task:
+        """Publish a snapshot on metrics.snapshots.<service> every `interval` seconds."""
+        async def publish_loop():
+            subject = f"{METRICS_SNAPSHOT_TOPIC}.{self.service}"
+            while True:
+                await asyncio.sleep(interval)
+                if nc.is_closed:
+                    return
+                try:
+                    await nc.publish(subject, json.dumps(self.snapshot()).encode())
+                except Exception as e:
+                    print(f"[Metrics] Failed to publish snapshot for {self.service}: {e}")
+
+        self._task = asyncio.create_task(publish_loop())
+        return self._task
+
+
+class SnapshotAggregator:
+    """Keeps the latest snapshot of every agent instance and renders them as Prometheus metrics."""
+
+    def __init__(self, stale_after: float = 60.0):
+        self.stale_after = stale_after
+        self.snapshots: Dict[Tuple[str, str], Dict] = {}
+
+    async def handle(self, msg) -> None:
+        try:
+            snapshot = json.loads(msg.data.decode())
+            self.snapshots[(snapshot["service"], snapshot["instance"])] = snapshot
+        except (ValueError, KeyError) as e:
+            print(f"[Metrics] Ignoring malformed snapshot on {msg.subject}: {e}")
+
+    async def subscribe(self, nc):
+        return await nc.subscribe(f"{METRICS_SNAPSHOT_TOPIC}.>", cb=self.handle)
+
+    def collect(self) -> List[str]:
+        now = time.time()
+        live = {k: s for k, s in self.snapshots.items() if now - s.get("timestamp", 0) <= self.stale_after}
+        names = ("service", "instance")
+        lines = [
+            "# HELP agent_up Whether a metrics snapshot was received from the agent recently",
+            "# TYPE agent_up gauge",
+        ]
+        lines += [f"agent_up{_format_labels(names, key)} 1" for key in sorted(live)]
+
+        for metric, field, help_text in [
+            ("agent_messages_handled_total", "messages_handled", "Messages handled by agent handlers"),
+            ("agent_handler_errors_total", "handler_errors", "Exceptions raised by agent handlers"),
+        ]:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for key in sorted(live):
+                for handler, value in sorted(live[key].get(field, {}).items()):
+                    labels = _format_labels(names, key, {"handler": handler})
+                    lines.append(f"{metric}{labels} {_format_value(value)}")
+
+        lines += ["# HELP agent_llm_tokens_total LLM tokens consumed by agents",
+                  "# TYPE agent_llm_tokens_total counter"]
+        for key in sorted(live):
+            for token_type, value in sorted(live[key].get("llm_tokens", {}).items()):
+                labels = _format_labels(names, key, {"type": token_type})
+                lines.append(f"agent_llm_tokens_total{labels} {_format_value(value)}")
+
+        lines += ["# HELP agent_handler_latency_seconds Agent handler latency",
+                  "# TYPE agent_handler_latency_seconds histogram"]
+        for key in sorted(live):
+            latency = live[key].get("handler_latency", {})
+            for handler, series in sorted(latency.get("series", {}).items()):
+                lines += render_histogram_series(
+                    "agent_handler_latency_seconds", names, key, latency.get("bounds", []),
+                    series["buckets"], series["sum"], series["count"], {"handler": handler}
+                )
+        return lines
@@ -0,0 +1,110 @@
+"""
+Ticker-keyed news digest cache for the stock news agent.
+
+Tasks arriving in the same minute usually ask about the same few tickers or
+sectors, so instead of one LLM call per task the news agent extracts topics
+from the task and builds (or reuses) one digest per ``(topic, time bucket)``:
+
+    NEWS_DIGEST_BUCKET    digest bucket length in seconds     (default 300)
+    NEWS_DIGEST_TTL       how long a digest is served          (default = bucket)
+    NEWS_MAX_TOPICS       topics summarized per task           (default 3)
+    NEWS_WATCHLIST        comma-separated tickers/sectors to prefetch at the
+                          start of every bucket, e.g. "AAPL,NVDA,tech"
+
+Concurrent requests for the same key share one LLM call (see
+``gateway.result_cache.ResultCache``). Tasks that mention no ticker or sector
+share the general ``market`` digest.
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from latest_ai_development.tools.gateway.result_cache import ResultCache
+from latest_ai_development.tools.market.parsing import find_tickers, find_word
+
+DIGEST_BUCKET_SECONDS = float(os.environ.get("NEWS_DIGEST_BUCKET", "300"))
+DIGEST_TTL = float(os.environ.get("NEWS_DIGEST_TTL", DIGEST_BUCKET_SECONDS))
+MAX_TOPICS = int(os.environ.get("NEWS_MAX_TOPICS", "3"))
+MARKET_TOPIC = "market"
+
+SECTOR_KEYWORDS = {
+    "tech": ("tech", "technology", "software", "semiconductor", "chip", "ai"),
+    "energy": ("energy", "oil", "gas", "renewable", "solar"),
+    "healthcare": ("healthcare", "health care", "pharma", "biotech", "medical"),
+    "financials": ("bank", "financial", "finance", "insurance"),
+    "consumer": ("retail", "consumer", "e-commerce"),
+    "industrials": ("industrial", "aerospace", "defense", "manufacturing"),
+    "crypto": ("crypto", "bitcoin", "ethereum", "blockchain"),
+}
+
+
+def extract_topics(text: str, max_topics: int = MAX_TOPICS) -> List[str]:
+    """
+    Tickers and sectors mentioned in `text`, in order of appearance.
+
+    Tickers are ``$cashtags``, upper-case symbols or well-known company names;
+    sectors are matched by keyword. Falls back to ``["market"]``.
+    """
+    found = find_tickers(text)
+    lowered = text.lower()
+    for sector, keywords in SECTOR_KEYWORDS.items():
+        positions = [p for p in (find_word(lowered, k) for k in keywords) if p >= 0]
+        if positions:
+            found.append((min(positions), sector))
+
+    topics: List[str] = []
+    for _, topic in sorted(found):
+        if topic not in topics:
+            topics.append(topic)
+    return topics[:max_topics] or [MARKET_TOPIC]
+
+
+def parse_watchlist(value: Optional[str] = None) -> List[str]:
+    value = os.environ.get("NEWS_WATCHLIST", "") if value is None else value
+    topics = []
+    for item in value.split(","):
+        item = item.strip()
+        if item:
+            topic = item.lower() if item.lower() in SECTOR_KEYWORDS or item.lower() == MARKET_TOPIC else item.upper()
+            if topic not in topics:
+                topics.append(topic)
+    return topics
+
+
+class DigestCache:
+    """Per-(topic, time bucket) digests with TTL; concurrent builds of one key are coalesced."""
+
+    def __init__(self, builder: Callable[[str], Awaitable[str]], bucket_seconds: float = DIGEST_BUCKET_SECONDS,
+                 ttl: float = DIGEST_TTL, max_entries: int = 4096):
+        self.builder = builder
+        self.bucket_seconds = bucket_seconds
+        self.cache = ResultCache(ttl=ttl, max_entries=max_entries)
+
+    def bucket(self, now: Optional[float] = None) -> int:
+        return int((time.time() if now is None else now) // self.bucket_seconds)
+
+    def key(self, topic: str, now: Optional[float] = None) -> str:
+        return f"{topic}:{self.bucket(now)}"
+
+    async def get(self, topic: str, refresh: bool = False) -> Tuple[str, str]:
+        """Return ``(digest, status)``; failed builds (``None``) are not cached."""
+        return await self.cache.get_or_run(
+            self.key(topic), lambda: self.builder(topic), bypass=refresh, cacheable=lambda d: d is not None,
+        )
+
+    async def get_many(self, topics: List[str]) -> List[Tuple[str, Optional[str], str]]:
+        """``(topic, digest, status)`` for every topic, built concurrently."""
+        results = await asyncio.gather(*(self.get(topic) for topic in topics))
+        return [(topic, digest, status) for topic, (digest, status) in zip(topics, results)]
+
+    async def prefetch_forever(self, watchlist: List[str]) -> None:
+        """Build the watchlist digests at the start of every bucket so tasks hit a warm cache."""
+        while True:
+            try:
+                await self.get_many(watchlist)
+            except Exception as e:
+                print(f"[NewsDigest] Prefetch failed: {e}")
+            next_bucket = (self.bucket() + 1) * self.bucket_seconds
+            await asyncio.sleep(max(next_bucket - time.time(), 1.0))
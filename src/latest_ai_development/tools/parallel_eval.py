@@ -0,0 +1,233 @@
+"""
+Sharded, multi-process ``train`` and ``test`` runs.
+
+``Crew.test`` and ``Crew.train`` run their iterations one after another. Here
+the iteration numbers are split into contiguous shards, one per worker
+process. Every worker builds its own crew from ``crew_factory(llm)`` (a
+picklable top-level function) and writes its own results:
+
+    test   <shard dir>/test-shard-<k>.json   scores and task times per iteration
+    train  <shard dir>/train-shard-<k>/      that shard's training_data.pkl
+
+The parent then merges them. Test scores are combined into one table
+(``test-results.json``). Training data is merged by agent position and
+evaluated once, as ``Crew.train`` does, into the trained-agents file.
+
+Workers cannot share the terminal, so parallel training uses the same
+``feedback`` text for every task instead of asking a human.
+
+``max_llm_calls`` caps LLM requests in flight across all workers with one
+``multiprocessing.Semaphore``. Every agent and the evaluator get a
+``ThrottledLLM`` that holds a slot for the duration of each call.
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from crewai.llm import LLM
+
+SHARD_DIR = os.environ.get("CREW_EVAL_SHARD_DIR", "eval_shards")
+DEFAULT_FEEDBACK = "Good. Be more specific and cite concrete, current examples."
+
+# Set in each worker by _init_worker
+_LLM_SLOTS = None
+
+
+class ThrottledLLM(LLM):
+    """An LLM whose calls each hold a slot of the shared cross-process semaphore."""
+
+    def call(self, *args, **kwargs):
+        with _LLM_SLOTS if _LLM_SLOTS is not None else nullcontext():
+            return super().call(*args, **kwargs)
+
+
+def throttled_llm(model: Optional[str] = None) -> Optional[LLM]:
+    """A ThrottledLLM for `model` (default: crewAI's default model), or None when calls are not capped."""
+    if _LLM_SLOTS is None:
+        return None
+    from crewai.utilities.llm_utils import create_llm
+
+    base = create_llm(model)
+    return ThrottledLLM(model=base.model, base_url=base.base_url, api_key=base.api_key)
+
+
+class _FixedFeedback(io.TextIOBase):
+    """Stands in for stdin: ``input()`` always reads `text`."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, size: int = -1) -> str:
+        return self.text + "\n"
+
+
+def shard_iterations(n_iterations: int, workers: int, first: int = 1) -> List[List[int]]:
+    """Split iteration numbers ``first .. first + n - 1`` into at most `workers` contiguous shards."""
+    workers = max(1, min(workers, n_iterations))
+    size, extra = divmod(n_iterations, workers)
+    shards, start = [], first
+    for k in range(workers):
+        count = size + (k < extra)
+        shards.append(list(range(start, start + count)))
+        start += count
+    return shards
+
+
+def _init_worker(slots) -> None:
+    global _LLM_SLOTS
+    _LLM_SLOTS = slots
+
+
+def _test_shard(crew_factory: Callable, iterations: List[int], eval_model: str, inputs: Dict,
+                results_file: str) -> Dict:
+    from crewai.utilities.evaluators.crew_evaluator_handler import CrewEvaluator
+    from crewai.utilities.llm_utils import create_llm
+
+    crew = crew_factory(throttled_llm())
+    evaluator = CrewEvaluator(crew, throttled_llm(eval_model) or create_llm(eval_model))
+    started = time.perf_counter()
+    for iteration in iterations:
+        evaluator.set_iteration(iteration)
+        crew.kickoff(inputs=inputs)
+    result = {
+        "iterations": {i: {"scores": evaluator.tasks_scores[i], "task_seconds": evaluator.run_execution_times[i]}
+                       for i in iterations},
+        "agents": [sorted(task.processed_by_agents) for task in crew.tasks],
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    Path(results_file).write_text(json.dumps(result, indent=2))
+    return result
+
+
+def _train_shard(crew_factory: Callable, iterations: List[int], inputs: Dict, workdir: str, feedback: str) -> Dict:
+    # training_data.pkl is relative to the working directory; keep each shard's apart
+    Path(workdir).mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir)
+    sys.stdin = _FixedFeedback(feedback)
+    crew = crew_factory(throttled_llm())
+    started = time.perf_counter()
+    # Crew.train without its final evaluation, which runs once over the merged shards
+    crew._setup_for_training("trained_agents_data.pkl")
+    for iteration in iterations:
+        crew._train_iteration = iteration
+        crew.kickoff(inputs=inputs)
+    return {
+        "agents": [[str(agent.id), agent.role] for agent in crew.agents],
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def _pool(workers: int, max_llm_calls: Optional[int]) -> ProcessPoolExecutor:
+    # spawn: crewAI starts background threads that do not survive fork
+    context = multiprocessing.get_context("spawn")
+    slots = context.Semaphore(max_llm_calls) if max_llm_calls else None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(slots,))
+
+
+def merge_test_results(shards: List[Dict]) -> Dict:
+    runs = {}
+    for shard in shards:
+        runs.update({int(i): run for i, run in shard["iterations"].items()})
+    runs = dict(sorted(runs.items()))
+    scored = [run["scores"] for run in runs.values() if run["scores"]]
+    task_averages = [sum(scores) / len(scores) for scores in zip(*scored)]
+    return {
+        "runs": runs,
+        "task_averages": task_averages,
+        "crew_average": sum(task_averages) / len(task_averages) if task_averages else None,
+        "agents": shards[0]["agents"] if shards else [],
+    }
+
+
+def render_test_results(merged: Dict, wall_seconds: float, workers: int) -> str:
+    runs = merged["runs"]
+    lines = ["Task scores (1-10, higher is better)",
+             f"{'':<10}" + "".join(f"{'Run ' + str(i):>8}" for i in runs) + f"{'Avg':>8}  Agents"]
+    for t, average in enumerate(merged["task_averages"]):
+        scores = "".join(f"{run['scores'][t]:>8.1f}" if t < len(run["scores"]) else f"{'-':>8}" for run in runs.values())
+        agents = ", ".join(merged["agents"][t]) if t < len(merged["agents"]) else ""
+        lines.append(f"{'Task ' + str(t + 1):<10}{scores}{average:>8.1f}  {agents}")
+    crew = "".join(f"{sum(r['scores']) / len(r['scores']):>8.2f}" if r["scores"] else f"{'-':>8}" for r in runs.values())
+    if merged["crew_average"] is not None:
+        lines.append(f"{'Crew':<10}{crew}{merged['crew_average']:>8.1f}")
+    times = [sum(run["task_seconds"]) for run in runs.values()]
+    lines.append(f"{'Time (s)':<10}" + "".join(f"{t:>8.0f}" for t in times)
+                 + (f"{sum(times) / len(times):>8.0f}" if times else ""))
+    lines.append(f"{len(runs)} iterations in {wall_seconds:.1f}s with {workers} workers "
+                 f"({sum(times) / wall_seconds if wall_seconds else 0:.1f}x the serial task time)")
+    return "\n".join(lines)
+
+
+def parallel_test(crew_factory: Callable, n_iterations: int, eval_model: str, inputs: Dict, workers: int,
+                  max_llm_calls: Optional[int] = None, shard_dir: str = SHARD_DIR) -> Dict:
+    """Run `n_iterations` evaluated kickoffs across `workers` processes; returns the merged scores."""
+    Path(shard_dir).mkdir(parents=True, exist_ok=True)
+    shards = shard_iterations(n_iterations, workers)
+    started = time.perf_counter()
+    with _pool(len(shards), max_llm_calls) as pool:
+        futures = [pool.submit(_test_shard, crew_factory, iterations, eval_model, inputs,
+                               str(Path(shard_dir) / f"test-shard-{k}.json"))
+                   for k, iterations in enumerate(shards)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+    merged = merge_test_results(results)
+    merged.update(workers=len(shards), wall_seconds=round(elapsed, 2))
+    (Path(shard_dir) / "test-results.json").write_text(json.dumps(merged, indent=2))
+    print(render_test_results(merged, elapsed, len(shards)))
+    return merged
+
+
+def merge_training_data(shards: List[Dict], shard_dirs: List[str], agents) -> Dict[str, Dict]:
+    """Training data of every shard keyed by the ids of `agents` (matched by position in the crew)."""
+    from crewai.utilities.constants import TRAINING_DATA_FILE
+    from crewai.utilities.training_handler import CrewTrainingHandler
+
+    merged: Dict[str, Dict] = {str(agent.id): {} for agent in agents}
+    for shard, directory in zip(shards, shard_dirs):
+        data = CrewTrainingHandler(str(Path(directory) / TRAINING_DATA_FILE)).load()
+        for position, (agent_id, _) in enumerate(shard["agents"]):
+            merged[str(agents[position].id)].update(data.get(agent_id, {}))
+    return {agent_id: iterations for agent_id, iterations in merged.items() if iterations}
+
+
+def parallel_train(crew_factory: Callable, n_iterations: int, filename: str, inputs: Dict, workers: int,
+                   max_llm_calls: Optional[int] = None, feedback: str = DEFAULT_FEEDBACK,
+                   shard_dir: str = SHARD_DIR) -> None:
+    """Collect training iterations across `workers` processes, then evaluate them once into `filename`."""
+    from crewai.utilities.constants import TRAINING_DATA_FILE
+    from crewai.utilities.evaluators.task_evaluator import TaskEvaluator
+    from crewai.utilities.training_handler import CrewTrainingHandler
+
+    shards = shard_iterations(n_iterations, workers, first=0)
+    directories = [str((Path(shard_dir) / f"train-shard-{k}").resolve()) for k in range(len(shards))]
+    started = time.perf_counter()
+    with _pool(len(shards), max_llm_calls) as pool:
+        futures = [pool.submit(_train_shard, crew_factory, iterations, inputs, directory, feedback)
+                   for iterations, directory in zip(shards, directories)]
+        results = [future.result() for future in futures]
+    print(f"Collected {n_iterations} training iterations in {time.perf_counter() - started:.1f}s "
+          f"with {len(shards)} workers")
+
+    crew = crew_factory(None)
+    for agent in crew.agents:
+        agent.interpolate_inputs(inputs)
+    training_data = merge_training_data(results, directories, crew.agents)
+    CrewTrainingHandler(TRAINING_DATA_FILE).save(training_data)
+    CrewTrainingHandler(filename).initialize_file()
+    roles = [role for _, role in results[0]["agents"]]
+    for position, agent in enumerate(crew.agents):
+        if training_data.get(str(agent.id)):
+            result = TaskEvaluator(agent).evaluate_training_data(training_data=training_data, agent_id=str(agent.id))
+            CrewTrainingHandler(filename).save_trained_data(agent_id=roles[position], trained_data=result.model_dump())
+    print(f"Trained data for {len(training_data)} agents written to {filename}")
@@ -0,0 +1,115 @@
+"""
+Run the research/report crew for many topics concurrently.
+
+Topics come from the command line and/or a file with one topic per line
+(blank lines and ``#`` comments are skipped). Each topic gets its own crew
+and writes ``<output dir>/<topic-slug>.md``. At most ``workers`` crews run
+at once: a crew spends nearly all of its time waiting on LLM calls, so they
+run in threads under an asyncio semaphore rather than in separate processes.
+
+A failed topic does not stop the others. The per-topic timings are printed
+and written to ``<output dir>/summary.json``.
+
+crewAI strips the leading "/" from a task's ``output_file`` and refuses "..",
+so the crew's reports must be named relative to the working directory:
+``crew_output_dir`` converts the output directory, or rejects one outside it.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_WORKERS = int(os.environ.get("CREW_RUN_WORKERS", "4"))
+REPORTS_DIR = os.environ.get("CREW_REPORTS_DIR", "reports")
+
+
+def load_topics(topics: Iterable[str] = (), topics_file: Optional[str] = None) -> List[str]:
+    """Topics from `topics` then `topics_file`, without duplicates, in order."""
+    found = [t.strip() for t in topics]
+    if topics_file:
+        for line in Path(topics_file).read_text().splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                found.append(line)
+    return list(dict.fromkeys(t for t in found if t))
+
+
+def topic_slug(topic: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-") or "topic"
+
+
+def crew_output_dir(output_dir: str) -> str:
+    """`output_dir` relative to the working directory; ValueError if it lies outside it."""
+    cwd = Path.cwd().resolve()
+    try:
+        return str(Path(output_dir).resolve().relative_to(cwd))
+    except ValueError:
+        raise ValueError(f"Output directory {output_dir} is outside the working directory {cwd}; "
+                         f"crewAI can only write reports below it") from None
+
+
+def report_files(topics: List[str], output_dir: str) -> Dict[str, str]:
+    """One report path per topic; slugs that collide get a numeric suffix."""
+    files, used = {}, set()
+    for topic in topics:
+        slug = base = topic_slug(topic)
+        n = 2
+        while slug in used:
+            slug, n = f"{base}-{n}", n + 1
+        used.add(slug)
+        files[topic] = str(Path(output_dir) / f"{slug}.md")
+    return files
+
+
+async def run_topics(topics: List[str], crew_factory: Callable[[str], object], workers: int = DEFAULT_WORKERS,
+                     output_dir: str = REPORTS_DIR, inputs: Optional[Dict] = None) -> List[Dict]:
+    """
+    Kick off ``crew_factory(report_file)`` for every topic, `workers` at a time.
+
+    Returns one dict per topic (in input order) with topic, report, status
+    ("ok" or "error"), seconds and, for failures, error.
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    files = report_files(topics, output_dir)
+    slots = asyncio.Semaphore(max(1, workers))
+
+    def kickoff(topic: str) -> None:
+        crew_factory(files[topic]).kickoff(inputs={**(inputs or {}), "topic": topic})
+
+    async def run_one(topic: str) -> Dict:
+        async with slots:
+            print(f"[Run] Starting {topic!r}")
+            started = time.perf_counter()
+            result = {"topic": topic, "report": files[topic], "status": "ok"}
+            try:
+                await asyncio.to_thread(kickoff, topic)
+            except Exception as e:
+                result.update(status="error", error=str(e))
+            result["seconds"] = round(time.perf_counter() - started, 2)
+            print(f"[Run] Finished {topic!r} in {result['seconds']}s ({result['status']})")
+            return result
+
+    return await asyncio.gather(*(run_one(topic) for topic in topics))
+
+
+def render_summary(results: List[Dict], wall_seconds: float, workers: int) -> str:
+    width = max([len(r["topic"]) for r in results] + [5])
+    lines = [f"{'topic':<{width}}  {'status':<6} {'seconds':>8}  report"]
+    for r in results:
+        lines.append(f"{r['topic']:<{width}}  {r['status']:<6} {r['seconds']:>8.2f}  {r['report']}")
+    busy = sum(r["seconds"] for r in results)
+    failed = sum(r["status"] != "ok" for r in results)
+    lines.append(f"{len(results)} topics ({failed} failed) in {wall_seconds:.2f}s with {workers} workers; "
+                 f"{busy:.2f}s of crew time ({busy / wall_seconds if wall_seconds else 0:.1f}x speedup)")
+    return "\n".join(lines)
+
+
+def write_summary(results: List[Dict], wall_seconds: float, workers: int, output_dir: str) -> str:
+    path = Path(output_dir) / "summary.json"
+    path.write_text(json.dumps({"workers": workers, "wall_seconds": round(wall_seconds, 2), "topics": results},
+                               indent=2))
+    return str(path)
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stub server for offline performance testing.
+
+Serves ``/v1/chat/completions`` (plain and streaming), ``/v1/embeddings`` and
+``/v1/models`` using only the standard library, so the full agent system can be
+benchmarked on one machine without network access or API costs.
+
+Point the agents at it with:
+
+    OPENAI_BASE_URL=http://localhost:8089/v1
+
+Latency distributions (milliseconds, applied before the first token):
+
+    fixed:50            always 50 ms
+    uniform:20,80       uniformly between 20 and 80 ms
+    normal:60,15        mean 60 ms, std-dev 15 ms (clipped at 0)
+    lognormal:4,0.5     exp(N(mu, sigma)) ms, a realistic long tail
+
+Canned outputs come from a JSON file holding a list of rules; the first rule
+whose ``match`` regex is found in the system + user messages wins:
+
+    [{"match": "prompt processor", "response": {"OP_CODE": "STOCK_RECOMMENDATION"}},
+     {"match": ".*", "response": "News for: $prompt"}]
+
+String responses are ``string.Template``s with ``$prompt``, ``$model`` and
+``$system``; object responses are serialized to JSON.
+
+Usage:
+    python llm_stub_server.py --port 8089 --latency lognormal:5,0.4 --tokens-per-sec 80 --error-rate 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import string
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+logger = logging.getLogger("LLMStub")
+
+DEFAULT_RULES = [
+    {
+        "match": "prompt processor",
+        "response": {
+            "OP_CODE": "STOCK_RECOMMENDATION",
+            "UserContext": {"risk_level": "medium", "investment_horizon": "short_term"},
+            "ProcessContext": {}
+        }
+    },
+    {
+        "match": ".*",
+        "response": "Markets were mixed today; tech led gains while energy lagged. (stub reply to: $prompt)"
+    }
+]
+
+EMBEDDING_DIMENSIONS = 1536
+
+
+def parse_latency(spec: str):
+    """Turn a latency spec such as 'uniform:20,80' into a sampler returning seconds."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+    samplers = {
+        "fixed": (1, lambda a: a[0]),
+        "uniform": (2, lambda a: random.uniform(a[0], a[1])),
+        "normal": (2, lambda a: max(0.0, random.gauss(a[0], a[1]))),
+        "lognormal": (2, lambda a: random.lognormvariate(a[0], a[1])),
+    }
+    if kind not in samplers or len(values) != samplers[kind][0]:
+        raise ValueError(f"Invalid latency spec '{spec}'")
+    sample = samplers[kind][1]
+    return lambda: sample(values) / 1000.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for usage accounting."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def message_text(message) -> str:
+    """A message's content as text: None (tool calls) is empty, list-of-parts content joins its text parts."""
+    content = message.get("content")
+    if content is None:
+        return ""
+    if isinstance(content, list):
+        return "\n".join(part["text"] for part in content if isinstance(part, dict) and "text" in part)
+    return str(content)
+
+
+def fake_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS):
+    """Deterministic unit-length embedding derived from the text hash."""
+    rng = random.Random(hashlib.sha256(text.encode()).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class StubConfig:
+    """Behaviour knobs shared by all request handler threads."""
+
+    def __init__(self, latency: str = "fixed:0", tokens_per_sec: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 429, rules=None):
+        self.sample_latency = parse_latency(latency)
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rules = [(re.compile(r["match"], re.IGNORECASE | re.DOTALL), r["response"])
+                      for r in (rules or DEFAULT_RULES)]
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors_injected": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def record(self, **deltas):
+        with self.lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def render(self, messages, model: str) -> str:
+        """Pick the first matching rule and render its response for these messages."""
+        system = "\n".join(message_text(m) for m in messages if m.get("role") == "system")
+        prompt = "\n".join(message_text(m) for m in messages if m.get("role") == "user")
+        haystack = f"{system}\n{prompt}"
+        for pattern, response in self.rules:
+            if pattern.search(haystack):
+                if isinstance(response, str):
+                    return string.Template(response).safe_substitute(prompt=prompt, model=model, system=system)
+                return json.dumps(response)
+        return ""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config: StubConfig = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _send_json(self, status: int, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _maybe_inject_error(self) -> bool:
+        if self.config.error_rate and random.random() < self.config.error_rate:
+            self.config.record(errors_injected=1)
+            status = self.config.error_status
+            headers = {"Retry-After": "1"} if status == 429 else None
+            self._send_json(status, {"error": {
+                "message": "Injected error from LLM stub",
+                "type": "rate_limit_error" if status == 429 else "server_error",
+                "code": str(status)
+            }}, headers)
+            return True
+        return False
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [
+                {"id": "gpt-4o-mini", "object": "model", "owned_by": "stub"},
+                {"id": "text-embedding-ada-002", "object": "model", "owned_by": "stub"}
+            ]})
+        elif self.path.rstrip("/") == "/stats":
+            with self.config.lock:
+                self._send_json(200, dict(self.config.stats))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+        self.config.record(requests=1)
+        if self._maybe_inject_error():
+            return
+
+        path = self.path.rstrip("/")
+        if path == "/v1/chat/completions":
+            self._chat_completion(request)
+        elif path == "/v1/embeddings":
+            self._embeddings(request)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _chat_completion(self, request):
+        model = request.get("model", "gpt-4o-mini")
+        messages = request.get("messages", [])
+        content = self.config.render(messages, model)
+        prompt_tokens = sum(estimate_tokens(message_text(m)) for m in messages)
+        completion_tokens = estimate_tokens(content)
+        if request.get("max_tokens"):
+            completion_tokens = min(completion_tokens, int(request["max_tokens"]))
+        self.config.record(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+        time.sleep(self.config.sample_latency())
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if request.get("stream"):
+            self._stream_completion(completion_id, created, model, content, completion_tokens)
+            return
+
+        if self.config.tokens_per_sec > 0:
+            time.sleep(completion_tokens / self.config.tokens_per_sec)
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    def _stream_completion(self, completion_id, created, model, content, completion_tokens):
+        """Send the content as server-sent events, paced at the configured token rate."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        # Split into roughly token-sized pieces (~4 characters each)
+        pieces = [content[i:i + 4] for i in range(0, len(content), 4)][:completion_tokens] or [""]
+        delay = 1.0 / self.config.tokens_per_sec if self.config.tokens_per_sec > 0 else 0.0
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for piece in pieces:
+            if delay:
+                time.sleep(delay)
+            event({"content": piece})
+        event({}, finish_reason="stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _embeddings(self, request):
+        inputs = request.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = int(request.get("dimensions") or EMBEDDING_DIMENSIONS)
+        prompt_tokens = sum(estimate_tokens(str(text)) for text in inputs)
+        self.config.record(prompt_tokens=prompt_tokens)
+        time.sleep(self.config.sample_latency())
+        self._send_json(200, {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(str(text), dimensions)}
+                for i, text in enumerate(inputs)
+            ],
+            "model": request.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}
+        })
+
+
+def create_server(host: str, port: int, config: StubConfig) -> ThreadingHTTPServer:
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible LLM stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="Latency distribution in ms: fixed:X | uniform:A,B | normal:MEAN,STD | lognormal:MU,SIGMA")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0,
+                        help="Simulated generation speed; 0 returns the whole completion at once")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=429, help="HTTP status used for injected errors")
+    parser.add_argument("--responses", help="JSON file with canned response rules")
+    args = parser.parse_args(argv)
+
+    rules = None
+    if args.responses:
+        with open(args.responses) as f:
+            rules = json.load(f)
+
+    config = StubConfig(args.latency, args.tokens_per_sec, args.error_rate, args.error_status, rules)
+    server = create_server(args.host, args.port, config)
+    logger.info(f"[LLMStub] Serving OpenAI-compatible API on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
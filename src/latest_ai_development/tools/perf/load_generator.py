@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Load generator for the NATS multi-agent pipeline.
+
+Drives ``crew.captain`` either open-loop (fixed arrival rate, independent of
+completions) or closed-loop (fixed number of in-flight tasks) and records
+end-to-end latency plus a per-stage breakdown. Stage timings are taken by
+passively observing the intermediate subjects, so the agents need no changes:
+
+    captain           crew.captain            -> agent.prompt_processor
+    prompt_processor  agent.prompt_processor  -> agent.executor
+    executor          agent.executor          -> last agent.<sub_agent> publish
+    <sub_agent>       agent.<sub_agent>       -> its response
+
+Usage:
+    python load_generator.py --mode open --rate 5 --duration 30
+    python load_generator.py --mode closed --concurrency 8 --tasks 200 --json-out report.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import re
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from nats.aio.client import Client as NATS
+
+CAPTAIN_TOPIC = "crew.captain"
+PROMPT_PROCESSOR_TOPIC = "agent.prompt_processor"
+EXECUTOR_TOPIC = "agent.executor"
+AGENT_TOPIC_PREFIX = "agent."
+CREW_RESPONSES_TOPIC = "crew.responses"
+CLIENT_REPLY_TOPIC = "client.final.results"
+
+DEFAULT_PROMPTS = [
+    "What new stocks should I buy this week?",
+    "Which tech stocks look good for a long term investment?",
+    "Give me a low risk portfolio suggestion for the next quarter.",
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+def extract_task_id(data) -> Optional[str]:
+    """Return the task_id of a pipeline message, looking through nested wrappers."""
+    while isinstance(data, dict):
+        if data.get("task_id"):
+            return data["task_id"]
+        data = data.get("original_task_data")
+    return None
+
+
+def agent_key(name: str) -> str:
+    """Normalise a sub-agent name ('StockNewsAgent' or 'stock_news_agent') to its topic suffix."""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+class TaskTrace:
+    """Timestamps observed for a single task as it moves through the pipeline."""
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.sent_at: Optional[float] = None
+        self.prompt_processor_at: Optional[float] = None
+        self.executor_at: Optional[float] = None
+        self.subagent_sent: Dict[str, float] = {}
+        self.subagent_replied: Dict[str, float] = {}
+        self.completed_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.timed_out = False
+        self.done = asyncio.Event()
+
+    def stage_latencies(self) -> Dict[str, float]:
+        """Per-stage durations in seconds for whatever stages were observed."""
+        stages = {}
+        if self.sent_at is not None and self.prompt_processor_at is not None:
+            stages["captain"] = self.prompt_processor_at - self.sent_at
+        if self.prompt_processor_at is not None and self.executor_at is not None:
+            stages["prompt_processor"] = self.executor_at - self.prompt_processor_at
+        if self.executor_at is not None and self.subagent_sent:
+            stages["executor"] = max(self.subagent_sent.values()) - self.executor_at
+        for agent, replied_at in self.subagent_replied.items():
+            sent_at = self.subagent_sent.get(agent)
+            if sent_at is not None:
+                stages[agent] = replied_at - sent_at
+        return stages
+
+
+class LoadGenerator:
+    """Publishes tasks to the Captain and correlates everything seen on the bus."""
+
+    def __init__(self, nats_url: str, prompts: List[str], timeout: float):
+        self.nats_url = nats_url
+        self.prompts = itertools.cycle(prompts)
+        self.timeout = timeout
+        self.run_id = uuid.uuid4().hex[:8]
+        self.counter = itertools.count()
+        self.traces: Dict[str, TaskTrace] = {}
+        self.nc = NATS()
+        self.pending: set = set()
+
+    async def connect(self) -> None:
+        await self.nc.connect(self.nats_url)
+        await self.nc.subscribe(f"{AGENT_TOPIC_PREFIX}>", cb=self._observe_agent_topic)
+        await self.nc.subscribe(CREW_RESPONSES_TOPIC, cb=self._observe_response)
+        await self.nc.subscribe(CLIENT_REPLY_TOPIC, cb=self._observe_response)
+
+    async def close(self) -> None:
+        await self.nc.drain()
+
+    def _trace_for(self, data) -> Optional[TaskTrace]:
+        task_id = extract_task_id(data)
+        return self.traces.get(task_id) if task_id else None
+
+    async def _observe_agent_topic(self, msg) -> None:
+        now = time.perf_counter()
+        try:
+            trace = self._trace_for(json.loads(msg.data.decode()))
+        except ValueError:
+            return
+        if trace is None:
+            return
+        if msg.subject == PROMPT_PROCESSOR_TOPIC:
+            if trace.prompt_processor_at is None:
+                trace.prompt_processor_at = now
+        elif msg.subject == EXECUTOR_TOPIC:
+            if trace.executor_at is None:
+                trace.executor_at = now
+        else:
+            # agent.<id>, or agent.<id>.<replica> for a hedged duplicate
+            agent = msg.subject[len(AGENT_TOPIC_PREFIX):].split(".")[0]
+            trace.subagent_sent.setdefault(agent, now)
+
+    async def _observe_response(self, msg) -> None:
+        now = time.perf_counter()
+        try:
+            data = json.loads(msg.data.decode())
+        except ValueError:
+            return
+        trace = self._trace_for(data)
+        if trace is None or trace.done.is_set():
+            return
+        if "aggregated_results" in data or "error" in data:
+            trace.completed_at = now
+            trace.error = data.get("error")
+            trace.done.set()
+        elif data.get("agent"):
+            trace.subagent_replied.setdefault(agent_key(data["agent"]), now)
+
+    async def send_one(self) -> TaskTrace:
+        """Publish one task and wait until it completes or times out."""
+        task_id = f"load-{self.run_id}-{next(self.counter)}"
+        trace = TaskTrace(task_id)
+        self.traces[task_id] = trace
+        task_data = {
+            "task_id": task_id,
+            "task_description": next(self.prompts),
+            "task_type": "stock_recommendation"
+        }
+        trace.sent_at = time.perf_counter()
+        try:
+            await self.nc.publish(CAPTAIN_TOPIC, json.dumps(task_data).encode())
+        except Exception as e:
+            trace.error = f"publish failed: {e}"
+            trace.done.set()
+            return trace
+        try:
+            await asyncio.wait_for(trace.done.wait(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            trace.timed_out = True
+        return trace
+
+    async def run_open_loop(self, rate: float, duration: float) -> None:
+        """Issue tasks at a fixed rate regardless of how fast they complete."""
+        interval = 1.0 / rate
+        start = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - start < duration:
+            task = asyncio.create_task(self.send_one())
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+            sent += 1
+            # Schedule against the start time so publish jitter does not accumulate
+            await asyncio.sleep(max(0.0, start + sent * interval - time.perf_counter()))
+        if self.pending:
+            await asyncio.gather(*self.pending)
+
+    async def run_closed_loop(self, concurrency: int, total: Optional[int], duration: Optional[float]) -> None:
+        """Keep exactly `concurrency` tasks in flight until the task or time budget is spent."""
+        start = time.perf_counter()
+        remaining = itertools.count() if total is None else iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                if duration is not None and time.perf_counter() - start >= duration:
+                    return
+                await self.send_one()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def summarize(traces: List[TaskTrace], wall_time: float) -> Dict:
+    """Build the JSON report from the collected traces."""
+    completed = [t for t in traces if t.completed_at is not None and not t.error]
+    errors = [t for t in traces if t.error]
+    timeouts = [t for t in traces if t.timed_out]
+
+    def stats(values: List[float]) -> Dict:
+        values = sorted(values)
+        result = {"count": len(values)}
+        for q in PERCENTILES:
+            p = percentile(values, q)
+            result[f"p{q}_ms"] = round(p * 1000, 2) if p is not None else None
+        result["max_ms"] = round(values[-1] * 1000, 2) if values else None
+        return result
+
+    stage_values: Dict[str, List[float]] = {}
+    for trace in completed:
+        for stage, value in trace.stage_latencies().items():
+            stage_values.setdefault(stage, []).append(value)
+
+    # Fixed pipeline stages first, then sub-agents alphabetically
+    ordered = ["captain", "prompt_processor", "executor"]
+    ordered += sorted(s for s in stage_values if s not in ordered)
+
+    return {
+        "sent": len(traces),
+        "completed": len(completed),
+        "errors": len(errors),
+        "timeouts": len(timeouts),
+        "wall_time_s": round(wall_time, 3),
+        "throughput_tps": round(len(completed) / wall_time, 3) if wall_time > 0 else 0.0,
+        "end_to_end": stats([t.completed_at - t.sent_at for t in completed]),
+        "stages": {stage: stats(stage_values[stage]) for stage in ordered if stage in stage_values},
+        "error_samples": sorted({t.error for t in errors})[:5],
+    }
+
+
+def render_table(report: Dict) -> str:
+    """Render the report as a plain-text table for the terminal."""
+    header = f"{'stage':<24}{'count':>8}" + "".join(f"{f'p{q} ms':>12}" for q in PERCENTILES) + f"{'max ms':>12}"
+    lines = [
+        f"sent={report['sent']} completed={report['completed']} errors={report['errors']} "
+        f"timeouts={report['timeouts']} wall={report['wall_time_s']}s "
+        f"throughput={report['throughput_tps']} tasks/s",
+        "",
+        header,
+        "-" * len(header),
+    ]
+    rows = [("end_to_end", report["end_to_end"])] + list(report["stages"].items())
+    for name, s in rows:
+        cells = "".join(
+            f"{s[key]:>12.2f}" if s[key] is not None else f"{'-':>12}"
+            for key in [f"p{q}_ms" for q in PERCENTILES] + ["max_ms"]
+        )
+        lines.append(f"{name:<24}{s['count']:>8}{cells}")
+    return "\n".join(lines)
+
+
+def load_prompts(path: Optional[str]) -> List[str]:
+    if not path:
+        return DEFAULT_PROMPTS
+    with open(path) as f:
+        prompts = [line.strip() for line in f if line.strip()]
+    if not prompts:
+        raise ValueError(f"No prompts found in {path}")
+    return prompts
+
+
+async def main_async(args) -> Dict:
+    generator = LoadGenerator(args.nats_url, load_prompts(args.prompts), args.timeout)
+    await generator.connect()
+    start = time.perf_counter()
+    try:
+        if args.mode == "open":
+            await generator.run_open_loop(args.rate, args.duration)
+        else:
+            await generator.run_closed_loop(args.concurrency, args.tasks, args.duration)
+    finally:
+        wall_time = time.perf_counter() - start
+        await generator.close()
+    return summarize(list(generator.traces.values()), wall_time)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for the crew.captain pipeline")
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed",
+                        help="open: fixed arrival rate; closed: fixed concurrency")
+    parser.add_argument("--rate", type=float, default=1.0, help="Tasks per second (open loop)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Tasks in flight (closed loop)")
+    parser.add_argument("--duration", type=float, default=None, help="Run time in seconds")
+    parser.add_argument("--tasks", type=int, default=None, help="Total tasks to send (closed loop)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-task timeout in seconds")
+    parser.add_argument("--prompts", help="File with one prompt per line")
+    parser.add_argument("--nats-url", default="nats://localhost:4222")
+    parser.add_argument("--json-out", help="Write the JSON report to this file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    if args.mode == "open" and args.duration is None:
+        parser.error("--duration is required in open-loop mode")
+    if args.mode == "closed" and args.tasks is None and args.duration is None:
+        parser.error("closed-loop mode needs --tasks and/or --duration")
+    if args.rate <= 0 or args.concurrency <= 0:
+        parser.error("--rate and --concurrency must be positive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(main_async(args))
+    print(render_table(report))
+    if args.json_out == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[LoadGen] JSON report written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
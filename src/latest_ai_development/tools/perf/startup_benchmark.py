@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark how fast each agent process starts.
+
+For every service the orchestrator runs, two numbers are measured:
+
+- import time: ``python -X importtime -c "import <module>"``, the cumulative
+  time of the service module, plus the packages that cost the most and any of
+  ``HEAVY_MODULES`` that got imported. Heavy clients (openai, chromadb,
+  crewai, litellm) must be imported on first use, not at import time.
+- time to first subscription: the service script is started as
+  ``monitor_services`` would restart it, and timed until it prints its
+  "listening" line, which every agent does right after subscribing. This
+  needs a NATS server on localhost:4222.
+
+Budgets (best of ``--repeat`` runs), enforced by ``tests/test_startup.py``:
+
+    STARTUP_IMPORT_BUDGET_MS      per-service import time        (default 1000)
+    STARTUP_SUBSCRIBE_BUDGET_MS   per-service time to subscribe  (default 3000)
+
+Usage:
+    python startup_benchmark.py
+    python startup_benchmark.py --services executor stock_news --repeat 5 --no-subscribe
+    python startup_benchmark.py --check --json-out startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+SRC_PATH = PROJECT_ROOT / "src"
+
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "1000"))
+SUBSCRIBE_BUDGET_MS = float(os.environ.get("STARTUP_SUBSCRIBE_BUDGET_MS", "3000"))
+
+# Service name -> module, as started by orchestrator.py
+SERVICES = {
+    "captain": "latest_ai_development.tools.captain.captain_agent",
+    "prompt_processor": "latest_ai_development.tools.captain.prompt_processor_subagent",
+    "executor": "latest_ai_development.tools.agent_registry.executor_subagent",
+    "stock_news": "latest_ai_development.tools.sub_agents.stock_news_agent",
+    "stock_price": "latest_ai_development.tools.sub_agents.stock_price_agent",
+    "price_predictor": "latest_ai_development.tools.sub_agents.price_predictor_agent",
+}
+
+HEAVY_MODULES = ("openai", "chromadb", "crewai", "litellm")
+READY_LINE = re.compile(r"listening|is running", re.IGNORECASE)
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def service_env() -> Dict[str, str]:
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(SRC_PATH)
+    env["PYTHONUNBUFFERED"] = "1"
+    return env
+
+
+def parse_importtime(stderr: str, module: str, top: int = 5) -> Dict:
+    """Total milliseconds of `module`, its costliest top-level packages, and heavy modules loaded."""
+    total_us, self_us, loaded = 0, Counter(), set()
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, name = match.groups()
+        loaded.add(name)
+        self_us[name.split(".")[0]] += int(own)
+        if name == module and not indent:
+            total_us = int(cumulative)
+    return {
+        "import_ms": total_us / 1000,
+        "top_packages": {name: us / 1000 for name, us in self_us.most_common(top)},
+        "heavy_modules": [name for name in HEAVY_MODULES if name in loaded],
+    }
+
+
+def import_profile(module: str) -> Dict:
+    """Import `module` in a fresh interpreter with ``-X importtime``."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PROJECT_ROOT, env=service_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr, module)
+
+
+def time_to_subscription(module: str, timeout: float = 30.0) -> Optional[float]:
+    """Milliseconds from starting the service script to its "listening" line, or None if it never got there."""
+    script = SRC_PATH / (module.replace(".", "/") + ".py")
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, str(script)], cwd=PROJECT_ROOT, env=service_env(),
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    ready = threading.Event()
+    elapsed: List[float] = []
+
+    def read_output():
+        for line in process.stdout:
+            if not ready.is_set() and READY_LINE.search(line):
+                elapsed.append((time.perf_counter() - started) * 1000)
+                ready.set()
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+    try:
+        ready.wait(timeout)
+    finally:
+        process.terminate()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return elapsed[0] if elapsed else None
+
+
+def benchmark(services: List[str], repeat: int = 3, subscribe: bool = True) -> Dict[str, Dict]:
+    """Best-of-`repeat` startup numbers per service."""
+    report = {}
+    for name in services:
+        module = SERVICES[name]
+        profiles = [import_profile(module) for _ in range(repeat)]
+        entry = min(profiles, key=lambda profile: profile["import_ms"])
+        if subscribe:
+            timings = [time_to_subscription(module) for _ in range(repeat)]
+            timings = [t for t in timings if t is not None]
+            entry["subscribe_ms"] = min(timings) if timings else None
+        report[name] = entry
+    return report
+
+
+def over_budget(report: Dict[str, Dict], import_budget: float = IMPORT_BUDGET_MS,
+                subscribe_budget: float = SUBSCRIBE_BUDGET_MS) -> List[str]:
+    """One line per broken budget or heavy module imported at startup."""
+    problems = []
+    for name, entry in report.items():
+        if entry["import_ms"] > import_budget:
+            problems.append(f"{name}: imports in {entry['import_ms']:.0f} ms (budget {import_budget:.0f} ms)")
+        if entry["heavy_modules"]:
+            problems.append(f"{name}: imports {', '.join(entry['heavy_modules'])} at startup")
+        if "subscribe_ms" in entry:
+            if entry["subscribe_ms"] is None:
+                problems.append(f"{name}: never subscribed")
+            elif entry["subscribe_ms"] > subscribe_budget:
+                problems.append(f"{name}: subscribed after {entry['subscribe_ms']:.0f} ms "
+                                f"(budget {subscribe_budget:.0f} ms)")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark agent import time and time to first subscription")
+    parser.add_argument("--services", nargs="+", choices=sorted(SERVICES), default=list(SERVICES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-subscribe", action="store_true", help="Only measure imports (no NATS needed)")
+    parser.add_argument("--json-out", help="Write the report as JSON")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a budget is exceeded")
+    args = parser.parse_args(argv)
+
+    report = benchmark(args.services, args.repeat, subscribe=not args.no_subscribe)
+    print(f"{'service':<18}{'import ms':>10}{'subscribe ms':>14}  top packages (self ms)")
+    for name, entry in report.items():
+        subscribe = entry.get("subscribe_ms")
+        subscribe = "-" if subscribe is None else f"{subscribe:.0f}"
+        top = ", ".join(f"{package} {ms:.0f}" for package, ms in entry["top_packages"].items())
+        print(f"{name:<18}{entry['import_ms']:>10.0f}{subscribe:>14}  {top}")
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2))
+
+    problems = over_budget(report)
+    for problem in problems:
+        print(f"OVER BUDGET {problem}")
+    if args.check and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
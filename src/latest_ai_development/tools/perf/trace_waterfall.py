@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Render a waterfall of the spans recorded for one task.
+
+Reads the OTLP/JSON lines written by ``tools/tracing.py`` (TRACE_EXPORT_FILE)
+and prints every span of the traces that touched the given task_id, nested by
+parent and drawn against a shared time axis.
+
+Usage:
+    python trace_waterfall.py traces.jsonl task-0002
+    python trace_waterfall.py traces.jsonl task-0002 --width 80
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+
+def _attribute_value(value: Dict):
+    for key in ("stringValue", "intValue", "doubleValue", "boolValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def load_spans(path: str) -> List[Dict]:
+    """Flatten every span in the export file, tagging each with its service name."""
+    spans = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            request = json.loads(line)
+            for resource_spans in request.get("resourceSpans", []):
+                resource = {
+                    a["key"]: _attribute_value(a["value"])
+                    for a in resource_spans.get("resource", {}).get("attributes", [])
+                }
+                service = resource.get("service.name", "unknown")
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for span in scope_spans.get("spans", []):
+                        spans.append({
+                            "service": service,
+                            "trace_id": span["traceId"],
+                            "span_id": span["spanId"],
+                            "parent_span_id": span.get("parentSpanId"),
+                            "name": span["name"],
+                            "start": int(span["startTimeUnixNano"]),
+                            "end": int(span["endTimeUnixNano"]),
+                            "error": span.get("status", {}).get("code") == 2,
+                            "attributes": {
+                                a["key"]: _attribute_value(a["value"]) for a in span.get("attributes", [])
+                            },
+                        })
+    return spans
+
+
+def spans_for_task(spans: List[Dict], task_id: str) -> List[Dict]:
+    """All spans belonging to any trace that carries the task_id."""
+    trace_ids = {s["trace_id"] for s in spans if s["attributes"].get("task_id") == task_id}
+    return [s for s in spans if s["trace_id"] in trace_ids]
+
+
+def render_waterfall(spans: List[Dict], width: int = 60) -> str:
+    if not spans:
+        return "No spans found."
+    t0 = min(s["start"] for s in spans)
+    total = max(max(s["end"] for s in spans) - t0, 1)
+    by_id = {s["span_id"]: s for s in spans}
+    children: Dict[str, List[Dict]] = {}
+    roots = []
+    for span in sorted(spans, key=lambda s: s["start"]):
+        parent = span["parent_span_id"]
+        if parent and parent in by_id:
+            children.setdefault(parent, []).append(span)
+        else:
+            roots.append(span)
+
+    label_width = 52
+    lines = [f"{'span':<{label_width}}{'start ms':>10}{'dur ms':>10}{'bus ms':>8}  timeline ({total / 1e6:.1f} ms)"]
+
+    def walk(span: Dict, depth: int) -> None:
+        offset = (span["start"] - t0) / total
+        length = (span["end"] - span["start"]) / total
+        bar_start = int(offset * width)
+        bar_len = max(1, int(round(length * width)))
+        bar = " " * bar_start + ("!" if span["error"] else "█") * bar_len
+        label = f"{'  ' * depth}{span['service']}: {span['name']}"
+        # Time the message spent on the bus before this span started
+        queue_ms = span["attributes"].get("messaging.queue_time_ms")
+        bus = f"{float(queue_ms):>8.1f}" if queue_ms is not None else f"{'':>8}"
+        lines.append(
+            f"{label[:label_width]:<{label_width}}"
+            f"{(span['start'] - t0) / 1e6:>10.1f}{(span['end'] - span['start']) / 1e6:>10.1f}{bus}  |{bar:<{width}}|"
+        )
+        for child in children.get(span["span_id"], []):
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a trace waterfall for a task_id")
+    parser.add_argument("trace_file", help="OTLP/JSON lines file written via TRACE_EXPORT_FILE")
+    parser.add_argument("task_id")
+    parser.add_argument("--width", type=int, default=60, help="Width of the timeline in characters")
+    args = parser.parse_args(argv)
+
+    spans = spans_for_task(load_spans(args.trace_file), args.task_id)
+    if not spans:
+        print(f"No spans found for task_id {args.task_id}")
+        sys.exit(1)
+    print(render_waterfall(spans, args.width))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,26 @@
 import asyncio
 import json
+import os
+import time
 from nats.aio.client import Client as NATS
+from latest_ai_development.tools.market.indicators import close_matrix, rank_universe, warmup_bars
+from latest_ai_development.tools.market.parsing import extract_task_field, extract_tickers
+from latest_ai_development.tools.market.price_store import PriceStore
+from latest_ai_development.tools.hedging import subscribe_agent
+from latest_ai_development.tools.metrics import AgentMetrics
+from latest_ai_development.tools.tracing import Tracer
 
 PRICE_PREDICTOR_TOPIC = "agent.price_predictor_agent"
 CREW_RESPONSES_TOPIC = "crew.responses"
+# Comma-separated tickers scored when the task names none (default: every ticker in the price store)
+UNIVERSE = [t for t in os.environ.get("PREDICTOR_UNIVERSE", "").split(",") if t]
+TOP_N = 5
+# Live signals published by the price agent from market ticks
+SIGNALS_SUBJECT = "market.signals"
+LIVE_SIGNAL_MAX_AGE = float(os.environ.get("PREDICTOR_LIVE_MAX_AGE", "900"))
+
+tracer = Tracer("price_predictor_agent")
+metrics = AgentMetrics("price_predictor_agent")
 
 def extract_task_id(data):
     try:
@@ -16,25 +33,75 @@ def extract_task_id(data):
     except Exception:
         return "no-id"
 
+def _rank_key(signal):
+    strength = signal["macd_hist"] / signal["close"] if signal["close"] else 0.0
+    return (-signal["score"], -strength)
+
+def predict(store, task_description, live=None, now=None):
+    """
+    Rank the requested tickers (or the whole universe) by indicator signal.
+
+    `live` maps tickers to signals received from the tick stream; fresh ones are
+    used as they are and only the remaining tickers are scored from the store.
+    """
+    live = live or {}
+    now = time.time() if now is None else now
+    fresh = {t: s for t, s in live.items() if now - s["received"] <= LIVE_SIGNAL_MAX_AGE}
+    tickers = extract_tickers(task_description) or UNIVERSE or sorted(set(store.tickers()) | set(fresh))
+    stored = [t for t in tickers if t not in fresh]
+    found, _, close = close_matrix(store, stored, warmup_bars())
+    ranked = rank_universe(found, close) if found else []
+    ranked.extend({k: v for k, v in fresh[t].items() if k != "received"} for t in tickers if t in fresh)
+    ranked.sort(key=_rank_key)
+    buys = [r["ticker"] for r in ranked if r["signal"] == "buy"][:TOP_N]
+    sells = [r["ticker"] for r in reversed(ranked) if r["signal"] == "sell"][:TOP_N]
+
+    if not ranked:
+        info = "No price history available to score."
+    else:
+        parts = [f"Buy {', '.join(buys)}" if buys else "No buy signals"]
+        if sells:
+            parts.append(f"Sell {', '.join(sells)}")
+        info = "; ".join(parts) + f" (scored {len(ranked)} tickers)"
+    return {"info": info, "signals": ranked[:TOP_N] + [r for r in ranked[TOP_N:] if r["ticker"] in sells]}
+
+def predict_task(store, task_data, live=None, now=None):
+    """`predict` for a task as the executor forwards it, with the prompt a few envelopes down."""
+    return predict(store, extract_task_field(task_data, "task_description", ""), live, now)
+
 async def price_predictor_agent():
     nc = NATS()
     await nc.connect("nats://localhost:4222")
+    metrics.start_publishing(nc)
+    store = PriceStore()
+    live_signals = {}
+
+    async def signals_handler(msg):
+        received = time.time()
+        for signal in json.loads(msg.data.decode()).get("signals", []):
+            live_signals[signal["ticker"]] = {**signal, "received": received, "live": True}
 
+    @metrics.instrument
     async def predictor_handler(msg):
         data = json.loads(msg.data.decode())
         task_id = extract_task_id(data)
         print(f"[PricePredictorAgent] Received: {data}")
+        span = tracer.start_message_span(msg, task_id=task_id)
 
-        # Simulate AI-driven stock recommendation
+        # Large universes take a few hundred ms to score; keep the event loop free meanwhile
+        prediction = await asyncio.to_thread(predict_task, store, data, dict(live_signals))
         result = {
             "task_id": task_id,
             "agent": "PricePredictorAgent",
-            "info": "Buy TSLA, NVDA, AAPL"
+            "info": prediction["info"],
+            "signals": prediction["signals"],
         }
 
-        await nc.publish(CREW_RESPONSES_TOPIC, json.dumps(result).encode())
+        await nc.publish(CREW_RESPONSES_TOPIC, json.dumps(result).encode(), headers=span.headers())
+        span.end()
 
-    await nc.subscribe(PRICE_PREDICTOR_TOPIC, cb=predictor_handler)
+    await nc.subscribe(SIGNALS_SUBJECT, cb=signals_handler)
+    await subscribe_agent(nc, metrics, predictor_handler)
     print("[PricePredictorAgent] Listening for tasks...")
     await asyncio.Future()
 
@@ -1,41 +1,91 @@
 import asyncio
 import json
 from nats.aio.client import Client as NATS
-from openai import OpenAI
-import os
+from latest_ai_development.tools.claim_check import open_claim_check
+from latest_ai_development.tools.conversation_memory import history_text
+from latest_ai_development.tools.hedging import subscribe_agent
+from latest_ai_development.tools.llm import lazy_openai_client
+from latest_ai_development.tools.market.parsing import extract_task_field
+from latest_ai_development.tools.metrics import AgentMetrics
+from latest_ai_development.tools.news_digest import MARKET_TOPIC, DigestCache, extract_topics, parse_watchlist
+from latest_ai_development.tools.tracing import SpanKind, Tracer
+
+CREW_RESPONSES_TOPIC = "crew.responses"
+
+client = lazy_openai_client()
+tracer = Tracer("stock_news_agent")
+metrics = AgentMetrics("stock_news_agent")
+
+
+async def build_digest(topic):
+    """One LLM call summarizing current news for a ticker, sector or the whole market."""
+    subject = "the overall stock market" if topic == "market" else topic
+    prompt = f"Provide a brief stock market news summary about {subject}. Keep it short and relevant."
+    llm_span = tracer.start_span("openai.chat.completions", kind=SpanKind.CLIENT,
+                                 attributes={"llm.model": "gpt-4o-mini", "news.topic": topic})
+    try:
+        # Off the event loop, so other tasks can join this build while it runs
+        response = await asyncio.to_thread(
+            client.chat.completions.create,
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You provide stock market news summaries."},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=100,
+            temperature=0.5,
+        )
+        metrics.record_llm_usage(response.usage)
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"[StockNewsAgent] OpenAI API error: {e}")
+        llm_span.record_error(e)
+        return None
+    finally:
+        llm_span.end()
+
+
+digests = DigestCache(build_digest)
+
+
+def task_topics(task_data):
+    """The tickers, sectors or market the task asks about."""
+    topics = extract_topics(extract_task_field(task_data, "task_description", ""))
+    if topics == [MARKET_TOPIC]:
+        # A follow-up ("any news on those?") is about what the conversation was about
+        earlier = history_text(task_data.get("ProcessContext") or {})
+        if earlier:
+            topics = extract_topics(earlier)
+    return topics
 
-api_key = os.environ.get("OPENAI_API_KEY")
-if not api_key:
-    raise EnvironmentError("Missing OPENAI_API_KEY environment variable.")
 
-client = OpenAI(api_key=api_key)
 async def stock_news_agent():
     nc = NATS()
     await nc.connect("nats://localhost:4222")
+    metrics.start_publishing(nc)
 
+    claims = await open_claim_check(nc)
+    claims.start_gc()
+    watchlist = parse_watchlist()
+    if watchlist:
+        asyncio.create_task(digests.prefetch_forever(watchlist))
+        print(f"[StockNewsAgent] Prefetching digests for {', '.join(watchlist)}")
+
+    @metrics.instrument
     async def stock_news_handler(msg):
         task_data = json.loads(msg.data.decode())
         task_id = task_data.get("task_id")
-        task_description = task_data.get("original_task_data", {}).get("task_description", "")
 
         print(f"[StockNewsAgent] Received: {task_data}")
+        span = tracer.start_message_span(msg, task_id=task_id)
+
+        topics = task_topics(task_data)
+        found = await digests.get_many(topics)
+        span.set_attribute("news.topics", ",".join(topics))
+        span.set_attribute("news.cache", ",".join(status for _, _, status in found))
 
-        prompt = f"Provide a brief stock market news summary relevant to this user prompt: '{task_description}'. Keep it short and relevant."
-
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You provide stock market news summaries."},
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=100,
-                temperature=0.5,
-            )
-            news_summary = response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"[StockNewsAgent] OpenAI API error: {e}")
-            news_summary = "Could not retrieve stock news at this time."
+        summaries = [digest if len(found) == 1 else f"{topic}: {digest}" for topic, digest, _ in found if digest]
+        news_summary = "\n".join(summaries) or "Could not retrieve stock news at this time."
 
         result = {
             "task_id": task_id,
@@ -43,11 +93,16 @@ async def stock_news_agent():
             "info": news_summary,
         }
 
-        await nc.publish("client.final.results", json.dumps(result).encode())
+        payload = json.dumps(result).encode()
+        payload = await claims.check_in(payload, task_id, result["agent"]) or payload
+        await nc.publish(CREW_RESPONSES_TOPIC, payload, headers=span.headers())
+        span.end()
         print(f"[StockNewsAgent] Published result for task_id {task_id}")
 
-    await nc.subscribe("agent.stock_news_agent", cb=stock_news_handler)
+    await subscribe_agent(nc, metrics, stock_news_handler)
     print("[StockNewsAgent] Listening for tasks...")
+    # Subscribed first; the OpenAI client is built while waiting for the first task
+    asyncio.create_task(asyncio.to_thread(client.warm_up))
 
     await asyncio.Future()
 
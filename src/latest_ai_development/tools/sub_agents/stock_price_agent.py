@@ -1,9 +1,31 @@
 import asyncio
 import json
+import os
+import time
+import numpy as np
 from nats.aio.client import Client as NATS
+from latest_ai_development.tools import columnar
+from latest_ai_development.tools.claim_check import open_claim_check
+from latest_ai_development.tools.market.indicators import warmup_bars
+from latest_ai_development.tools.market.parsing import extract_task_field, extract_tickers, parse_lookback_days
+from latest_ai_development.tools.market.price_store import COLUMNS, DAY, PriceStore
+from latest_ai_development.tools.market.streaming import TICKS_SUBJECT, TickAggregator
+from latest_ai_development.tools.hedging import subscribe_agent
+from latest_ai_development.tools.metrics import AgentMetrics
+from latest_ai_development.tools.tracing import Tracer
 
 STOCK_PRICE_TOPIC = "agent.stock_price_agent"
 CREW_RESPONSES_TOPIC = "crew.responses"
+# Tickers reported when the task does not mention any
+DEFAULT_TICKERS = os.environ.get("PRICE_DEFAULT_TICKERS", "AAPL,MSFT,NVDA,TSLA").split(",")
+MAX_TICKERS = 20
+# Live ticks in, closed minute bars and changed signals out
+MINUTE_BARS_SUBJECT = "market.bars.1m"
+SIGNALS_SUBJECT = "market.signals"
+SIGNAL_INTERVAL = float(os.environ.get("PRICE_SIGNAL_INTERVAL", "1.0"))
+
+tracer = Tracer("stock_price_agent")
+metrics = AgentMetrics("stock_price_agent")
 
 def extract_task_id(data):
     try:
@@ -16,25 +38,138 @@ def extract_task_id(data):
     except Exception:
         return "no-id"
 
+def format_change(change_pct):
+    """A summary's percentage change; None when the first close was 0."""
+    return "n/a" if change_pct is None else f"{change_pct:+.2f}%"
+
+def price_history(store, task_description):
+    """Answer "last N days for these tickers" from the local price store."""
+    tickers = extract_tickers(task_description)[:MAX_TICKERS] or DEFAULT_TICKERS
+    days = parse_lookback_days(task_description)
+    summaries, missing = [], []
+    for ticker in tickers:
+        series = store.last_days(ticker, days)
+        if series is None:
+            missing.append(ticker)
+        else:
+            summaries.append(series.summary())
+
+    lines = [
+        f"{s['ticker']}: {s['bars']} bars {s['start']} to {s['end']}, close {s['last_close']} "
+        f"({format_change(s['change_pct'])}), range {s['low']}-{s['high']}"
+        for s in summaries if s["bars"]
+    ]
+    if missing:
+        lines.append(f"No price history for {', '.join(missing)}")
+    return {"days": days, "series": summaries, "info": "\n".join(lines) or "No price history available."}
+
+def history_arrays(store, history):
+    """Per-bar columns of every series in `history`, named "<ticker>.<column>", as store views."""
+    arrays = {}
+    for summary in history["series"]:
+        series = store.last_days(summary["ticker"], history["days"])
+        for name, column in series.columns().items():
+            arrays[f"{summary['ticker']}.{name}"] = column
+    return arrays
+
+def seed_ticker(aggregator, store, ticker, timestamp):
+    """
+    Indicator state for a newly seen ticker, from the stored daily closes before
+    the tick's day. Pure, so it runs in a thread; install it with ``install_seed``.
+    """
+    history = store.range(ticker, end=int(timestamp - timestamp % DAY) - 1)
+    closes = history.close[-warmup_bars():] if history is not None else []
+    return aggregator.prepare_seed(closes)
+
+def tick_timestamp(tick, market_clock, now=None):
+    """A tick's own timestamp, else market time, else (before any timestamped tick) wall time."""
+    if tick.get("timestamp") is not None:
+        return float(tick["timestamp"])
+    return market_clock or (time.time() if now is None else now)
+
+def daily_bar_columns(bar):
+    return {name: np.array([bar["start"] if name == "timestamp" else bar[name]]) for name in COLUMNS}
+
 async def stock_price_agent():
     nc = NATS()
     await nc.connect("nats://localhost:4222")
+    metrics.start_publishing(nc)
+    store = PriceStore()
+    claims = await open_claim_check(nc)
+    claims.start_gc()
 
+    @metrics.instrument
     async def price_handler(msg):
         data = json.loads(msg.data.decode())
         task_id = extract_task_id(data)
         print(f"[StockPriceAgent] Received: {data}")
+        span = tracer.start_message_span(msg, task_id=task_id)
 
-        # Simulate retrieving historical price data
+        task_description = extract_task_field(data, "task_description", "")
+        history = price_history(store, task_description)
+        span.set_attribute("price.tickers", len(history["series"]))
         result = {
             "task_id": task_id,
             "agent": "StockPriceAgent",
-            "info": "Historical price data retrieved..."
+            "info": history["info"],
+            "days": history["days"],
+            "series": history["series"],
         }
 
-        await nc.publish(CREW_RESPONSES_TOPIC, json.dumps(result).encode())
+        encoding = extract_task_field(data, "result_encoding", "json")
+        if encoding == columnar.RESULT_ENCODING:
+            # Full bars as raw little-endian blocks; the executor forwards them undecoded
+            payload = columnar.encode(result, history_arrays(store, history))
+            headers = columnar.frame_headers(task_id, result["agent"], span.headers())
+        else:
+            payload, headers = json.dumps(result).encode(), span.headers()
+        stub = await claims.check_in(payload, task_id, result["agent"], encoding)
+        if stub:
+            span.set_attribute("claim_check.bytes", len(payload))
+            payload, headers = stub, span.headers()
+        span.set_attribute("payload.bytes", len(payload))
+        await nc.publish(CREW_RESPONSES_TOPIC, payload, headers=headers)
+        span.end()
+
+    aggregator = TickAggregator()
+    market_clock = 0.0
+
+    async def publish_bars(bars):
+        for bar in bars:
+            if bar["interval"] == "1m":
+                await nc.publish(f"{MINUTE_BARS_SUBJECT}.{bar['ticker']}", json.dumps(bar).encode())
+            else:
+                await asyncio.to_thread(store.write, bar["ticker"], daily_bar_columns(bar))
+
+    async def tick_handler(msg):
+        nonlocal market_clock
+        try:
+            tick = json.loads(msg.data.decode())
+            ticker = tick.get("ticker") or msg.subject.rsplit(".", 1)[-1]
+            ticker, price = ticker.upper(), float(tick["price"])
+            timestamp = tick_timestamp(tick, market_clock)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"[StockPriceAgent] Bad tick on {msg.subject}: {e}")
+            return
+        if ticker not in aggregator.slots:
+            # Ticks on this subscription wait for the seed, so the ticker is seeded once and in order
+            aggregator.install_seed(ticker, await asyncio.to_thread(seed_ticker, aggregator, store, ticker, timestamp))
+        market_clock = max(market_clock, timestamp)
+        await publish_bars(aggregator.on_tick(ticker, price, float(tick.get("size", 0)), timestamp))
+
+    async def publish_signals():
+        # Bars close on market time (the latest tick seen), so replays behave like live feeds
+        while True:
+            await asyncio.sleep(SIGNAL_INTERVAL)
+            await publish_bars(aggregator.flush(market_clock))
+            changed = aggregator.take_changed()
+            if changed:
+                payload = {"timestamp": market_clock, "signals": aggregator.signals(changed)}
+                await nc.publish(SIGNALS_SUBJECT, json.dumps(payload).encode())
 
-    await nc.subscribe(STOCK_PRICE_TOPIC, cb=price_handler)
+    await subscribe_agent(nc, metrics, price_handler)
+    await nc.subscribe(f"{TICKS_SUBJECT}.>", cb=tick_handler)
+    asyncio.create_task(publish_signals())
     print("[StockPriceAgent] Listening for tasks...")
     await asyncio.Future()
 
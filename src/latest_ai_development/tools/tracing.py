@@ -0,0 +1,311 @@
+"""
+Lightweight distributed tracing across NATS hops.
+
+Trace context travels in NATS message headers using the W3C ``traceparent``
+format plus a publish timestamp, so the time a message spent on the bus can be
+separated from the time spent in a handler:
+
+    traceparent   00-<trace_id:32 hex>-<span_id:16 hex>-01
+    x-sent-at-ns  wall-clock publish time in nanoseconds
+
+Each agent creates a span per handled message (continuing the trace found in
+the incoming headers, or starting a new one at ``crew.captain``) and passes
+``span.headers()`` to every ``nc.publish``. Finished spans are exported in
+OTLP/JSON form, configured through environment variables:
+
+    TRACE_EXPORT_FILE      append OTLP ExportTraceServiceRequests, one per line
+    TRACE_OTLP_ENDPOINT    POST batches to a collector, e.g. http://localhost:4318
+
+With neither set, spans are created and propagated but not exported.
+Render a waterfall for a task with ``tools/perf/trace_waterfall.py``.
+"""
+
+import atexit
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+TRACEPARENT_HEADER = "traceparent"
+SENT_AT_HEADER = "x-sent-at-ns"
+
+
+class SpanKind:
+    """OTLP span kinds."""
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+    PRODUCER = 4
+    CONSUMER = 5
+
+
+class StatusCode:
+    """OTLP status codes."""
+    UNSET = 0
+    OK = 1
+    ERROR = 2
+
+
+def parse_traceparent(headers: Optional[Dict[str, str]]):
+    """Return (trace_id, parent_span_id) from message headers, or None if absent or malformed."""
+    if not headers:
+        return None
+    value = headers.get(TRACEPARENT_HEADER)
+    if not value:
+        return None
+    parts = value.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    trace_id, span_id = parts[1].lower(), parts[2].lower()
+    # All-zero ids are invalid in W3C trace context
+    if not _is_hex(trace_id) or not _is_hex(span_id) or not int(trace_id, 16) or not int(span_id, 16):
+        return None
+    return trace_id, span_id
+
+
+def _is_hex(value: str) -> bool:
+    return all(c in "0123456789abcdef" for c in value)
+
+
+def _attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class Span:
+    """A single timed operation. Use as a context manager or call end() explicitly."""
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_span_id: Optional[str],
+                 kind: int, attributes: Optional[Dict] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status_code = StatusCode.UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error) -> None:
+        self.status_code = StatusCode.ERROR
+        self.status_message = str(error)
+
+    def headers(self) -> Dict[str, str]:
+        """Headers carrying this span as the parent of whatever consumes the message."""
+        return {
+            TRACEPARENT_HEADER: f"00-{self.trace_id}-{self.span_id}-01",
+            SENT_AT_HEADER: str(time.time_ns()),
+        }
+
+    def child(self, name: str, kind: int = SpanKind.INTERNAL, attributes: Optional[Dict] = None) -> "Span":
+        """Start a span nested under this one in the same process."""
+        merged = {"task_id": self.attributes.get("task_id")} if "task_id" in self.attributes else {}
+        merged.update(attributes or {})
+        return Span(self.tracer, name, self.trace_id, self.span_id, kind, merged)
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.tracer.exporter.export(self.tracer.service_name, self)
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items() if v is not None],
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc is not None:
+            self.record_error(exc)
+        self.end()
+        return False
+
+
+def otlp_request(service_name: str, spans) -> Dict:
+    """Wrap spans of one service in an OTLP ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "latest_ai_development.tracing"},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+class NoopExporter:
+    def export(self, service_name: str, span: Span) -> None:
+        pass
+
+
+class BatchExporter(ABC):
+    """
+    Queues finished spans and hands them to `write` in batches from a background
+    thread, so a message handler never waits on telemetry I/O.
+    """
+
+    def __init__(self, batch_size: int = 64, flush_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue" = queue.Queue(maxsize=10000)
+        threading.Thread(target=self._run, name="otlp-exporter", daemon=True).start()
+        atexit.register(self.flush)
+
+    def export(self, service_name: str, span: Span) -> None:
+        try:
+            self.queue.put_nowait((service_name, span))
+        except queue.Full:
+            pass  # Never block a message handler on telemetry
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until every span exported so far has been written."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    @abstractmethod
+    def write(self, requests) -> None:
+        """Deliver a batch of OTLP requests; runs on the exporter thread."""
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and time.monotonic() < deadline:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            by_service: Dict[str, list] = {}
+            for service_name, span in batch:
+                by_service.setdefault(service_name, []).append(span)
+            try:
+                self.write([otlp_request(service_name, spans) for service_name, spans in by_service.items()])
+            except Exception as e:
+                print(f"[Tracing] Failed to export {len(batch)} spans: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+
+class FileExporter(BatchExporter):
+    """Appends OTLP/JSON requests to a local file, one line per service per batch."""
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 0.2):
+        self.path = path
+        super().__init__(batch_size, flush_interval)
+
+    def write(self, requests) -> None:
+        with open(self.path, "a") as f:
+            f.writelines(json.dumps(request) + "\n" for request in requests)
+
+
+class CollectorExporter(BatchExporter):
+    """Batches spans in a background thread and POSTs them to an OTLP/HTTP collector."""
+
+    def __init__(self, endpoint: str, batch_size: int = 64, flush_interval: float = 1.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        super().__init__(batch_size, flush_interval)
+
+    def write(self, requests) -> None:
+        for payload in requests:
+            self._post(payload)
+
+    def _post(self, payload: Dict) -> None:
+        request = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            print(f"[Tracing] Failed to export spans to {self.url}: {e}")
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """Return the process-wide exporter configured from the environment."""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            if os.environ.get("TRACE_OTLP_ENDPOINT"):
+                _exporter = CollectorExporter(os.environ["TRACE_OTLP_ENDPOINT"])
+            elif os.environ.get("TRACE_EXPORT_FILE"):
+                _exporter = FileExporter(os.environ["TRACE_EXPORT_FILE"])
+            else:
+                _exporter = NoopExporter()
+        return _exporter
+
+
+class Tracer:
+    """Creates spans for one service (agent process)."""
+
+    def __init__(self, service_name: str, exporter=None):
+        self.service_name = service_name
+        self.exporter = exporter or get_exporter()
+
+    def start_span(self, name: str, headers: Optional[Dict[str, str]] = None, task_id: Optional[str] = None,
+                   kind: int = SpanKind.CONSUMER, attributes: Optional[Dict] = None) -> Span:
+        """
+        Start a span continuing the trace in `headers`, or a new trace if there is none.
+
+        When the headers carry a publish timestamp, the time the message waited
+        on the bus is recorded as the ``messaging.queue_time_ms`` attribute.
+        """
+        merged = {"task_id": task_id}
+        merged.update(attributes or {})
+        context = parse_traceparent(headers)
+        if context:
+            trace_id, parent_span_id = context
+        else:
+            trace_id, parent_span_id = secrets.token_hex(16), None
+        span = Span(self, name, trace_id, parent_span_id, kind, merged)
+        sent_at = headers.get(SENT_AT_HEADER) if headers else None
+        if sent_at and sent_at.isdigit():
+            span.set_attribute("messaging.queue_time_ms", round((span.start_ns - int(sent_at)) / 1e6, 3))
+        return span
+
+    def start_message_span(self, msg, task_id: Optional[str] = None, name: Optional[str] = None) -> Span:
+        """Start a consumer span for a received NATS message."""
+        return self.start_span(
+            name or f"receive {msg.subject}",
+            headers=msg.headers,
+            task_id=task_id,
+            kind=SpanKind.CONSUMER,
+            attributes={"messaging.system": "nats", "messaging.destination": msg.subject},
+        )
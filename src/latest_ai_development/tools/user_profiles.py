@@ -0,0 +1,191 @@
+"""
+Per-user profile store for the prompt processor.
+
+Without it, every prompt asks the LLM to infer ``risk_level``,
+``investment_horizon`` and ``sectors_of_interest`` from scratch. Profiles are
+kept in SQLite behind an in-memory LRU, keyed by the ``user_id`` a task
+carries (``DEFAULT_USER_ID`` when it has none). A cached lookup is a dict
+access. The prompt only asks the LLM for preferences the message adds or
+changes. What the LLM extracts is merged back into the profile.
+
+Profiles are seeded from the knowledge directory.
+``knowledge/user_preference.txt`` describes the default user, and
+``knowledge/users/<user id>.txt`` describes other users. Seed files hold
+``key: value`` lines and plain sentences such as "User is based in Paris."
+A seed is applied again only when its file changes. Preferences learned
+since then are kept unless the file sets them.
+
+Tasks without a ``user_id`` read the default profile but never write to it:
+anonymous callers are different people, and one caller's extracted
+preferences must not be served to the next.
+
+    USER_PROFILE_DB           SQLite file              (default data/user_profiles.db)
+    USER_PROFILE_CACHE_SIZE   profiles kept in memory  (default 1024)
+    DEFAULT_USER_ID           user of tasks without one (default "default")
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+USER_PROFILE_DB = os.environ.get("USER_PROFILE_DB", "data/user_profiles.db")
+CACHE_SIZE = int(os.environ.get("USER_PROFILE_CACHE_SIZE", "1024"))
+DEFAULT_USER_ID = os.environ.get("DEFAULT_USER_ID", "default")
+DEFAULT_SEED_FILE = "user_preference.txt"
+USERS_SEED_DIR = "users"
+
+# Preferences the prompt processor used to infer on every prompt
+PREFERENCE_FIELDS = ("risk_level", "investment_horizon", "sectors_of_interest")
+LIST_FIELDS = {"sectors_of_interest", "interests"}
+
+SENTENCE_PATTERNS = [
+    (re.compile(r"^user(?:'s)? name is (?P<value>.+?)\.?$", re.IGNORECASE), "name"),
+    (re.compile(r"^user is (?:based|located) in (?P<value>.+?)\.?$", re.IGNORECASE), "location"),
+    (re.compile(r"^user is interested in (?P<value>.+?)\.?$", re.IGNORECASE), "interests"),
+    (re.compile(r"^user is an? (?P<value>.+?)\.?$", re.IGNORECASE), "occupation"),
+]
+KEY_VALUE = re.compile(r"^(?P<key>[A-Za-z_][\w ]*?)\s*[:=]\s*(?P<value>.+)$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    seed_hash TEXT,
+    updated REAL NOT NULL
+)
+"""
+
+
+def task_user_id(task_data: Dict, default: Optional[str] = DEFAULT_USER_ID) -> Optional[str]:
+    """The user id of a task (at any nesting level), or `default` for an anonymous task."""
+    while isinstance(task_data, dict):
+        if task_data.get("user_id"):
+            return str(task_data["user_id"])
+        task_data = task_data.get("original_task_data")
+    return default
+
+
+def _split_list(value: Any):
+    if isinstance(value, str):
+        return [item.strip() for item in re.split(r",|\band\b", value) if item.strip()]
+    return value
+
+
+def parse_profile(text: str) -> Dict[str, Any]:
+    """Profile fields from a seed file's ``key: value`` lines and "User is ..." sentences."""
+    profile: Dict[str, Any] = {}
+    for line in text.splitlines():
+        line = line.strip().lstrip("-* ").strip()
+        if not line or line.startswith("#"):
+            continue
+        for pattern, field in SENTENCE_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                value = match.group("value").strip()
+                if field in LIST_FIELDS:
+                    profile[field] = profile.get(field, []) + _split_list(value)
+                else:
+                    profile[field] = value
+                break
+        else:
+            match = KEY_VALUE.match(line)
+            if match:
+                key = match.group("key").strip().lower().replace(" ", "_")
+                value = match.group("value").strip()
+                profile[key] = _split_list(value) if key in LIST_FIELDS else value
+    return profile
+
+
+def _meaningful(value: Any) -> bool:
+    return value not in (None, "", [], {}) and str(value).lower() not in ("unknown", "none", "n/a")
+
+
+def merge_profile(profile: Dict[str, Any], fields: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """`profile` with the meaningful values of `fields` on top."""
+    return {**profile, **{k: v for k, v in (fields or {}).items() if _meaningful(v)}}
+
+
+class UserProfileStore:
+    """SQLite-backed user profiles with an LRU of recently used ones."""
+
+    def __init__(self, path: str = USER_PROFILE_DB, cache_size: int = CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        # Reentrant: update() reads through get() while holding it
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.stats = {"hit": 0, "miss": 0}
+
+    def _remember(self, user_id: str, profile: Dict) -> None:
+        self._cache[user_id] = profile
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """The profile of `user_id` ({} if unknown). Treat it as read-only."""
+        with self._lock:
+            profile = self._cache.get(user_id)
+            if profile is not None:
+                self._cache.move_to_end(user_id)
+                self.stats["hit"] += 1
+                return profile
+            self.stats["miss"] += 1
+            row = self._db.execute("SELECT profile FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+            profile = json.loads(row[0]) if row else {}
+            self._remember(user_id, profile)
+            return profile
+
+    def update(self, user_id: str, fields: Dict[str, Any], seed_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Merge the meaningful values of `fields` into the profile; returns the new profile."""
+        # Read, merge and write under one lock, so concurrent updates for a user never drop each other's fields
+        with self._lock:
+            current = self.get(user_id)
+            profile = merge_profile(current, fields)
+            if profile == current and seed_hash is None:
+                return current
+            if seed_hash is None:
+                self._db.execute(
+                    "INSERT INTO profiles (user_id, profile, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET profile = excluded.profile, updated = excluded.updated",
+                    (user_id, json.dumps(profile), time.time()))
+            else:
+                self._db.execute("INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?)",
+                                 (user_id, json.dumps(profile), seed_hash, time.time()))
+            self._remember(user_id, profile)
+            return profile
+
+    def seed(self, user_id: str, text: str) -> bool:
+        """Apply a seed file's contents to `user_id` unless this exact seed was applied before."""
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        with self._lock:
+            row = self._db.execute("SELECT seed_hash FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+            if row and row[0] == digest:
+                return False
+            self.update(user_id, parse_profile(text), seed_hash=digest)
+            return True
+
+    def seed_from_directory(self, directory: str) -> int:
+        """Seed the default user and ``users/<id>.txt`` users from a knowledge directory."""
+        root = Path(directory)
+        seeds = [(DEFAULT_USER_ID, root / DEFAULT_SEED_FILE)]
+        seeds += [(path.stem, path) for path in sorted((root / USERS_SEED_DIR).glob("*.txt"))]
+        applied = sum(self.seed(user_id, path.read_text()) for user_id, path in seeds if path.is_file())
+        if applied:
+            print(f"[UserProfiles] Seeded {applied} profiles from {directory}")
+        return applied
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
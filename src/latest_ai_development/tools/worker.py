@@ -1,72 +1,142 @@
+"""
+Generic crew worker: serves free-text tasks from ``crew.tasks``.
+
+Agents and crews are built once at startup. Each of ``CREW_WORKER_CONCURRENCY``
+crew slots owns its own three agents and one single-task crew per route, with
+the task description templated as ``{request}``. Building them per message
+would cost more than the routing itself. A message is routed with the
+precompiled matcher, waits for an idle slot, and kicks that slot's crew off
+in a thread of a pool of the same size. The event loop stays free for NATS
+pings and further messages. While every slot is busy, the handler waits, so
+the backlog stays in the subscription's pending queue instead of piling up
+as tasks.
+
+A slot is only ever used by one kickoff at a time, because crewAI agents keep
+per-execution state.
+"""
+
 import asyncio
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
 from nats.aio.client import Client as NATS
 from crewai import Agent, Task, Crew
 
-async def crew_worker():
-    nc = NATS()
-    await nc.connect("nats://localhost:4222")  # Connect to NATS server
+TASKS_TOPIC = "crew.tasks"
+WORKER_CONCURRENCY = int(os.environ.get("CREW_WORKER_CONCURRENCY", "4"))
+
+AGENT_SPECS = {
+    "translator": dict(
+        name="Translator",
+        role="Language expert",
+        goal="Accurately translate texts from various languages.",
+        backstory="A highly trained AI model with expertise in linguistics and translation."
+    ),
+    "summarizer": dict(
+        name="Summarizer",
+        role="Content summarizer",
+        goal="Summarize long texts into short, concise summaries.",
+        backstory="An AI model trained in text summarization and NLP."
+    ),
+    "qa": dict(
+        name="QA Bot",
+        role="Question Answering system",
+        goal="Answer questions based on the given context.",
+        backstory="An AI that specializes in answering user queries."
+    ),
+}
+
+# ✅ Agent selection: the first keyword found wins, otherwise the translator
+ROUTES = [(re.compile(keyword, re.IGNORECASE), route)
+          for keyword, route in (("translate", "translator"), ("summarize", "summarizer"), ("question", "qa"))]
+DEFAULT_ROUTE = "translator"
+
+
+def route_for(text: str) -> str:
+    for pattern, route in ROUTES:
+        if pattern.search(text):
+            return route
+    return DEFAULT_ROUTE
+
+
+def build_slot() -> Dict[str, Crew]:
+    """One crew per route, all sharing this slot's agents."""
+    agents = {route: Agent(**spec) for route, spec in AGENT_SPECS.items()}
+    return {
+        route: Crew(agents=list(agents.values()), tasks=[Task(
+            description="{request}",
+            agent=agent,
+            expected_output="A processed text output based on the request."
+        )])
+        for route, agent in agents.items()
+    }
 
-    async def message_handler(msg):
-        """Handles incoming tasks from NATS."""
-        subject = msg.subject
-        data = msg.data.decode()
 
-        print(f"Received task: {data}")
+class CrewPool:
+    """`size` crew slots built once, each running at most one kickoff at a time in a thread pool."""
 
-        # ✅ Multiple Agents
-        translator = Agent(
-            name="Translator",
-            role="Language expert",
-            goal="Accurately translate texts from various languages.",
-            backstory="A highly trained AI model with expertise in linguistics and translation."
-        )
-
-        summarizer = Agent(
-            name="Summarizer",
-            role="Content summarizer",
-            goal="Summarize long texts into short, concise summaries.",
-            backstory="An AI model trained in text summarization and NLP."
-        )
-
-        qa_agent = Agent(
-            name="QA Bot",
-            role="Question Answering system",
-            goal="Answer questions based on the given context.",
-            backstory="An AI that specializes in answering user queries."
-        )
-
-
-        # ✅ Agent Selection Based on Task
-        if "translate" in data.lower():
-            selected_agent = translator
-        elif "summarize" in data.lower():
-            selected_agent = summarizer
-        elif "question" in data.lower():
-            selected_agent = qa_agent
-        else:
-            selected_agent = translator  # Default agent
-
-        task = Task(
-            description=data,
-            agent=selected_agent,
-            expected_output="A processed text output based on the request."
-        )
+    def __init__(self, build: Callable[[], Dict[str, Crew]] = build_slot, size: int = WORKER_CONCURRENCY):
+        self.size = max(1, size)
+        self.idle: asyncio.Queue = asyncio.Queue()
+        for _ in range(self.size):
+            self.idle.put_nowait(build())
+        self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="crew")
+
+    async def acquire(self) -> Dict[str, Crew]:
+        return await self.idle.get()
 
-        crew = Crew(agents=[translator, summarizer, qa_agent], tasks=[task])
+    async def kickoff(self, slot: Dict[str, Crew], route: str, request: str) -> str:
+        """Run `request` on the slot's crew for `route`, then give the slot back."""
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, lambda: slot[route].kickoff(inputs={"request": request}))
+            return str(result)
+        finally:
+            self.idle.put_nowait(slot)
 
-        # Execute task and get the output
-        result = crew.kickoff()
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
-        # ✅ Convert result to string before publishing
-        response = str(result)
+
+async def crew_worker():
+    nc = NATS()
+    await nc.connect("nats://localhost:4222")  # Connect to NATS server
+
+    pool = CrewPool()
+    running = set()
+    print(f"[Worker] Built {pool.size} crew slots")
+
+    async def process(msg, slot, route):
+        data = msg.data.decode()
+        try:
+            response = await pool.kickoff(slot, route, data)
+        except Exception as e:
+            print(f"[Worker] Task failed: {e}")
+            response = f"Error: {e}"
         print(f"Sending response: {response}")
+        await nc.publish(msg.subject + ".reply", response.encode())
 
-        await nc.publish(subject + ".reply", response.encode())
+    async def message_handler(msg):
+        """Routes a task to an idle crew slot; waits while all slots are busy."""
+        data = msg.data.decode()
+        print(f"Received task: {data}")
+        route = route_for(data)
+        slot = await pool.acquire()
+        task = asyncio.create_task(process(msg, slot, route))
+        running.add(task)
+        task.add_done_callback(running.discard)
 
     # ✅ Subscribe before running the event loop
-    await nc.subscribe("crew.tasks", cb=message_handler)
+    await nc.subscribe(TASKS_TOPIC, cb=message_handler)
     print("Crew AI agents are listening for tasks...")
 
-    await asyncio.Future()  # Keeps process running
+    try:
+        await asyncio.Future()  # Keeps process running
+    finally:
+        pool.shutdown()
+
 
-asyncio.run(crew_worker())
+if __name__ == "__main__":
+    asyncio.run(crew_worker())
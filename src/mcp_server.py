@@ -5,42 +5,72 @@ import logging
 import random
 from nats.aio.client import Client as NATS
 from nats.aio.errors import ErrConnectionClosed, ErrTimeout, ErrNoServers
+from latest_ai_development.tools import columnar
+from latest_ai_development.tools.claim_check import open_claim_check
+from latest_ai_development.tools.gateway.admission import AdmissionController, AdmissionRejected, estimate_task_tokens
+from latest_ai_development.tools.gateway.result_cache import ResultCache, cache_key, is_complete
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 mcp = FastMCP("CrewAI MCP Gateway")
 
+# Identical prompts share one pipeline run and reuse its result for GATEWAY_CACHE_TTL seconds
+result_cache = ResultCache()
+# Shares the gateway's ADMISSION_* limits; all MCP callers count as one client
+admission = AdmissionController()
+
 # Generate consistent task ID format
 def generate_task_id():
     return f"task-{random.randint(1000, 9999)}"
 
 @mcp.tool()
-async def recommend_stocks(prompt: str) -> str:
+async def recommend_stocks(prompt: str, fresh: bool = False, result_encoding: str = "json") -> str:
+    """
+    Recommend stocks for the prompt. Set fresh=True to skip cached results, and
+    result_encoding="columnar" to get the full price bars instead of summaries.
+    """
     try:
         logging.info(f"[MCP] Received prompt: {prompt}")
-        task_id = generate_task_id()
-        return await send_to_captain_and_wait(prompt, task_id)
+        result, status = await result_cache.get_or_run(
+            cache_key(prompt, result_encoding=result_encoding),
+            lambda: admitted_send(prompt, result_encoding),
+            bypass=fresh,
+            cacheable=lambda r: r.startswith("✅"),
+        )
+        logging.info(f"[MCP] Result cache: {status}")
+        return result
+    except AdmissionRejected as e:
+        logging.warning(f"[MCP] {e}")
+        return f"⏳ Rate limited: retry after {e.retry_after_header}s"
     except Exception as e:
         logging.error(f"[MCP] Unexpected failure in recommend_stocks: {e}")
         return f"❌ Internal error: {str(e)}"
 
-async def send_to_captain_and_wait(prompt: str, task_id: str) -> str:
+async def admitted_send(prompt: str, result_encoding: str = "json") -> str:
+    await admission.acquire("mcp", estimate_task_tokens(prompt))
+    return await send_to_captain_and_wait(prompt, generate_task_id(), result_encoding)
+
+async def send_to_captain_and_wait(prompt: str, task_id: str, result_encoding: str = "json") -> str:
     task_data = {
         "task_id": task_id,
         "task_description": prompt,
         "task_type": "stock_recommendation"
     }
+    if result_encoding != "json":
+        task_data["result_encoding"] = result_encoding
 
     try:
         nc = NATS()
         await nc.connect("nats://localhost:4222")
         logging.info("[NATS] Connected to server.")
+        claims = await open_claim_check(nc)
 
         response_future = asyncio.Future()
 
         async def result_handler(msg):
             try:
-                result = json.loads(msg.data.decode())
+                # JSON, or the executor's columnar bundle
+                result = columnar.load_result(msg.data)
                 incoming_task_id = (
                     result.get("task_id")
                     or result.get("original_task_data", {}).get("task_id")
@@ -52,7 +82,8 @@ async def send_to_captain_and_wait(prompt: str, task_id: str) -> str:
                 )
 
                 if incoming_task_id == task_id and not response_future.done():
-                    response_future.set_result(result)
+                    # Large results arrive as claim-check stubs
+                    response_future.set_result(await claims.resolve(result))
                 else:
                     logging.debug(f"[Result Handler] Ignored message for task_id: {incoming_task_id}")
             except Exception as e:
@@ -65,9 +96,12 @@ async def send_to_captain_and_wait(prompt: str, task_id: str) -> str:
         logging.info(f"[NATS] 🕓 Waiting for response to task_id: {task_id}")
 
         try:
-            result = await asyncio.wait_for(response_future, timeout=60)
+            result = columnar.to_json(await asyncio.wait_for(response_future, timeout=60))
             formatted_result = json.dumps(result, indent=2)
             logging.info(f"[MCP] Final response received: {formatted_result}")
+            if not is_complete(result):
+                # Some agents failed or timed out; answer, but keep it out of the cache
+                return f"⚠️ Partial recommendation:\n{formatted_result}"
             return f"✅ Recommendation:\n{formatted_result}"
         except asyncio.TimeoutError:
             logging.warning(f"[MCP] Timeout waiting for task_id: {task_id}")
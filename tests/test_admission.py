@@ -0,0 +1,70 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.gateway.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    TokenBucket,
+    estimate_task_tokens,
+)
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=10, burst=2)
+    now = bucket.updated
+    assert bucket.wait_time(1, now) == 0
+    bucket.reserve(2)
+    assert bucket.wait_time(1, now) == pytest.approx(0.1)
+    assert bucket.wait_time(1, now + 0.11) == 0
+
+
+def test_burst_is_admitted_then_queued_in_order():
+    controller = AdmissionController(tasks_per_sec=20, client_tasks_per_sec=0, llm_tokens_per_sec=0,
+                                     burst_seconds=0.1, max_queue_wait=5)
+
+    async def main():
+        return await asyncio.gather(*(controller.acquire("c", 100) for _ in range(4)))
+
+    start = time.monotonic()
+    waits = asyncio.run(main())
+    assert waits[:2] == [0.0, 0.0]
+    assert 0 < waits[2] < waits[3]
+    assert time.monotonic() - start >= waits[3] - 0.01
+
+
+def test_rejects_with_retry_after_when_wait_too_long():
+    controller = AdmissionController(tasks_per_sec=100, client_tasks_per_sec=1, llm_tokens_per_sec=0,
+                                     burst_seconds=1, max_queue_wait=0.5)
+
+    async def main():
+        await controller.acquire("noisy", 100)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire("noisy", 100)
+        # Other clients are unaffected
+        assert await controller.acquire("quiet", 100) == 0.0
+        return excinfo.value
+
+    rejected = asyncio.run(main())
+    assert rejected.scope == "client"
+    assert rejected.retry_after_header == "1"
+
+
+def test_llm_token_budget_and_batch_mode_never_rejects():
+    controller = AdmissionController(tasks_per_sec=0, client_tasks_per_sec=0,
+                                     llm_tokens_per_sec=estimate_task_tokens("x") * 20,
+                                     burst_seconds=0.05, max_queue_wait=0)
+
+    async def main():
+        await controller.acquire("c", estimate_task_tokens("x"))
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("c", estimate_task_tokens("x"))
+        return await controller.acquire("c", estimate_task_tokens("x"), reject=False)
+
+    assert asyncio.run(main()) > 0
@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.market.backtest import (
+    parameter_grid,
+    performance,
+    positions,
+    run_backtests,
+    strategy_returns,
+)
+
+
+def universe(tickers=6, bars=400):
+    rng = np.random.default_rng(7)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (tickers, bars)), axis=1))
+
+
+def test_parameter_grid_skips_inverted_windows():
+    grid = parameter_grid({"sma_fast": [10, 60], "sma_slow": [50, 100]})
+    assert grid == [{"sma_fast": 10, "sma_slow": 50}, {"sma_fast": 10, "sma_slow": 100},
+                    {"sma_fast": 60, "sma_slow": 100}]
+
+
+def test_positions_hold_between_entry_and_exit():
+    score = np.array([[np.nan, 1, 2, 1, 0, 3, np.nan, -1]])
+    assert positions(score, entry=2, exit=0).tolist() == [[0, 0, 1, 1, 0, 1, 1, 0]]
+
+
+def test_always_long_matches_buy_and_hold():
+    close = universe()
+    returns = strategy_returns(close, {"entry": -10, "exit": -20}, cost_bps=0)
+    warm = 60  # all indicators warmed up, so the position is 1 from here on
+    expected = (close[:, warm + 1:] / close[:, warm:-1] - 1).mean(axis=0)
+    assert np.allclose(returns[warm + 1:], expected)
+
+
+def test_performance_metrics():
+    metrics = performance(np.array([0.0, 0.1, -0.5, 0.2]))
+    assert metrics["total_return"] == pytest.approx(1.1 * 0.5 * 1.2 - 1)
+    assert metrics["max_drawdown"] == pytest.approx(-0.5)
+
+
+def test_process_pool_matches_inline_run():
+    close = universe()
+    grid = parameter_grid({"rsi_period": [7, 14], "entry": [1.0, 2.0]})
+    inline = run_backtests(close, grid, workers=1)
+    pooled = run_backtests(close, grid, workers=2)
+    strip = lambda results: [{k: v for k, v in r.items() if k != "seconds"} for r in results]
+    assert strip(pooled) == strip(inline)
+    assert [r["sharpe"] for r in inline] == sorted((r["sharpe"] for r in inline), reverse=True)
@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+import litellm
+import pytest
+from openai.types.chat import ChatCompletion
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.cassette import Cassette, CassetteMiss, install_litellm, wrap_openai_client
+
+MESSAGES = [{"role": "user", "content": "Summarize NVDA news"}]
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return ChatCompletion.model_validate({
+            "id": f"chatcmpl-{self.calls}", "object": "chat.completion", "created": 0, "model": kwargs["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"answer {self.calls}"}}],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+        })
+
+
+class FakeClient:
+    def __init__(self):
+        self.chat = type("Chat", (), {"completions": FakeCompletions()})()
+        self.embeddings = type("Embeddings", (), {"create": lambda self, **kwargs: None})()
+
+
+def test_openai_calls_are_recorded_once_and_replayed(tmp_path):
+    path = str(tmp_path / "dev.db")
+    live = FakeClient()
+    client = wrap_openai_client(live, Cassette(path))
+
+    first = client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES, temperature=0.5)
+    again = client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES, temperature=0.0)
+    other = client.chat.completions.create(model="gpt-4o", messages=MESSAGES)
+    assert live.chat.completions.calls == 2
+    assert again.choices[0].message.content == first.choices[0].message.content == "answer 1"
+    assert other.choices[0].message.content == "answer 2"
+    assert again.usage.total_tokens == 7
+
+    # A fresh process replaying the same file never reaches the API
+    replayer = FakeClient()
+    client = wrap_openai_client(replayer, Cassette(path, mode="replay"))
+    assert client.chat.completions.create(model="gpt-4o", messages=MESSAGES).choices[0].message.content == "answer 2"
+    with pytest.raises(CassetteMiss):
+        client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES + MESSAGES)
+    assert replayer.chat.completions.calls == 0
+
+
+def test_litellm_completion_replays_without_a_provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(litellm, "completion", litellm.completion)
+    cassette = Cassette(str(tmp_path / "crew.db"))
+    assert install_litellm(cassette)
+
+    recorded = litellm.completion(model="gpt-4o-mini", messages=MESSAGES, mock_response="Final Answer: up")
+    cassette.mode = "replay"
+    replayed = litellm.completion(model="gpt-4o-mini", messages=MESSAGES)
+    assert isinstance(replayed, litellm.ModelResponse)
+    assert replayed.choices[0].message.content == recorded.choices[0].message.content == "Final Answer: up"
+    assert cassette.replayed == 1 and cassette.recorded == 1
+    assert cassette.stats()["calls"][0]["kind"] == "litellm.completion"
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pytest
+from nats.aio.client import Client as NATS
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools import columnar
+from latest_ai_development.tools.claim_check import ClaimCheck, LocalClaimStore, ObjectClaimStore
+
+
+def test_small_payloads_stay_inline_and_large_ones_are_stubbed(tmp_path):
+    claims = ClaimCheck(LocalClaimStore(str(tmp_path)), threshold=100)
+
+    async def run():
+        small = json.dumps({"task_id": "t1", "agent": "A", "info": "short"}).encode()
+        assert await claims.check_in(small, "t1", "A") is None
+
+        big = json.dumps({"task_id": "t1", "agent": "A", "info": "x" * 1000}).encode()
+        stub = json.loads(await claims.check_in(big, "t1", "A"))
+        assert stub["task_id"] == "t1" and stub["claim_check"]["bytes"] == len(big)
+        # Content-addressed: the same payload is stored once
+        assert json.loads(await claims.check_in(big, "t1", "A")) == stub
+        assert len(list(tmp_path.iterdir())) == 1
+
+        frame = columnar.encode({"task_id": "t1", "agent": "P"}, {"close": np.arange(50.0)})
+        frame_stub = json.loads(await claims.check_in(frame, "t1", "P", columnar.RESULT_ENCODING))
+
+        aggregate = {"task_id": "t1", "aggregated_results": [stub, {"agent": "B", "info": "inline"}, frame_stub]}
+        stubbed = await claims.check_in(json.dumps(aggregate).encode(), "t1", "Executor")
+        return await claims.resolve(json.loads(stubbed))
+
+    resolved = asyncio.run(run())
+    first, second, third = resolved["aggregated_results"]
+    assert first["info"] == "x" * 1000
+    assert second["info"] == "inline"
+    assert np.array_equal(third["arrays"]["close"], np.arange(50.0))
+
+
+def test_expired_claims_are_collected_and_resolve_to_errors(tmp_path):
+    store = LocalClaimStore(str(tmp_path), ttl=60)
+    claims = ClaimCheck(store, threshold=0)
+    stub = json.loads(asyncio.run(claims.check_in(b'{"info": "old"}', "t2", "A")))
+
+    path = tmp_path / stub["claim_check"]["ref"]
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    result = asyncio.run(claims.resolve(stub))
+    assert result["task_id"] == "t2" and "expired" in result["error"]
+
+    assert store.gc() == 1
+    assert not path.exists()
+
+
+def test_object_store_round_trip():
+    async def run():
+        nc = NATS()
+        try:
+            await nc.connect("nats://localhost:4222")
+        except Exception as e:
+            pytest.skip("NATS server not available: " + str(e))
+        js = nc.jetstream()
+        try:
+            await js.account_info()
+        except Exception as e:
+            await nc.close()
+            pytest.skip("JetStream not enabled (run nats-server -js): " + str(e))
+
+        bucket = f"TEST_CLAIMS_{uuid.uuid4().hex[:8]}"
+        try:
+            claims = ClaimCheck(await ObjectClaimStore.open(js, bucket=bucket, ttl=60), threshold=10)
+            stub = json.loads(await claims.check_in(b'{"info": "from the object store"}', "t3", "A"))
+            missing = {**stub, "claim_check": {**stub["claim_check"], "ref": "0" * 64}}
+            return await claims.resolve(stub), await claims.resolve(missing)
+        finally:
+            await js.delete_object_store(bucket)
+            await nc.close()
+
+    found, missing = asyncio.run(run())
+    assert found == {"info": "from the object store"}
+    assert "error" in missing
@@ -0,0 +1,66 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools import columnar
+from latest_ai_development.tools.market.ingest_prices import synthetic_ohlcv
+from latest_ai_development.tools.market.price_store import DAY, PriceStore
+from latest_ai_development.tools.sub_agents.stock_price_agent import extract_task_field, history_arrays, price_history
+
+
+def test_frame_round_trip_returns_views_of_the_message():
+    arrays = {
+        "close": np.linspace(1, 2, 7),
+        "timestamp": np.arange(7, dtype=np.int64),
+        "matrix": np.arange(6, dtype=np.float32).reshape(2, 3),
+        "big_endian": np.arange(3, dtype=">f8"),
+    }
+    frame = columnar.encode({"task_id": "t1", "agent": "A"}, arrays)
+    meta, decoded = columnar.decode(frame)
+
+    assert meta == {"task_id": "t1", "agent": "A"}
+    for name, array in arrays.items():
+        assert np.array_equal(decoded[name], array)
+        assert decoded[name].base is not None and not decoded[name].flags.writeable
+        assert decoded[name].ctypes.data % 8 == 0
+    assert decoded["big_endian"].dtype.str == "<f8"
+    assert decoded["matrix"].shape == (2, 3)
+
+
+def test_bundle_nests_frames_without_reencoding():
+    frame = columnar.encode({"task_id": "t2", "agent": "StockPriceAgent", "info": "ok"},
+                            {"AAPL.close": np.array([1.5, 2.5])})
+    outer = columnar.bundle({"task_id": "t2", "aggregated_results": [
+        {"task_id": "t2", "agent": "StockNewsAgent", "info": "news"},
+        {"agent": "StockPriceAgent", "frame": 0},
+    ]}, [frame])
+
+    result = columnar.load_result(outer)
+    news, prices = result["aggregated_results"]
+    assert news["info"] == "news"
+    assert prices["info"] == "ok" and "frame" not in prices
+    assert list(prices["arrays"]["AAPL.close"]) == [1.5, 2.5]
+    assert columnar.load_result(json.dumps({"task_id": "t3"}).encode()) == {"task_id": "t3"}
+
+
+def test_price_history_frame_is_smaller_than_json(tmp_path):
+    store = PriceStore(str(tmp_path))
+    for seed, ticker in enumerate(["AAPL", "MSFT"]):
+        store.write(ticker, synthetic_ohlcv(2000, seed=seed, end=1_700_000_000 // DAY * DAY))
+    task = {"original_task_data": {"original_task_data": {
+        "task_description": "AAPL and MSFT over the last 5 years", "result_encoding": "columnar"}}}
+    assert extract_task_field(task, "result_encoding") == "columnar"
+
+    history = price_history(store, extract_task_field(task, "task_description"))
+    arrays = history_arrays(store, history)
+    frame = columnar.encode(history, arrays)
+    as_json = json.dumps({**history, "bars": {name: column.tolist() for name, column in arrays.items()}})
+    assert len(frame) < len(as_json) / 2
+
+    _, decoded = columnar.decode(frame)
+    assert np.array_equal(decoded["MSFT.close"], store.last_days("MSFT", history["days"]).close)
@@ -0,0 +1,77 @@
+import asyncio
+import sys
+from pathlib import Path
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.conversation_memory import ConversationStore, estimate_tokens, history_text
+
+
+class FakeSummarizer:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, summary, turns, max_tokens):
+        self.calls.append([turn["text"] for turn in turns])
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        return f"Asked about {len(turns)} things" + (f" after: {summary}" if summary else "")
+
+
+def prompts(n):
+    return [f"Prompt {i}: what about ticker number {i} in the tech sector this week?" for i in range(n)]
+
+
+def test_history_stays_within_budget_and_is_compacted(tmp_path):
+    summarizer = FakeSummarizer()
+    store = ConversationStore(str(tmp_path / "c.db"), budget=100, summarize=summarizer)
+    due = [store.append("u1", text, "STOCK_RECOMMENDATION") for text in prompts(12)]
+    assert any(due)
+    view = store.context("u1")
+    assert view is store.context("u1")
+    assert view["history_tokens"] <= 100
+    # Compaction is behind, so older turns have dropped out of the view, never past the budget
+    assert view["recent_turns"][-1]["text"].startswith("Prompt 11")
+    assert "conversation_summary" not in view
+
+    assert store.compact("u1")
+    view = store.context("u1")
+    assert view["conversation_summary"].startswith("Asked about")
+    assert sum(len(batch) for batch in summarizer.calls) + len(view["recent_turns"]) == 12
+    assert estimate_tokens(history_text(view)) <= 100
+
+    # A restart reads the summary and the uncompacted turns back
+    reopened = ConversationStore(str(tmp_path / "c.db"), budget=100, summarize=summarizer)
+    assert reopened.context("u1") == view
+    assert reopened.context("someone else") == {"recent_turns": [], "history_tokens": 0}
+
+
+def test_failed_summaries_fall_back_to_recent_text(tmp_path):
+    store = ConversationStore(str(tmp_path / "c.db"), budget=60, summarize=FakeSummarizer(fail=True))
+    for text in prompts(6):
+        store.append("u1", text)
+    assert store.compact("u1")
+    assert store.stats["fallbacks"] == 1
+    assert "ticker number" in store.context("u1")["conversation_summary"]
+
+
+def test_background_compactor_runs_off_the_request_path(tmp_path):
+    summarizer = FakeSummarizer()
+    store = ConversationStore(str(tmp_path / "c.db"), budget=100, summarize=summarizer)
+
+    async def run():
+        compactor = store.start_compactor()
+        # As in the prompt processor, turns are appended from worker threads
+        for text in prompts(10):
+            await asyncio.to_thread(store.append, "u1", text)
+        for _ in range(100):
+            if store.stats["compactions"]:
+                break
+            await asyncio.sleep(0.01)
+        compactor.cancel()
+
+    asyncio.run(run(), debug=True)
+    assert store.stats["compactions"] >= 1
+    assert "conversation_summary" in store.context("u1")
@@ -0,0 +1,183 @@
+import asyncio
+import importlib.util
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools import columnar
+from latest_ai_development.tools.gateway.admission import AdmissionController
+from latest_ai_development.tools.gateway.dispatcher import ResultDispatcher
+
+GATEWAY_PATH = Path(__file__).parent.parent / "crewai-backend" / "main.py"
+
+
+class FakeMsg:
+    def __init__(self, subject, data):
+        self.subject = subject
+        self.data = data
+
+
+class FakeNATS:
+    """Answers each task on the dispatcher after the delay named in its description ("never" stays silent)."""
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self.published = []
+        self.max_in_flight = 0
+        self.flushes = 0
+
+    async def publish(self, subject, data):
+        task = json.loads(data)
+        self.published.append(task)
+        self.max_in_flight = max(self.max_in_flight, len(self.dispatcher.waiters))
+        if task["task_description"] != "never":
+            reply = json.dumps({"task_id": task["task_id"], "aggregated_results": [
+                {"agent": "StockNewsAgent", "info": task["task_description"]}]}).encode()
+            asyncio.get_running_loop().call_later(
+                float(task["task_description"]),
+                lambda: asyncio.ensure_future(self.dispatcher.handle(FakeMsg("client.final.results", reply))))
+
+    async def flush(self):
+        self.flushes += 1
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    spec = importlib.util.spec_from_file_location("gateway_main", GATEWAY_PATH)
+    gateway = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gateway)
+    monkeypatch.setattr(gateway, "admission", AdmissionController(0, 0, 0))
+    monkeypatch.setattr(gateway, "nc", FakeNATS(gateway.result_dispatcher))
+    return gateway
+
+
+def run_batch(gateway, descriptions, window):
+    async def collect():
+        tasks = [gateway.TaskRequest(task_description=d) for d in descriptions]
+        return [json.loads(line) async for line in gateway.stream_batch(tasks, window, "client")]
+
+    return asyncio.run(collect())
+
+
+def test_batch_streams_results_in_completion_order(gateway):
+    lines = run_batch(gateway, ["0.15", "0.05", "0.10"], window=3)
+    assert [line["index"] for line in lines] == [1, 2, 0]
+    published = {task["task_id"]: task["task_description"] for task in gateway.nc.published}
+    for line in lines:
+        assert line["result"]["task_id"] == line["task_id"]
+        assert published[line["task_id"]] == ["0.15", "0.05", "0.10"][line["index"]]
+    assert gateway.nc.flushes == 1
+
+
+def test_batch_window_caps_tasks_in_flight(gateway):
+    lines = run_batch(gateway, ["0.02"] * 10, window=3)
+    assert sorted(line["index"] for line in lines) == list(range(10))
+    assert len(gateway.nc.published) == 10
+    assert gateway.nc.max_in_flight == 3
+    assert gateway.result_dispatcher.waiters == {}
+
+
+def test_batch_timeout_yields_an_error_line(gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "TASK_TIMEOUT", 0.2)
+    lines = run_batch(gateway, ["never", "0.01"], window=2)
+    assert [line["index"] for line in lines] == [1, 0]
+    assert lines[1]["result"] == {"error": "Timeout waiting for response from agents"}
+    assert gateway.TASK_TIMEOUTS.get() == 1
+    assert gateway.result_dispatcher.waiters == {}
+
+
+def test_dispatcher_resolves_waiters_and_notifies_listeners():
+    dispatcher = ResultDispatcher()
+    heard = []
+    dispatcher.add_listener(lambda task_id, result: heard.append((task_id, result)))
+
+    async def main():
+        future = dispatcher.expect("t1")
+        await dispatcher.handle(FakeMsg("client.final.results", b'{"task_id": "other", "ok": 1}'))
+        assert not future.done() and list(dispatcher.waiters) == ["t1"]
+        await dispatcher.handle(FakeMsg("client.final.results", b'{"original_task_data": {"task_id": "t1"}}'))
+        await dispatcher.handle(FakeMsg("client.final.results", b"not json"))
+        return await dispatcher.wait("t1", future, timeout=1)
+
+    result = asyncio.run(main())
+    assert result == {"original_task_data": {"task_id": "t1"}}
+    assert dispatcher.waiters == {}
+    assert [task_id for task_id, _ in heard] == ["other", "t1"]
+
+
+def test_dispatcher_wait_times_out_and_unregisters():
+    dispatcher = ResultDispatcher()
+
+    async def main():
+        future = dispatcher.expect("t1")
+        with pytest.raises(asyncio.TimeoutError):
+            await dispatcher.wait("t1", future, timeout=0.05)
+        # A result that arrives after the timeout has nobody left to resolve
+        await dispatcher.handle(FakeMsg("client.final.results", b'{"task_id": "t1"}'))
+        return future
+
+    future = asyncio.run(main())
+    assert future.cancelled() and dispatcher.waiters == {}
+
+
+def test_claim_checks_are_fetched_only_for_wanted_results():
+    class CountingClaims:
+        def __init__(self):
+            self.resolved = []
+
+        async def resolve(self, result):
+            self.resolved.append(result["task_id"])
+            return {"task_id": result["task_id"], "info": "payload"}
+
+    claims = CountingClaims()
+    dispatcher = ResultDispatcher(claims=claims)
+    heard = []
+    dispatcher.add_listener(lambda task_id, result: heard.append((task_id, result)), wants=lambda t: t == "job")
+
+    def stub(task_id):
+        return FakeMsg("client.final.results", json.dumps(
+            {"task_id": task_id, "agent": "Executor", "claim_check": {"ref": "abc", "bytes": 1 << 20}}).encode())
+
+    async def main():
+        future = dispatcher.expect("waited")
+        for task_id in ("elsewhere", "job", "waited"):
+            await dispatcher.handle(stub(task_id))
+        return await dispatcher.wait("waited", future, timeout=1)
+
+    assert asyncio.run(main()) == {"task_id": "waited", "info": "payload"}
+    assert claims.resolved == ["job", "waited"]
+    assert heard == [("job", {"task_id": "job", "info": "payload"})]
+
+
+def test_async_job_gauge_drops_expired_jobs_at_scrape_time(gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "job_store", gateway.JobStore(ttl=0.05))
+    gateway.job_store.submit("t1")
+    assert "gateway_async_jobs 1" in asyncio.run(gateway.metrics()).body.decode()
+    time.sleep(0.1)
+    assert "gateway_async_jobs 0" in asyncio.run(gateway.metrics()).body.decode()
+
+
+def test_columnar_results_leave_the_gateway_as_json(gateway):
+    task_id, task_data = gateway.build_task("AAPL last 3 days", result_encoding="columnar")
+    assert task_data["result_encoding"] == "columnar"
+    frame = columnar.encode({"task_id": task_id, "agent": "StockPriceAgent"}, {"close": np.arange(3.0)})
+    reply = columnar.bundle({"task_id": task_id, "aggregated_results": [{"agent": "StockPriceAgent", "frame": 0}]},
+                            [frame])
+
+    async def main():
+        gateway.job_store.submit(task_id)
+        future = gateway.result_dispatcher.expect(task_id)
+        await gateway.result_dispatcher.handle(FakeMsg("client.final.results", reply))
+        return await gateway.await_result(task_id, future)
+
+    result = asyncio.run(main())
+    job = gateway.job_store.public_view(gateway.job_store.get(task_id))
+    for body in (result, job["result"]):
+        assert json.loads(json.dumps(body))["aggregated_results"][0]["arrays"] == {"close": [0.0, 1.0, 2.0]}
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from nats.aio.client import Client as NATS
+
+from latest_ai_development.tools.agent_registry.executor_subagent import executor_subagent
+from latest_ai_development.tools.hedging import (
+    FanOutPolicy,
+    HedgeBudget,
+    LatencyTracker,
+    ReplicaDirectory,
+    parse_timeouts,
+    subscribe_agent,
+)
+from latest_ai_development.tools.metrics import AgentMetrics
+
+AGENTS = {"stock_news_agent": "StockNewsAgent", "stock_price_agent": "StockPriceAgent",
+          "price_predictor_agent": "PricePredictorAgent"}
+
+
+def nats_available():
+    with socket.socket() as sock:
+        sock.settimeout(1)
+        return sock.connect_ex(("localhost", 4222)) == 0
+
+
+def test_hedges_stay_under_their_share_of_traffic():
+    budget = HedgeBudget(max_percent=5, burst=2)
+    hedges = 0
+    for _ in range(1000):
+        budget.on_dispatch()
+        hedges += budget.try_spend()
+    assert hedges == 50
+
+    # Savings from a quiet period are capped at the burst size
+    for _ in range(1000):
+        budget.on_dispatch()
+    assert sum(budget.try_spend() for _ in range(10)) == 2
+
+
+def test_only_agents_with_replicas_and_a_p95_are_hedged():
+    latencies = LatencyTracker(min_samples=20)
+    replicas = ReplicaDirectory(stale_after=15)
+    policy = FanOutPolicy(default_timeout=30, timeouts=parse_timeouts("StockNewsAgent=2"),
+                          latencies=latencies, budget=HedgeBudget(max_percent=100), replicas=replicas)
+    assert policy.timeout("stock_news_agent") == 2 and policy.timeout("stock_price_agent") == 30
+
+    for i in range(100):
+        latencies.record("stock_price_agent", (i + 1) / 100)
+    replicas.seen("stock_price_agent", "host:1")
+    assert policy.hedge_delay("stock_price_agent") is None
+
+    replicas.seen("stock_price_agent", "host:2")
+    replicas.seen("stock_price_agent", "host:3", timestamp=time.time() - 60)
+    assert replicas.replicas("stock_price_agent") == ["host_1", "host_2"]
+    assert policy.hedge_delay("stock_price_agent") == 0.95
+    assert policy.hedge_delay("stock_news_agent") is None
+
+    # Hedgeable agents get a chosen replica, so the hedge can go to the other one
+    primary = policy.dispatch("stock_price_agent")
+    assert primary in ("host_1", "host_2")
+    assert policy.hedge("stock_price_agent", exclude=primary) == ({"host_1", "host_2"} - {primary}).pop()
+    assert policy.dispatch("stock_news_agent") is None
+    assert policy.stats == {"dispatched": 2, "hedged": 1, "hedges_denied": 0, "timeouts": 0}
+
+
+def test_executor_hedges_slow_replicas_and_times_out_silent_agents():
+    if not nats_available():
+        pytest.skip("NATS server not available")
+
+    async def run():
+        nc = NATS()
+        await nc.connect("nats://localhost:4222")
+        received, results = {}, asyncio.Queue()
+        silent = set()
+
+        def replica(agent_id, name):
+            metrics = AgentMetrics(agent_id)
+            metrics.instance = f"test-{name}"
+
+            async def handle(msg):
+                task = json.loads(msg.data)
+                # The replica that gets a task first never answers it, so only a hedge gets through
+                copies = received.setdefault((agent_id, task["task_id"]), [])
+                copies.append(name)
+                if len(copies) == 1 or agent_id in silent:
+                    return
+                reply = {"task_id": task["task_id"], "agent": AGENTS[agent_id], "info": name}
+                await nc.publish("crew.responses", json.dumps(reply).encode())
+
+            return metrics, handle
+
+        async def on_result(msg):
+            await results.put(json.loads(msg.data))
+
+        policy = FanOutPolicy(default_timeout=1.0, latencies=LatencyTracker(min_samples=1),
+                              budget=HedgeBudget(max_percent=100, burst=100))
+        for agent_id in AGENTS:
+            policy.latencies.record(agent_id, 0.05)
+            for name in ("a", "b"):
+                metrics, handle = replica(agent_id, name)
+                await subscribe_agent(nc, metrics, handle)
+                policy.replicas.seen(agent_id, metrics.instance)
+        await nc.subscribe("client.final.results", cb=on_result)
+        subjects = []
+
+        async def on_agent_subject(msg):
+            subjects.append(msg.subject)
+
+        await nc.subscribe("agent.*.>", cb=on_agent_subject)
+        await nc.subscribe("agent.*", cb=on_agent_subject)
+        executor = asyncio.create_task(executor_subagent(policy))
+        await asyncio.sleep(0.5)
+
+        async def send(task_id):
+            await nc.publish("agent.executor", json.dumps({"task_id": task_id, "OP_CODE": "STOCK_RECOMMENDATION"}).encode())
+            started = time.perf_counter()
+            result = await asyncio.wait_for(results.get(), 5)
+            return result, time.perf_counter() - started
+
+        try:
+            hedged, elapsed = await send("hedge-1")
+            assert elapsed < 1.0
+            assert sorted(r["agent"] for r in hedged["aggregated_results"]) == sorted(AGENTS.values())
+            assert policy.stats["hedged"] == 3 and policy.stats["timeouts"] == 0
+            # The original goes to a known replica and the hedge always races the other one
+            assert all(sorted(received[(a, "hedge-1")]) == ["a", "b"] for a in AGENTS)
+            assert [s for s in subjects if s.count(".") == 1 and s != "agent.executor"] == []
+            assert len([s for s in subjects if s.count(".") == 2]) == 6
+
+            silent.add("stock_news_agent")
+            partial, elapsed = await send("timeout-1")
+            assert 0.9 < elapsed < 2.0
+            errors = [r for r in partial["aggregated_results"] if "error" in r]
+            assert [r["agent"] for r in errors] == ["stock_news_agent"]
+            assert len(partial["aggregated_results"]) == 3
+        finally:
+            executor.cancel()
+            await asyncio.gather(executor, return_exceptions=True)
+            await nc.close()
+
+    asyncio.run(run())
@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.market import indicators
+from latest_ai_development.tools.market.ingest_prices import synthetic_ohlcv
+from latest_ai_development.tools.market.price_store import PriceStore
+
+
+def naive_ema(values, alpha):
+    out = [values[0]]
+    for x in values[1:]:
+        out.append(out[-1] + alpha * (x - out[-1]))
+    return np.array(out)
+
+
+def prices(tickers=3, bars=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (tickers, bars)), axis=1))
+
+
+def test_ema_sma_std_match_reference():
+    close = prices()
+    expected = np.array([naive_ema(row, 2 / 27) for row in close])
+    assert np.allclose(indicators.ema(close, 26), expected)
+
+    sma = indicators.sma(close, 20)
+    assert np.isnan(sma[:, 18]).all()
+    assert np.allclose(sma[:, 19:], np.array([np.convolve(row, np.ones(20) / 20, "valid") for row in close]))
+
+    std = indicators.rolling_std(close, 20)
+    assert np.allclose(std[1, 50], close[1, 31:51].std())
+
+
+def test_rsi_extremes_and_range():
+    rising = np.linspace(1, 2, 60)[None, :]
+    assert indicators.rsi(rising, 14)[0, -1] == 100.0
+    values = indicators.rsi(prices(), 14)
+    assert np.isnan(values[:, :14]).all()
+    assert ((values[:, 14:] >= 0) & (values[:, 14:] <= 100)).all()
+
+
+def test_missing_history_is_masked_not_propagated():
+    close = prices(2, 120)
+    close[1, :40] = np.nan  # listed later
+    close[0, 70] = np.nan  # one missing bar
+    sma = indicators.sma(close, 20)
+    assert np.isnan(sma[1, :59]).all() and not np.isnan(sma[1, 59])
+    assert not np.isnan(indicators.ema(close, 12)[0, 71])
+    assert np.allclose(indicators.ema(close, 12)[1, 40:], naive_ema(close[1, 40:], 2 / 13))
+
+
+def test_score_signals_combines_trend_momentum_and_extremes():
+    close = np.array([[10.0, 10.0, 10.0]])
+    nan = np.nan
+    score = indicators.score_signals(close, {
+        "sma_fast": np.array([[nan, 11.0, 9.0]]),
+        "sma_slow": np.array([[nan, 10.0, 10.0]]),
+        "macd_hist": np.array([[0.1, 0.2, -0.1]]),
+        "rsi": np.array([[50.0, 25.0, 80.0]]),
+        "bb_percent_b": np.array([[0.5, -0.1, 1.2]]),
+    })
+    assert np.isnan(score[0, 0])
+    assert score[0, 1:].tolist() == [4.0, -4.0]
+    assert [indicators.signal_label(s) for s in (2, 0, -3)] == ["buy", "hold", "sell"]
+
+
+def test_rank_universe_is_sorted_and_matches_unchunked():
+    close = prices(7, 200)
+    tickers = [f"T{i}" for i in range(7)]
+    ranked = indicators.rank_universe(tickers, close, chunk=3)
+    assert len(ranked) == 7
+    assert [r["score"] for r in ranked] == sorted((r["score"] for r in ranked), reverse=True)
+    assert ranked == indicators.rank_universe(tickers, close)
+
+
+def test_close_matrix_aligns_store_series(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.write("AAA", synthetic_ohlcv(100, seed=1, end=86400 * 1000))
+    store.write("BBB", synthetic_ohlcv(50, seed=2, end=86400 * 1000))
+    tickers, timestamps, matrix = indicators.close_matrix(store, ["AAA", "BBB", "ZZZ"], bars=80)
+    assert tickers == ["AAA", "BBB"]
+    assert matrix.shape == (2, 80)
+    assert np.isnan(matrix[1, :30]).all() and not np.isnan(matrix[1, 30:]).any()
+
+
+def test_rank_universe_lookback_matches_full_history():
+    close = prices(5, 2000, seed=3)
+    tickers = [f"T{i}" for i in range(5)]
+    assert indicators.warmup_bars() < 2000
+    fast = indicators.rank_universe(tickers, close)
+    full = indicators.rank_universe(tickers, close, lookback=2000)
+    assert [(r["ticker"], r["score"], r["rsi"], r["bb_percent_b"]) for r in fast] == \
+        [(r["ticker"], r["score"], r["rsi"], r["bb_percent_b"]) for r in full]
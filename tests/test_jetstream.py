@@ -0,0 +1,132 @@
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from nats.aio.client import Client as NATS
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.jetstream import PullConsumer, ensure_task_stream
+
+
+# ----------------------------------------------------------------
+# Fixture: JetStream context on a throwaway stream (needs `nats-server -js`)
+# ----------------------------------------------------------------
+@pytest_asyncio.fixture
+async def work_queue():
+    nc = NATS()
+    try:
+        await nc.connect("nats://localhost:4222")
+    except Exception as e:
+        pytest.skip("NATS server not available: " + str(e))
+    js = nc.jetstream()
+    try:
+        await js.account_info()
+    except Exception as e:
+        await nc.close()
+        pytest.skip("JetStream not enabled (run nats-server -js): " + str(e))
+
+    name = f"TEST_TASKS_{uuid.uuid4().hex[:8]}"
+    subject = f"test.tasks.{name.lower()}"
+    await ensure_task_stream(js, name=name, subjects=[subject])
+    yield js, name, subject
+    await js.delete_stream(name)
+    await nc.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_task_is_redelivered_then_acked(work_queue):
+    js, stream, subject = work_queue
+    attempts = []
+    done = asyncio.Event()
+
+    async def flaky_handler(msg):
+        attempts.append(msg.data)
+        if len(attempts) == 1:
+            raise RuntimeError("simulated crash")
+        done.set()
+
+    consumer = await PullConsumer(js, subject, "flaky", flaky_handler, stream=stream,
+                                  max_ack_pending=2, fetch_timeout=0.5).start()
+    await js.publish(subject, b"task-1")
+
+    await asyncio.wait_for(done.wait(), timeout=10)
+    await consumer.unsubscribe()
+
+    assert attempts == [b"task-1", b"task-1"]
+    # Work-queue retention removes the message once the ack reaches the server
+    for _ in range(20):
+        info = await js.stream_info(stream)
+        if info.state.messages == 0:
+            break
+        await asyncio.sleep(0.05)
+    assert info.state.messages == 0
+
+
+@pytest.mark.asyncio
+async def test_max_ack_pending_bounds_concurrency(work_queue):
+    js, stream, subject = work_queue
+    running = 0
+    peak = 0
+    handled = []
+
+    async def slow_handler(msg):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        handled.append(msg.data)
+
+    for i in range(10):
+        await js.publish(subject, f"task-{i}".encode())
+    consumer = await PullConsumer(js, subject, "bounded", slow_handler, stream=stream,
+                                  max_ack_pending=3, fetch_timeout=0.5).start()
+
+    for _ in range(100):
+        if len(handled) == 10:
+            break
+        await asyncio.sleep(0.05)
+    await consumer.unsubscribe()
+
+    assert len(handled) == 10
+    assert peak <= 3
+
+
+@pytest.mark.asyncio
+async def test_slow_handler_is_kept_in_progress_not_redelivered(work_queue):
+    js, stream, subject = work_queue
+    attempts = []
+
+    async def slow_llm_call(msg):
+        attempts.append(msg.data)
+        await asyncio.sleep(2.5)
+
+    consumer = await PullConsumer(js, subject, "slow", slow_llm_call, stream=stream,
+                                  max_ack_pending=4, ack_wait=1, fetch_timeout=0.5).start()
+    await js.publish(subject, b"task-1")
+    await asyncio.sleep(3.5)
+    await consumer.unsubscribe()
+    assert attempts == [b"task-1"]
+
+
+@pytest.mark.asyncio
+async def test_consumer_recovers_after_its_consumer_is_deleted(work_queue, monkeypatch):
+    js, stream, subject = work_queue
+    monkeypatch.setattr("latest_ai_development.tools.jetstream.FETCH_RETRY_DELAY", 0.05)
+    handled = asyncio.Event()
+
+    async def handler(msg):
+        handled.set()
+
+    consumer = await PullConsumer(js, subject, "recovering", handler, stream=stream,
+                                  max_ack_pending=2, fetch_timeout=0.5).start()
+    await js.delete_consumer(stream, "recovering")
+    await js.publish(subject, b"task-1")
+    await asyncio.wait_for(handled.wait(), timeout=10)
+    assert not consumer._loop_task.done()
+    await consumer.unsubscribe()
@@ -0,0 +1,120 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.gateway.job_store import JobStore
+
+
+def test_long_poll_returns_when_result_arrives():
+    store = JobStore()
+    store.submit("t1")
+
+    async def main():
+        waiter = asyncio.create_task(store.wait("t1", timeout=5))
+        await asyncio.sleep(0.01)
+        store.complete("t1", {"task_id": "t1", "aggregated_results": []})
+        return await waiter
+
+    job = asyncio.run(main())
+    assert job["status"] == "done"
+    assert job["result"]["task_id"] == "t1"
+
+
+def test_unknown_results_are_ignored_and_oldest_jobs_evicted():
+    store = JobStore(max_jobs=2)
+    for task_id in ("a", "b", "c"):
+        store.submit(task_id)
+    assert store.get("a") is None
+    assert store.get("c")["status"] == "pending"
+    assert store.complete("zzz", {}) is False
+
+
+def test_expired_and_timed_out_jobs():
+    store = JobStore(ttl=60, job_timeout=0)
+    store.submit("slow")
+    time.sleep(0.01)
+    assert store.get("slow")["status"] == "timeout"
+
+    expired = JobStore(ttl=0)
+    expired.submit("gone")
+    time.sleep(0.01)
+    assert expired.get("gone") is None
+    assert expired.sweep() == 0
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(sqlite_path=path)
+    store.submit("t1")
+    store.complete("t1", {"answer": 42})
+
+    reopened = JobStore(sqlite_path=path)
+    job = reopened.get("t1")
+    assert job["status"] == "done"
+    assert job["result"] == {"answer": 42}
+
+
+def test_results_for_unknown_tasks_never_read_sqlite(tmp_path):
+    store = JobStore(sqlite_path=str(tmp_path / "jobs.db"))
+    store.submit("t1")
+    reads = []
+    store._load = lambda task_id: reads.append(task_id)
+    assert store.complete("t1", {"answer": 42}) is True
+    assert store.complete("sync-task", {"answer": 1}) is False
+    assert reads == []
+
+
+def test_evicted_and_restarted_jobs_complete_off_the_loop(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(max_jobs=1, sqlite_path=path)
+    store.submit("evicted")
+    store.submit("kept")
+    assert list(store.jobs) == ["kept"] and list(store.spilled) == ["evicted"]
+
+    async def main():
+        waiter = asyncio.create_task(store.wait("evicted", timeout=5))
+        await asyncio.sleep(0.01)
+        assert store.complete("evicted", {"answer": 42}) is True
+        return await waiter
+
+    job = asyncio.run(main())
+    assert job["status"] == "done" and job["result"] == {"answer": 42}
+    assert store.spilled == {}
+
+    # A job still pending when the gateway restarts is completed by the next process
+    reopened = JobStore(sqlite_path=path)
+    assert list(reopened.spilled) == ["kept"]
+    assert reopened.complete("kept", {"answer": 7}) is True
+    assert reopened.get("kept")["result"] == {"answer": 7}
+
+
+def test_sweep_counts_only_live_jobs():
+    store = JobStore(ttl=0.05)
+    store.submit("a")
+    store.submit("b")
+    assert store.sweep() == 2
+    time.sleep(0.1)
+    assert len(store) == 2 and store.sweep() == 0
+
+
+def test_lookups_outside_memory_run_off_the_loop(tmp_path):
+    store = JobStore(max_jobs=1, sqlite_path=str(tmp_path / "jobs.db"))
+    store.submit("evicted")
+    store.complete("evicted", {"answer": 42})
+    store.submit("kept")
+    loads = []
+    load = store._load
+    store._load = lambda task_id: loads.append(threading.get_ident()) or load(task_id)
+
+    async def main():
+        return await store.wait("evicted", timeout=0), await store.wait("missing", timeout=0), \
+            await store.wait("kept", timeout=0)
+
+    evicted, missing, kept = asyncio.run(main())
+    assert evicted["result"] == {"answer": 42} and missing is None and kept["status"] == "pending"
+    assert len(loads) == 2 and threading.get_ident() not in loads
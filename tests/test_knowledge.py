@@ -0,0 +1,107 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.knowledge import KnowledgeIndex, chunk_text
+
+VOCABULARY = ["user", "engineer", "agents", "francisco", "risk", "tech", "bonds", "dividends"]
+
+
+class CountingEmbedder:
+    """Bag-of-words vectors over a tiny vocabulary; remembers what it was asked to embed."""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return np.array([[t.lower().count(word) + 0.01 for word in VOCABULARY] for t in texts], dtype=np.float32)
+
+
+def write(path, text):
+    path.write_text(text)
+    # Make the edit visible even within one mtime tick
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_chunks_follow_paragraphs_and_long_ones_are_cut():
+    text = "User is an AI Engineer.\nUser likes agents.\n\n\nRisk: low\n" + "tech stocks\n" * 5
+    chunks = chunk_text(text, chunk_chars=50)
+    assert chunks[0] == (1, 2, "User is an AI Engineer.\nUser likes agents.")
+    assert [c[:2] for c in chunks[1:]] == [(5, 8), (9, 10)]
+
+
+def test_only_new_or_changed_chunks_are_embedded(tmp_path):
+    docs, store = tmp_path / "knowledge", tmp_path / "index"
+    docs.mkdir()
+    write(docs / "user_preference.txt", "User is an AI Engineer.\n\nUser is interested in AI Agents.\n")
+    write(docs / "portfolio.md", "Risk tolerance is low.\n\nPrefers bonds and dividends.\n")
+
+    embed = CountingEmbedder()
+    index = KnowledgeIndex(str(docs), str(store), embed=embed)
+    assert index.refresh()["embedded"] == 4
+    assert index.refresh()["changed"] == 0
+    hit = index.search("bonds and dividends", top_k=1)[0]
+    assert hit["source"] == "portfolio.md" and hit["lines"] == [3, 3]
+
+    # One paragraph edited, one file removed: only the edited paragraph is embedded
+    embed.texts.clear()
+    write(docs / "user_preference.txt", "User is an AI Engineer.\n\nUser lives in San Francisco.\n")
+    (docs / "portfolio.md").unlink()
+    stats = index.refresh()
+    assert stats == {"files": 1, "changed": 1, "removed": 1, "embedded": 1}
+    assert embed.texts == ["User lives in San Francisco."]
+    assert len(index) == 2
+
+    # A restart loads the stored vectors and embeds nothing but the query
+    embed = CountingEmbedder()
+    reloaded = KnowledgeIndex(str(docs), str(store), embed=embed)
+    assert reloaded.refresh()["changed"] == 0
+    assert reloaded.search("where in francisco?", top_k=1)[0]["text"] == "User lives in San Francisco."
+    reloaded.search("where in francisco?")
+    assert embed.texts == ["where in francisco?"]
+
+
+def test_watcher_picks_up_new_files(tmp_path):
+    docs = tmp_path / "knowledge"
+    docs.mkdir()
+    index = KnowledgeIndex(str(docs), str(tmp_path / "index"), embed=CountingEmbedder())
+    index.refresh()
+
+    async def run():
+        watcher = asyncio.create_task(index.watch(interval=0.02))
+        write(docs / "notes.txt", "Tech earnings season starts next week.\n")
+        for _ in range(100):
+            if len(index):
+                break
+            await asyncio.sleep(0.02)
+        watcher.cancel()
+
+    asyncio.run(run())
+    assert "Tech earnings" in index.context("tech")
+
+
+def test_search_racing_a_refresh_reads_one_consistent_view(tmp_path):
+    docs = tmp_path / "knowledge"
+    docs.mkdir()
+    write(docs / "portfolio.md", "Prefers bonds and dividends.\n")
+    embed = CountingEmbedder()
+
+    def embed_and_edit(texts):
+        # The query is embedded after search took its view: swap the indexed text out underneath it
+        if texts == ["bonds"]:
+            write(docs / "portfolio.md", "Risk tolerance is high.\n")
+            index.refresh()
+        return embed(texts)
+
+    index = KnowledgeIndex(str(docs), str(tmp_path / "index"), embed=embed_and_edit)
+    index.refresh()
+    assert [hit["text"] for hit in index.search("bonds")] == ["Prefers bonds and dividends."]
+    assert [hit["text"] for hit in index.search("risk")] == ["Risk tolerance is high."]
@@ -0,0 +1,70 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from openai import OpenAI, RateLimitError
+
+from latest_ai_development.tools.perf.llm_stub_server import StubConfig, create_server, message_text
+
+
+@pytest.fixture
+def stub():
+    def start(**options):
+        server = create_server("127.0.0.1", 0, StubConfig(**options))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        client = OpenAI(api_key="stub", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", max_retries=0)
+        return server, client
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_message_text_handles_every_content_shape():
+    assert message_text({"role": "assistant", "content": None, "tool_calls": []}) == ""
+    assert message_text({"role": "user", "content": [{"type": "text", "text": "a"},
+                                                     {"type": "image_url", "image_url": {"url": "x"}},
+                                                     {"type": "text", "text": "b"}]}) == "a\nb"
+    assert message_text({"role": "user"}) == ""
+
+
+def test_tool_call_and_multipart_messages_are_answered(stub):
+    server, client = stub()
+    response = client.chat.completions.create(model="gpt-4o-mini", messages=[
+        {"role": "system", "content": "You are a prompt processor."},
+        {"role": "user", "content": [{"type": "text", "text": "buy AAPL?"}]},
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": "call_1", "type": "function", "function": {"name": "search", "arguments": "{}"}}]},
+        {"role": "tool", "tool_call_id": "call_1", "content": "no results"},
+    ])
+    assert '"OP_CODE": "STOCK_RECOMMENDATION"' in response.choices[0].message.content
+    assert response.usage.prompt_tokens > 0
+    assert server.RequestHandlerClass.config.stats["requests"] == 1
+
+
+def test_rules_streaming_and_embeddings(stub):
+    _, client = stub(rules=[{"match": ".*", "response": "$model says $prompt"}])
+    messages = [{"role": "user", "content": "hello there"}]
+    assert client.chat.completions.create(model="m1", messages=messages).choices[0].message.content \
+        == "m1 says hello there"
+
+    stream = client.chat.completions.create(model="m1", messages=messages, stream=True)
+    assert "".join(chunk.choices[0].delta.content or "" for chunk in stream) == "m1 says hello there"
+
+    embeddings = client.embeddings.create(model="text-embedding-ada-002", input=["a", "b", "a"], dimensions=8)
+    vectors = [item.embedding for item in embeddings.data]
+    assert len(vectors[0]) == 8 and vectors[0] == vectors[2] != vectors[1]
+
+
+def test_injected_errors_reach_the_client(stub):
+    _, client = stub(error_rate=1.0)
+    with pytest.raises(RateLimitError):
+        client.chat.completions.create(model="m1", messages=[{"role": "user", "content": "hi"}])
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.perf.load_generator import (
+    TaskTrace,
+    agent_key,
+    extract_task_id,
+    percentile,
+    render_table,
+    summarize,
+)
+
+
+def test_extract_task_id_from_nested_wrappers():
+    assert extract_task_id({"task_id": "a"}) == "a"
+    assert extract_task_id({"original_task_data": {"task_id": "b"}}) == "b"
+    assert extract_task_id({"original_task_data": {"original_task_data": {"task_id": "c"}}}) == "c"
+    assert extract_task_id({"info": "no id"}) is None
+
+
+def test_agent_key_matches_topic_suffix():
+    assert agent_key("StockNewsAgent") == "stock_news_agent"
+    assert agent_key("price_predictor_agent") == "price_predictor_agent"
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+    assert percentile([], 50) is None
+
+
+def test_summarize_reports_stages_errors_and_timeouts():
+    ok = TaskTrace("t1")
+    ok.sent_at, ok.prompt_processor_at, ok.executor_at = 0.0, 0.1, 0.6
+    ok.subagent_sent = {"stock_news_agent": 0.61, "stock_price_agent": 0.62}
+    ok.subagent_replied = {"stock_news_agent": 1.5, "stock_price_agent": 0.7}
+    ok.completed_at = 1.6
+
+    failed = TaskTrace("t2")
+    failed.sent_at, failed.completed_at, failed.error = 0.0, 0.2, "No suitable sub-agent found."
+
+    slow = TaskTrace("t3")
+    slow.sent_at, slow.timed_out = 0.0, True
+
+    report = summarize([ok, failed, slow], wall_time=2.0)
+    assert (report["sent"], report["completed"], report["errors"], report["timeouts"]) == (3, 1, 1, 1)
+    assert report["throughput_tps"] == 0.5
+    assert list(report["stages"])[:3] == ["captain", "prompt_processor", "executor"]
+    assert report["stages"]["stock_news_agent"]["p50_ms"] == 890.0
+    assert "end_to_end" in render_table(report)
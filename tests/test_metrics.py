@@ -0,0 +1,72 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.metrics import AgentMetrics, Registry, SnapshotAggregator
+
+
+class FakeMsg:
+    def __init__(self, subject, data):
+        self.subject = subject
+        self.data = data
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("endpoint",))
+    in_flight = registry.gauge("in_flight", "In flight")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    requests.inc(endpoint="/start-task")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{endpoint="/start-task"} 1' in text
+    assert "in_flight 1" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "latency_seconds_count 2" in text
+
+
+def test_counter_rejects_wrong_labels():
+    counter = Registry().counter("c", "c", ("agent",))
+    with pytest.raises(ValueError):
+        counter.inc(service="x")
+
+
+def test_agent_snapshot_is_aggregated_by_gateway():
+    metrics = AgentMetrics("stock_news_agent")
+
+    @metrics.instrument
+    async def stock_news_handler(msg):
+        return None
+
+    asyncio.run(stock_news_handler(None))
+
+    class Usage:
+        prompt_tokens = 12
+        completion_tokens = 30
+
+    metrics.record_llm_usage(Usage())
+
+    aggregator = SnapshotAggregator()
+    snapshot = json.dumps(metrics.snapshot()).encode()
+    asyncio.run(aggregator.handle(FakeMsg("metrics.snapshots.stock_news_agent", snapshot)))
+
+    text = "\n".join(aggregator.collect())
+    assert 'agent_messages_handled_total{service="stock_news_agent"' in text
+    assert 'handler="stock_news_handler"} 1' in text
+    assert 'type="completion"} 30' in text
+    assert "agent_handler_latency_seconds_count" in text
@@ -0,0 +1,74 @@
+import asyncio
+import sys
+from pathlib import Path
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.news_digest import DigestCache, extract_topics, parse_watchlist
+from latest_ai_development.tools.sub_agents.stock_news_agent import task_topics
+
+
+def pipeline_task(description, process_context=None):
+    """A sub-agent task as the executor forwards it: client task -> captain -> prompt processor."""
+    client_task = {"task_id": "t1", "task_description": description, "user_id": "u1"}
+    prompt_processor_task = {"original_task_data": client_task}
+    return {
+        "task_id": "t1",
+        "OP_CODE": "STOCK_RECOMMENDATION",
+        "UserContext": {},
+        "ProcessContext": process_context or {},
+        "original_task_data": prompt_processor_task,
+    }
+
+
+def test_extract_topics_finds_tickers_companies_and_sectors():
+    assert extract_topics("Should I buy AAPL or $msft before the CEO call?") == ["AAPL", "MSFT"]
+    assert extract_topics("Is Nvidia still a good semiconductor play?") == ["NVDA", "tech"]
+    assert extract_topics("what should i invest in this year") == ["market"]
+    assert len(extract_topics("AAPL MSFT TSLA AMZN NFLX", max_topics=3)) == 3
+
+
+def test_parse_watchlist():
+    assert parse_watchlist(" aapl, Tech ,AAPL,,market") == ["AAPL", "tech", "market"]
+
+
+def test_concurrent_requests_for_same_topic_share_one_build():
+    calls = []
+
+    async def build(topic):
+        calls.append(topic)
+        await asyncio.sleep(0.05)
+        return f"{topic} news"
+
+    digests = DigestCache(build, bucket_seconds=1e9, ttl=60)
+
+    async def main():
+        first = await asyncio.gather(*(digests.get_many(["AAPL", "tech"]) for _ in range(10)))
+        later = await digests.get("AAPL")
+        return first, later
+
+    first, later = asyncio.run(main())
+    assert sorted(calls) == ["AAPL", "tech"]
+    assert all(result[0][1] == "AAPL news" for result in first)
+    assert later == ("AAPL news", "hit")
+
+
+def test_failed_builds_are_retried_and_buckets_roll_over():
+    responses = iter([None, "fresh"])
+
+    async def build(topic):
+        return next(responses)
+
+    digests = DigestCache(build, bucket_seconds=1e9, ttl=60)
+    assert asyncio.run(digests.get("AAPL")) == (None, "miss")
+    assert asyncio.run(digests.get("AAPL")) == ("fresh", "miss")
+    assert digests.key("AAPL", now=1e9 - 1) != digests.key("AAPL", now=1e9 + 1)
+
+
+def test_topics_come_from_the_prompt_two_envelopes_down():
+    earlier = {"recent_turns": [{"text": "what about TSLA?"}]}
+    assert task_topics(pipeline_task("Any news on AAPL and Nvidia?", earlier)) == ["AAPL", "NVDA"]
+    # Only a prompt without topics falls back to the conversation
+    assert task_topics(pipeline_task("any news on those?", earlier)) == ["TSLA"]
+    assert task_topics(pipeline_task("what is going on?")) == ["market"]
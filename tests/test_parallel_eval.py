@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from crewai.utilities.constants import TRAINING_DATA_FILE
+from crewai.utilities.training_handler import CrewTrainingHandler
+
+from latest_ai_development.tools.parallel_eval import (
+    merge_test_results,
+    merge_training_data,
+    render_test_results,
+    shard_iterations,
+)
+
+
+def test_shards_cover_every_iteration_once():
+    assert shard_iterations(10, 4) == [[1, 2, 3], [4, 5, 6], [7, 8], [9, 10]]
+    assert shard_iterations(2, 8) == [[1], [2]]
+    assert shard_iterations(3, 2, first=0) == [[0, 1], [2]]
+
+
+def test_test_shards_merge_into_one_table():
+    agents = [["Researcher"], ["Reporting Analyst"]]
+    shards = [
+        {"iterations": {"3": {"scores": [8.0, 6.0], "task_seconds": [10, 20]}}, "agents": agents},
+        {"iterations": {"1": {"scores": [9.0, 7.0], "task_seconds": [12, 18]},
+                        "2": {"scores": [7.0, 8.0], "task_seconds": [11, 19]}}, "agents": agents},
+    ]
+    merged = merge_test_results(shards)
+    assert list(merged["runs"]) == [1, 2, 3]
+    assert merged["task_averages"] == [8.0, 7.0]
+    assert merged["crew_average"] == 7.5
+
+    table = render_test_results(merged, wall_seconds=30.0, workers=2)
+    assert "Reporting Analyst" in table
+    assert "3 iterations in 30.0s with 2 workers (3.0x the serial task time)" in table
+
+
+def test_training_data_is_rekeyed_to_the_parent_crew(tmp_path):
+    shards, directories = [], []
+    for k, iteration in enumerate([0, 1]):
+        directory = tmp_path / f"train-shard-{k}"
+        directory.mkdir()
+        CrewTrainingHandler(str(directory / TRAINING_DATA_FILE)).save({
+            f"researcher-{k}": {iteration: {"initial_output": "draft", "human_feedback": "ok"}},
+            f"analyst-{k}": {iteration: {"initial_output": "report", "human_feedback": "ok"}},
+        })
+        shards.append({"agents": [[f"researcher-{k}", "Researcher"], [f"analyst-{k}", "Reporting Analyst"]]})
+        directories.append(str(directory))
+
+    parent = [SimpleNamespace(id="researcher"), SimpleNamespace(id="analyst")]
+    merged = merge_training_data(shards, directories, parent)
+    assert sorted(merged) == ["analyst", "researcher"]
+    assert sorted(merged["researcher"]) == [0, 1]
+    assert merged["analyst"][1]["initial_output"] == "report"
@@ -0,0 +1,75 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.parallel_runs import crew_output_dir, load_topics, render_summary, report_files, run_topics
+
+
+class FakeCrew:
+    """Stands in for a kicked-off crew: sleeps like an LLM round trip and writes its report."""
+
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, report_file):
+        self.report_file = report_file
+
+    def kickoff(self, inputs):
+        with FakeCrew.lock:
+            FakeCrew.running += 1
+            FakeCrew.peak = max(FakeCrew.peak, FakeCrew.running)
+        try:
+            time.sleep(0.05)
+            if inputs["topic"] == "broken":
+                raise RuntimeError("LLM unavailable")
+            Path(self.report_file).write_text(f"# {inputs['topic']} ({inputs['current_year']})")
+        finally:
+            with FakeCrew.lock:
+                FakeCrew.running -= 1
+
+
+def test_topics_from_args_and_file(tmp_path):
+    topics_file = tmp_path / "topics.txt"
+    topics_file.write_text("Robotics\n\n# nightly extras\nC++  # languages\nRobotics\n")
+    topics = load_topics(["Mechanical Engineering", "C"], str(topics_file))
+    assert topics == ["Mechanical Engineering", "C", "Robotics", "C++"]
+
+    files = report_files(topics, "out")
+    assert files["Mechanical Engineering"] == str(Path("out") / "mechanical-engineering.md")
+    assert files["C"] != files["C++"]
+
+
+def test_run_topics_is_bounded_and_isolates_failures(tmp_path):
+    topics = [f"topic {i}" for i in range(6)] + ["broken"]
+    started = time.perf_counter()
+    results = asyncio.run(run_topics(topics, FakeCrew, workers=3, output_dir=str(tmp_path),
+                                     inputs={"current_year": "2026"}))
+    elapsed = time.perf_counter() - started
+
+    assert FakeCrew.peak == 3
+    assert elapsed < 0.05 * len(topics)
+    assert [r["topic"] for r in results] == topics
+    assert [r["status"] for r in results] == ["ok"] * 6 + ["error"]
+    assert results[-1]["error"] == "LLM unavailable"
+    assert (tmp_path / "topic-0.md").read_text() == "# topic 0 (2026)"
+
+    summary = render_summary(results, elapsed, 3)
+    assert "7 topics (1 failed)" in summary
+
+
+def test_output_dir_is_made_relative_for_crewai(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert crew_output_dir(str(tmp_path / "reports" / "nightly")) == str(Path("reports") / "nightly")
+    assert crew_output_dir("reports") == "reports"
+    with pytest.raises(ValueError, match="outside the working directory"):
+        crew_output_dir(str(tmp_path.parent / "elsewhere"))
+    with pytest.raises(ValueError, match="outside the working directory"):
+        crew_output_dir("../elsewhere")
@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.market.ingest_prices import ingest_file, synthetic_ohlcv
+from latest_ai_development.tools.market.parsing import extract_tickers, parse_lookback_days
+from latest_ai_development.tools.market.price_store import COLUMNS, DAY, PriceStore
+from latest_ai_development.tools.sub_agents.stock_price_agent import price_history
+
+
+def test_range_queries_are_views_into_the_memmap(tmp_path):
+    store = PriceStore(str(tmp_path))
+    bars = synthetic_ohlcv(100, seed=1, end=1_700_000_000 // DAY * DAY)
+    store.write("aapl", bars)
+
+    assert store.tickers() == ["AAPL"]
+    last_week = store.last_days("AAPL", 7)
+    assert len(last_week) == 7
+    assert np.array_equal(last_week.close, bars["close"][-7:])
+    assert np.shares_memory(last_week.close, store.series("AAPL").close)
+
+    middle = store.range("AAPL", int(bars["timestamp"][10]), int(bars["timestamp"][19]))
+    assert len(middle) == 10
+    assert store.range("MSFT") is None
+
+
+def test_ingest_csv_merges_and_replaces_duplicates(tmp_path):
+    store = PriceStore(str(tmp_path / "store"))
+    first = tmp_path / "MSFT.csv"
+    first.write_text("Date,Open,High,Low,Close,Volume\n"
+                     "2024-01-03,2,3,1,2.5,100\n2024-01-02,1,2,0.5,1.5,100\n")
+    assert ingest_file(store, first) == {"MSFT": 2}
+
+    update = tmp_path / "update.csv"
+    update.write_text("symbol,date,open,high,low,close,volume\n"
+                      "MSFT,2024-01-03,2,3,1,2.75,100\nMSFT,2024-01-04,3,4,2,3.5,100\nNVDA,2024-01-04,5,6,4,5,1\n")
+    assert ingest_file(store, update) == {"MSFT": 3, "NVDA": 1}
+
+    series = store.series("MSFT")
+    assert list(series.close) == [1.5, 2.75, 3.5]
+    assert series.summary()["end"] == "2024-01-04"
+
+
+def test_parse_tickers_and_lookback():
+    assert extract_tickers("Show me the last 3 months for $tsla and Apple") == ["TSLA", "AAPL"]
+    assert parse_lookback_days("last 3 months") == 90
+    assert parse_lookback_days("how did it do?", default=30) == 30
+
+
+def test_history_with_a_zero_first_close_reports_no_change(tmp_path):
+    store = PriceStore(str(tmp_path / "store"))
+    prices = tmp_path / "NEWCO.csv"
+    prices.write_text("Date,Open,High,Low,Close,Volume\n2024-01-02,0,1,0,0,100\n2024-01-03,1,2,1,1.5,100\n")
+    ingest_file(store, prices)
+
+    history = price_history(store, "NEWCO over the last 5 days")
+    assert history["series"][0]["change_pct"] is None
+    assert "close 1.5 (n/a)" in history["info"]
+
+
+def bars_for(version):
+    """`version` + 10 daily bars whose prices encode their own day, so a mixed read is visible."""
+    days = np.arange(version, 2 * version + 10, dtype=np.int64)
+    bars = {"timestamp": days * DAY}
+    for name in COLUMNS[1:]:
+        bars[name] = days.astype(np.float64)
+    return bars
+
+
+def test_readers_never_pair_new_prices_with_old_timestamps(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.write("AAPL", bars_for(0))
+    stop = threading.Event()
+    mismatches = []
+
+    def reader():
+        reader_store = PriceStore(str(tmp_path))
+        while not stop.is_set():
+            series = reader_store.series("AAPL")
+            if not np.array_equal(series.close * DAY, series.timestamp):
+                mismatches.append(len(series))
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    # Replace rather than merge, so every version starts on a different day than the last
+    for version in range(1, 200):
+        store.write("AAPL", bars_for(version), merge=False)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert mismatches == []
+    assert len(store.series("AAPL")) == 209
+    assert sorted(os.listdir(tmp_path / "AAPL")) == ["current", "v000199-%d" % os.getpid(), "v000200-%d" % os.getpid()]
+
+
+def test_flat_layout_is_read_and_converted_on_write(tmp_path):
+    flat = tmp_path / "MSFT"
+    flat.mkdir()
+    for name, column in bars_for(0).items():
+        np.save(flat / f"{name}.npy", column)
+    store = PriceStore(str(tmp_path))
+    assert store.tickers() == ["MSFT"] and "msft" in store
+    held = store.series("MSFT")
+    assert len(held) == 10
+
+    assert store.write("MSFT", bars_for(5)) == 20
+    assert sorted(os.listdir(flat)) == ["current", "v000001-%d" % os.getpid()]
+    assert list(store.series("MSFT").close) == list(range(20))
+    # Views handed out before the write still read the old rows
+    assert list(held.close) == list(range(10))
@@ -0,0 +1,83 @@
+import asyncio
+import sys
+from pathlib import Path
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.gateway.result_cache import ResultCache, cache_key, is_complete, wants_fresh
+
+
+def test_cache_key_normalizes_prompt_and_includes_context():
+    assert cache_key("What  should I BUY?") == cache_key("what should i buy?")
+    assert cache_key("buy?", {"risk_level": "low"}) != cache_key("buy?", {"risk_level": "high"})
+    assert cache_key("buy?", user_id="u1") != cache_key("buy?", user_id="u2")
+    assert cache_key("buy?", result_encoding="columnar") != cache_key("buy?") == cache_key("buy?", result_encoding="json")
+
+
+def test_wants_fresh_headers():
+    assert wants_fresh({"x-cache-bypass": "1"})
+    assert wants_fresh({"cache-control": "no-cache"})
+    assert not wants_fresh({})
+
+
+def test_concurrent_identical_requests_run_once():
+    cache = ResultCache(ttl=60)
+    calls = []
+
+    async def run_pipeline():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"task_id": "t1", "aggregated_results": []}
+
+    async def main():
+        results = await asyncio.gather(*(cache.get_or_run("k", run_pipeline) for _ in range(5)))
+        later = await cache.get_or_run("k", run_pipeline)
+        return results, later
+
+    results, later = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == ["coalesced"] * 4 + ["miss"]
+    assert later[1] == "hit"
+
+
+def test_errors_are_not_cached_and_bypass_refreshes():
+    cache = ResultCache(ttl=60)
+    responses = iter([{"error": "Timeout"}, {"ok": 1}, {"ok": 2}])
+
+    async def run_pipeline():
+        return next(responses)
+
+    async def main():
+        first = await cache.get_or_run("k", run_pipeline, cacheable=lambda r: "error" not in r)
+        second = await cache.get_or_run("k", run_pipeline, cacheable=lambda r: "error" not in r)
+        fresh = await cache.get_or_run("k", run_pipeline, bypass=True)
+        cached = await cache.get_or_run("k", run_pipeline)
+        return first, second, fresh, cached
+
+    first, second, fresh, cached = asyncio.run(main())
+    assert first == ({"error": "Timeout"}, "miss")
+    assert second == ({"ok": 1}, "miss")
+    assert fresh == ({"ok": 2}, "bypass")
+    assert cached == ({"ok": 2}, "hit")
+
+
+def test_aggregates_with_a_timed_out_agent_are_not_cached():
+    cache = ResultCache(ttl=60)
+    degraded = {"task_id": "t1", "aggregated_results": [
+        {"agent": "StockPriceAgent", "info": "AAPL 190"},
+        {"task_id": "t1", "agent": "stock_news_agent", "error": "No response within 30 s"}]}
+    complete = {"task_id": "t2", "aggregated_results": [{"agent": "StockPriceAgent", "info": "AAPL 190"}]}
+    responses = iter([degraded, complete])
+
+    async def run_pipeline():
+        return next(responses)
+
+    async def main():
+        first = await cache.get_or_run("k", run_pipeline, cacheable=is_complete)
+        second = await cache.get_or_run("k", run_pipeline, cacheable=is_complete)
+        third = await cache.get_or_run("k", run_pipeline, cacheable=is_complete)
+        return first, second, third
+
+    assert asyncio.run(main()) == ((degraded, "miss"), (complete, "miss"), (complete, "hit"))
+    assert not is_complete({"error": "Timeout waiting for response from agents"})
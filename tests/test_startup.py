@@ -0,0 +1,53 @@
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.llm import LazyClient
+from latest_ai_development.tools.perf.startup_benchmark import SERVICES, benchmark, over_budget, parse_importtime
+
+
+def nats_available():
+    with socket.socket() as sock:
+        sock.settimeout(1)
+        return sock.connect_ex(("localhost", 4222)) == 0
+
+
+def test_importtime_output_is_parsed():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:      2000 |       2000 |     openai._client",
+        "import time:       500 |       2500 |   openai",
+        "import time:       100 |       2600 | agent",
+    ])
+    profile = parse_importtime(stderr, "agent")
+    assert profile["import_ms"] == 2.6
+    assert profile["top_packages"] == {"openai": 2.5, "agent": 0.1}
+    assert profile["heavy_modules"] == ["openai"]
+
+
+def test_lazy_client_is_built_once_on_first_use():
+    built = []
+
+    class Client:
+        answer = 42
+
+    client = LazyClient(lambda: built.append(1) or Client())
+    assert built == []
+    assert client.answer == 42 and client.warm_up().answer == 42
+    assert built == [1]
+
+
+def test_services_import_within_budget_without_heavy_modules():
+    report = benchmark(list(SERVICES), repeat=2, subscribe=False)
+    assert over_budget(report) == []
+
+
+@pytest.mark.skipif(not nats_available(), reason="NATS server not available")
+def test_services_subscribe_within_budget():
+    report = benchmark(list(SERVICES), repeat=1)
+    assert over_budget(report) == []
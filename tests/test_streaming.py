@@ -0,0 +1,112 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.market import indicators
+from latest_ai_development.tools.market.ingest_prices import synthetic_ohlcv
+from latest_ai_development.tools.market.price_store import DAY, PriceStore
+from latest_ai_development.tools.market.replay_ticks import read_ticks
+from latest_ai_development.tools.market.streaming import TickAggregator
+from latest_ai_development.tools.sub_agents.price_predictor_agent import predict, predict_task
+from latest_ai_development.tools.sub_agents.stock_price_agent import seed_ticker, tick_timestamp
+
+
+def prices(tickers=3, bars=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (tickers, bars)), axis=1))
+
+
+def test_incremental_state_matches_batch_indicators():
+    close = prices()
+    aggregator = TickAggregator(capacity=1)
+    for ticker, row in zip("ABC", close):
+        aggregator.seed(ticker, row)
+
+    state = aggregator.indicators.committed(np.arange(3))
+    values = aggregator.indicators.values(state, close[:, -1])
+    expected = indicators.compute_indicators(close)
+    for name, column in values.items():
+        assert np.allclose(column, expected[name][:, -1], rtol=1e-9, atol=1e-9), name
+    assert aggregator.signals() == indicators.rank_universe(list("ABC"), close)
+
+
+def test_ticks_build_minute_and_daily_bars():
+    aggregator = TickAggregator()
+    day = 10 * DAY
+    assert aggregator.on_tick("AAPL", 10.0, 5, day + 1) == []
+    aggregator.on_tick("AAPL", 12.0, 5, day + 30)
+    aggregator.on_tick("AAPL", 9.0, 5, day + 59)
+    closed = aggregator.on_tick("AAPL", 11.0, 1, day + 61)
+    assert closed == [{"ticker": "AAPL", "interval": "1m", "start": day,
+                       "open": 10.0, "high": 12.0, "low": 9.0, "close": 9.0, "volume": 15.0}]
+
+    closed = aggregator.flush(day + DAY)
+    assert [(bar["interval"], bar["close"], bar["volume"]) for bar in closed] == [("1m", 11.0, 1.0), ("1d", 11.0, 16.0)]
+    assert aggregator.indicators.count[aggregator.slots["AAPL"]] == 1
+    assert aggregator.take_changed() == ["AAPL"] and aggregator.take_changed() == []
+
+
+def test_open_day_is_scored_provisionally():
+    close = prices(tickers=1)[0]
+    aggregator = TickAggregator()
+    aggregator.seed("NVDA", close[:-1])
+    aggregator.on_tick("NVDA", close[-1], 100, 2000 * DAY + 5)
+
+    assert aggregator.indicators.count[0] == len(close) - 1
+    assert aggregator.signals() == indicators.rank_universe(["NVDA"], close[None, :])
+
+
+def test_replay_csv_and_live_signals_override_store(tmp_path):
+    ticks = tmp_path / "ticks.csv"
+    ticks.write_text("symbol,time,price,qty\nMSFT,2024-01-02T14:30:05Z,101.5,10\nmsft,1704205800,101,3\n")
+    assert read_ticks(str(ticks)) == [
+        {"ticker": "MSFT", "price": 101.0, "size": 3.0, "timestamp": 1704205800.0},
+        {"ticker": "MSFT", "price": 101.5, "size": 10.0, "timestamp": 1704205805.0},
+    ]
+
+    store = PriceStore(str(tmp_path / "prices"))
+    store.write("AAPL", synthetic_ohlcv(600, seed=1, end=1_700_000_000 // DAY * DAY))
+    live = {"TSLA": {"ticker": "TSLA", "signal": "buy", "score": 4.0, "close": 250.0, "rsi": 25.0,
+                     "macd_hist": 1.0, "bb_percent_b": -0.1, "received": 1000.0, "live": True}}
+
+    prediction = predict(store, "what should I buy?", live, now=1001.0)
+    assert [s["ticker"] for s in prediction["signals"]] == ["TSLA", "AAPL"]
+    assert "Buy TSLA" in prediction["info"]
+    # Stale live signals are ignored
+    assert [s["ticker"] for s in predict(store, "AAPL and TSLA", live, now=1e9)["signals"]] == ["AAPL"]
+
+
+def test_predictor_ranks_the_tickers_named_in_a_forwarded_task(tmp_path):
+    store = PriceStore(str(tmp_path / "prices"))
+    for seed, ticker in enumerate(["AAPL", "MSFT", "NVDA"]):
+        store.write(ticker, synthetic_ohlcv(600, seed=seed, end=1_700_000_000 // DAY * DAY))
+    # client task -> captain -> prompt processor -> executor
+    task = {"task_id": "t1", "OP_CODE": "STOCK_RECOMMENDATION", "UserContext": {}, "ProcessContext": {},
+            "original_task_data": {"original_task_data": {"task_id": "t1", "task_description": "Should I buy NVDA?"}}}
+    assert [s["ticker"] for s in predict_task(store, task)["signals"]] == ["NVDA"]
+
+
+def test_seed_built_off_the_aggregator_matches_stored_history(tmp_path):
+    store = PriceStore(str(tmp_path))
+    end = 1_700_000_000 // DAY * DAY
+    store.write("AAPL", synthetic_ohlcv(600, seed=1, end=end))
+    aggregator = TickAggregator(capacity=1)
+    aggregator.on_tick("MSFT", 10.0, 1, end + DAY)
+
+    seed = seed_ticker(aggregator, store, "AAPL", end + DAY + 30)
+    assert "AAPL" not in aggregator.slots
+    aggregator.install_seed("AAPL", seed)
+    reference = TickAggregator()
+    reference.seed("AAPL", store.range("AAPL").close[-indicators.warmup_bars():])
+    assert aggregator.signals(["AAPL"]) == reference.signals()
+
+
+def test_untimed_ticks_use_market_time_or_wall_time():
+    assert tick_timestamp({"price": 1, "timestamp": 1704205800}, 0.0) == 1704205800.0
+    assert tick_timestamp({"price": 1}, 1704205800.0) == 1704205800.0
+    # Before any timestamped tick there is no market time: bars open now, not at the epoch
+    assert tick_timestamp({"price": 1}, 0.0, now=1_800_000_000.0) == 1_800_000_000.0
@@ -11,7 +11,6 @@ src_path = str(Path(__file__).parent.parent / "src")
 sys.path.insert(0, src_path)
 
 from latest_ai_development.tools.agent_registry.agent_registry import AgentRegistry
-from latest_ai_development.crew import LatestAiDevelopment
 from latest_ai_development.tools.captain.captain_agent import captain_agent
 from latest_ai_development.tools.agent_registry.executor_subagent import executor_subagent
 
@@ -0,0 +1,98 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.perf.trace_waterfall import load_spans, render_waterfall, spans_for_task
+from latest_ai_development.tools.tracing import (
+    SENT_AT_HEADER,
+    TRACEPARENT_HEADER,
+    FileExporter,
+    NoopExporter,
+    SpanKind,
+    StatusCode,
+    Tracer,
+    parse_traceparent,
+)
+
+
+def test_traceparent_round_trips_through_headers():
+    tracer = Tracer("crew.captain", exporter=NoopExporter())
+    span = tracer.start_span("receive crew.captain", task_id="task-1")
+    headers = span.headers()
+    assert parse_traceparent(headers) == (span.trace_id, span.span_id)
+
+    consumer = tracer.start_span("receive agent.executor", headers=headers, task_id="task-1")
+    assert consumer.trace_id == span.trace_id
+    assert consumer.parent_span_id == span.span_id
+    assert consumer.attributes["messaging.queue_time_ms"] >= 0
+
+
+@pytest.mark.parametrize("value", [
+    "",
+    "00-abc-def-01",
+    "00-" + "a" * 32 + "-" + "b" * 16,
+    "00-" + "g" * 32 + "-" + "b" * 16 + "-01",
+    "00-" + "0" * 32 + "-" + "b" * 16 + "-01",
+    "00-" + "a" * 32 + "-" + "0" * 16 + "-01",
+])
+def test_malformed_traceparent_starts_a_new_trace(value):
+    assert parse_traceparent({TRACEPARENT_HEADER: value}) is None
+    span = Tracer("agent", exporter=NoopExporter()).start_span("s", headers={TRACEPARENT_HEADER: value,
+                                                                            SENT_AT_HEADER: "soon"})
+    assert span.parent_span_id is None and len(span.trace_id) == 32
+    assert "messaging.queue_time_ms" not in span.attributes
+
+
+def test_child_spans_nest_under_their_parent():
+    tracer = Tracer("agent.executor", exporter=NoopExporter())
+    parent = tracer.start_span("receive agent.executor", task_id="task-1")
+    child = parent.child("call stock_news_agent", kind=SpanKind.PRODUCER, attributes={"agent": "news"})
+    assert (child.trace_id, child.parent_span_id) == (parent.trace_id, parent.span_id)
+    assert child.span_id != parent.span_id
+    assert child.attributes == {"task_id": "task-1", "agent": "news"}
+
+
+def test_file_export_is_otlp_json_and_renders_as_a_waterfall(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = FileExporter(str(path))
+    captain = Tracer("crew.captain", exporter=exporter)
+    executor = Tracer("agent.executor", exporter=exporter)
+
+    with captain.start_span("receive crew.captain", task_id="task-1") as root:
+        time.sleep(0.002)
+        with executor.start_span("receive agent.executor", headers=root.headers(), task_id="task-1") as handler:
+            with pytest.raises(RuntimeError):
+                with handler.child("call stock_news_agent"):
+                    raise RuntimeError("no response")
+    with captain.start_span("receive crew.captain", task_id="task-2"):
+        pass
+    exporter.flush()
+
+    requests = [json.loads(line) for line in path.read_text().splitlines()]
+    services = {}
+    for request in requests:
+        for resource_spans in request["resourceSpans"]:
+            [service] = [a["value"]["stringValue"] for a in resource_spans["resource"]["attributes"]
+                         if a["key"] == "service.name"]
+            for scope_spans in resource_spans["scopeSpans"]:
+                services.setdefault(service, []).extend(scope_spans["spans"])
+    assert sorted(len(spans) for spans in services.values()) == [2, 2]
+    failed = next(s for s in services["agent.executor"] if s["name"] == "call stock_news_agent")
+    assert failed["status"] == {"code": StatusCode.ERROR, "message": "no response"}
+    assert int(failed["endTimeUnixNano"]) >= int(failed["startTimeUnixNano"])
+    assert {"key": "task_id", "value": {"stringValue": "task-1"}} in failed["attributes"]
+
+    spans = spans_for_task(load_spans(str(path)), "task-1")
+    assert len(spans) == 3
+    lines = render_waterfall(spans, width=20).splitlines()
+    assert [line.split(":")[0].rstrip() for line in lines[1:]] == [
+        "crew.captain", "  agent.executor", "    agent.executor"]
+    assert "!" in lines[3] and "!" not in lines[1]
+    assert all(line.count("|") == 2 for line in lines[1:])
+    assert render_waterfall([]) == "No spans found."
@@ -0,0 +1,82 @@
+import sys
+import threading
+from pathlib import Path
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.user_profiles import (
+    DEFAULT_USER_ID,
+    UserProfileStore,
+    merge_profile,
+    parse_profile,
+    task_user_id,
+)
+
+KNOWLEDGE_DIR = Path(__file__).parent.parent / "knowledge"
+
+
+def test_seed_file_sentences_and_key_values_are_parsed():
+    profile = parse_profile((KNOWLEDGE_DIR / "user_preference.txt").read_text())
+    assert profile == {"name": "John Doe", "occupation": "AI Engineer", "interests": ["AI Agents"],
+                       "location": "San Francisco, California"}
+
+    profile = parse_profile("# trader\nRisk level: high\nsectors_of_interest: tech, energy and utilities\n")
+    assert profile == {"risk_level": "high", "sectors_of_interest": ["tech", "energy", "utilities"]}
+
+
+def test_profiles_are_seeded_learned_and_cached(tmp_path):
+    knowledge = tmp_path / "knowledge"
+    (knowledge / "users").mkdir(parents=True)
+    (knowledge / "user_preference.txt").write_text((KNOWLEDGE_DIR / "user_preference.txt").read_text())
+    (knowledge / "users" / "u42.txt").write_text("risk_level: low\n")
+    db = str(tmp_path / "profiles.db")
+
+    store = UserProfileStore(db)
+    assert store.seed_from_directory(str(knowledge)) == 2
+    assert store.seed_from_directory(str(knowledge)) == 0
+    assert store.get(DEFAULT_USER_ID)["occupation"] == "AI Engineer"
+
+    # Extractions add to the profile; empty or unknown values do not overwrite it
+    store.update("u42", {"investment_horizon": "long_term", "risk_level": "unknown", "sectors_of_interest": []})
+    assert store.get("u42") == {"risk_level": "low", "investment_horizon": "long_term"}
+    assert store.stats["hit"] >= 2
+
+    # A new process reads SQLite; an edited seed file is applied again without losing learned preferences
+    (knowledge / "users" / "u42.txt").write_text("risk_level: medium\n")
+    reopened = UserProfileStore(db)
+    assert reopened.get("u42")["investment_horizon"] == "long_term"
+    assert reopened.seed_from_directory(str(knowledge)) == 1
+    assert reopened.get("u42") == {"risk_level": "medium", "investment_horizon": "long_term"}
+    assert reopened.get("nobody") == {}
+
+
+def test_user_id_is_found_at_any_nesting_level():
+    assert task_user_id({"original_task_data": {"original_task_data": {"user_id": "u7"}}}) == "u7"
+    assert task_user_id({"task_description": "buy?"}) == DEFAULT_USER_ID
+    assert task_user_id({"original_task_data": {"task_description": "buy?"}}, default=None) is None
+
+
+def test_anonymous_extractions_are_merged_without_being_kept():
+    profile = {"risk_level": "low", "name": "John Doe"}
+    assert merge_profile(profile, {"risk_level": "high", "sectors_of_interest": [], "investment_horizon": "unknown"}) \
+        == {"risk_level": "high", "name": "John Doe"}
+    assert profile == {"risk_level": "low", "name": "John Doe"}
+
+
+def test_concurrent_updates_for_one_user_keep_every_field(tmp_path):
+    store = UserProfileStore(str(tmp_path / "profiles.db"))
+    start = threading.Barrier(16)
+
+    def learn(worker):
+        start.wait()
+        for i in range(20):
+            store.update("u1", {f"field_{worker}_{i}": "yes"})
+
+    threads = [threading.Thread(target=learn, args=(worker,)) for worker in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.get("u1")) == 16 * 20
+    assert len(UserProfileStore(str(tmp_path / "profiles.db")).get("u1")) == 16 * 20
@@ -0,0 +1,71 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+src_path = str(Path(__file__).parent.parent / "src")
+sys.path.insert(0, src_path)
+
+from latest_ai_development.tools.worker import CrewPool, route_for
+
+
+class FakeCrew:
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, route):
+        self.route = route
+        self.kickoffs = 0
+
+    def kickoff(self, inputs):
+        with FakeCrew.lock:
+            FakeCrew.running += 1
+            FakeCrew.peak = max(FakeCrew.peak, FakeCrew.running)
+        try:
+            time.sleep(0.05)
+            self.kickoffs += 1
+            if inputs["request"] == "fail":
+                raise RuntimeError("LLM unavailable")
+            return f"{self.route}: {inputs['request']}"
+        finally:
+            with FakeCrew.lock:
+                FakeCrew.running -= 1
+
+
+def test_routes_match_the_first_keyword_in_priority_order():
+    assert route_for("Please TRANSLATE this question") == "translator"
+    assert route_for("Summarize the question below") == "summarizer"
+    assert route_for("A question about tides") == "qa"
+    assert route_for("hello") == "translator"
+
+
+def test_pool_reuses_slots_and_bounds_concurrent_kickoffs():
+    slots = []
+
+    def build():
+        slots.append({route: FakeCrew(route) for route in ("translator", "summarizer", "qa")})
+        return slots[-1]
+
+    async def run():
+        pool = CrewPool(build, size=3)
+
+        async def one(request):
+            slot = await pool.acquire()
+            try:
+                return await pool.kickoff(slot, route_for(request), request)
+            except RuntimeError as e:
+                return str(e)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(f"question {i}") for i in range(8)), one("fail"))
+        pool.shutdown()
+        return results, time.perf_counter() - started, pool.idle.qsize()
+
+    results, elapsed, idle = asyncio.run(run())
+    assert len(slots) == 3 and idle == 3
+    assert FakeCrew.peak == 3
+    assert elapsed < 9 * 0.05
+    assert results[0] == "qa: question 0" and results[-1] == "LLM unavailable"
+    assert sum(crew.kickoffs for slot in slots for crew in slot.values()) == 9